@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
+import hashlib
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
@@ -7,13 +9,25 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
 from app.models import TokenData, UserInDB
 from app.database import get_database
+from app.cache import TTLCache
+from app.passwords import PasswordHasher
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    pwd_context,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
 
 # JWT token handling
 security = HTTPBearer()
 
+# Per-process caches for the authentication hot path
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_user_generations: Dict[str, int] = {}  # Bumped by invalidate_user
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -22,6 +36,10 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash without blocking the event loop"""
+    return await password_hasher.hash(password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -35,7 +53,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 def verify_token(token: str) -> TokenData:
-    """Verify and decode JWT token"""
+    """Verify and decode JWT token (signature checks are cached until exp)"""
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    cached_token = token_cache.get(token_key)
+    if cached_token is not None:
+        return cached_token
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         employee_id: str = payload.get("sub")
@@ -46,6 +69,11 @@ def verify_token(token: str) -> TokenData:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         token_data = TokenData(employee_id=employee_id)
+        
+        # Cache the verified token until it expires
+        expires_at = payload.get("exp")
+        if expires_at is not None:
+            token_cache.set(token_key, token_data, ttl=expires_at - time.time())
         return token_data
     except JWTError:
         raise HTTPException(
@@ -62,12 +90,28 @@ async def get_user_by_employee_id(employee_id: str) -> Optional[UserInDB]:
         return UserInDB(**user_data)
     return None
 
+async def get_cached_user(employee_id: str) -> Optional[UserInDB]:
+    """Get user by employee ID through the per-process user cache"""
+    user = user_cache.get(employee_id)
+    if user is None:
+        generation = _user_generations.get(employee_id, 0)
+        user = await get_user_by_employee_id(employee_id)
+        # An invalidation during the lookup means this copy may predate the change
+        if user is not None and _user_generations.get(employee_id, 0) == generation:
+            user_cache.set(employee_id, user)
+    return user
+
+def invalidate_user(employee_id: str) -> None:
+    """Drop a cached user after it was changed in the database"""
+    _user_generations[employee_id] = _user_generations.get(employee_id, 0) + 1
+    user_cache.invalidate(employee_id)
+
 async def authenticate_user(employee_id: str, password: str) -> Optional[UserInDB]:
     """Authenticate user credentials"""
     user = await get_user_by_employee_id(employee_id)
     if not user:
         return None
-    if not verify_password(password, user.password):
+    if not await password_hasher.verify(password, user.password):
         return None
     return user
 
@@ -75,7 +119,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     """Get current authenticated user from JWT token"""
     token = credentials.credentials
     token_data = verify_token(token)
-    user = await get_user_by_employee_id(employee_id=token_data.employee_id)
+    user = await get_cached_user(token_data.employee_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -6,19 +6,121 @@ load_dotenv()
 class Settings:
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "mongodb://localhost:27017/saarthi_db")
-    DATABASE_NAME: str = "saarthi_db"
+    DATABASE_NAME: str = os.getenv("DATABASE_NAME", "saarthi_db")
     
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-super-secret-jwt-key-change-this")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
     
+    # Authentication Caches (per process; TTL bounds staleness across workers)
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", 10000))
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+    
+    # Password Hashing (bcrypt runs in a bounded thread pool)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+    
     # CORS
     ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
     
     # File Upload
     UPLOAD_DIRECTORY: str = os.getenv("UPLOAD_DIRECTORY", "uploads/")
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", 5242880))  # 5MB
+    MEDIA_WORKERS: int = int(os.getenv("MEDIA_WORKERS", 2))  # Processes for thumbnails and resizing
+    
+    # Reverse Geocoding
+    GAZETTEER_PATH: str = os.getenv(
+        "GAZETTEER_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "odisha_gazetteer.csv")
+    )  # CSV of name, kind, district, latitude, longitude
+    GEOCODER_CELL_DEG: float = float(os.getenv("GEOCODER_CELL_DEG", 0.05))  # ~5.5 km grid cells
+    GEOCODER_MAX_DISTANCE_KM: float = float(os.getenv("GEOCODER_MAX_DISTANCE_KM", 11))
+    
+    # Nearby Reports
+    NEARBY_MAX_RADIUS_M: int = int(os.getenv("NEARBY_MAX_RADIUS_M", 50000))  # 50 km
+    
+    # Map Tiles
+    MAP_TILE_GRID: int = int(os.getenv("MAP_TILE_GRID", 8))  # Buckets per tile side
+    MAP_MAX_TILES: int = int(os.getenv("MAP_MAX_TILES", 32))  # Per request; zoom is lowered to fit
+    MAP_TILE_CACHE_SIZE: int = int(os.getenv("MAP_TILE_CACHE_SIZE", 4096))
+    MAP_TILE_CACHE_TTL_SECONDS: int = int(os.getenv("MAP_TILE_CACHE_TTL_SECONDS", 30))
+    
+    # Hotspot Detection
+    HOTSPOT_ENABLED: bool = os.getenv("HOTSPOT_ENABLED", "true").lower() == "true"
+    HOTSPOT_INTERVAL_SECONDS: int = int(os.getenv("HOTSPOT_INTERVAL_SECONDS", 300))
+    HOTSPOT_CELL_DEG: float = float(os.getenv("HOTSPOT_CELL_DEG", 0.005))  # ~550 m cells
+    HOTSPOT_WINDOW_DAYS: int = int(os.getenv("HOTSPOT_WINDOW_DAYS", 14))
+    HOTSPOT_MIN_CELL_REPORTS: int = int(os.getenv("HOTSPOT_MIN_CELL_REPORTS", 3))  # Dense cell threshold
+    HOTSPOT_MIN_REPORTS: int = int(os.getenv("HOTSPOT_MIN_REPORTS", 10))  # Reports per hotspot
+    HOTSPOT_INCLUDE_RESOLVED: bool = os.getenv("HOTSPOT_INCLUDE_RESOLVED", "false").lower() == "true"  # Count fixed issues too
+    
+    # Metrics (Prometheus text format at /metrics)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")  # Bearer token required by /metrics when set
+    
+    # Slow Query Log (capped slow_queries collection, see /admin/slow-queries)
+    SLOW_QUERY_ENABLED: bool = os.getenv("SLOW_QUERY_ENABLED", "true").lower() == "true"
+    SLOW_QUERY_THRESHOLD_MS: int = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+    SLOW_QUERY_LOG_BYTES: int = int(os.getenv("SLOW_QUERY_LOG_BYTES", 16 * 1024 * 1024))  # Capped collection size
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 0.25))
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: int = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", 300))  # Per shape
+    
+    # Request Profiling (signed X-Profile-Token header, or a random share of requests)
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))  # e.g. 0.001 for continuous profiling
+    PROFILE_INTERVAL_MS: int = int(os.getenv("PROFILE_INTERVAL_MS", 5))
+    PROFILE_MAX_SECONDS: int = int(os.getenv("PROFILE_MAX_SECONDS", 30))  # Sampling stops after this per request
+    PROFILE_MAX_STACKS: int = int(os.getenv("PROFILE_MAX_STACKS", 5000))  # Distinct stacks kept per profile
+    PROFILE_TOKEN_TTL_SECONDS: int = int(os.getenv("PROFILE_TOKEN_TTL_SECONDS", 900))
+    PROFILE_RETENTION_DAYS: int = int(os.getenv("PROFILE_RETENTION_DAYS", 7))
+    
+    # Background Jobs (persisted in the jobs collection, run by every API worker)
+    JOBS_CONCURRENCY: int = int(os.getenv("JOBS_CONCURRENCY", 4))  # Jobs run at once per worker process
+    JOBS_POLL_INTERVAL_SECONDS: float = float(os.getenv("JOBS_POLL_INTERVAL_SECONDS", 1.0))
+    JOBS_VISIBILITY_TIMEOUT_SECONDS: int = int(os.getenv("JOBS_VISIBILITY_TIMEOUT_SECONDS", 60))  # Default handler timeout
+    JOBS_LEASE_SLACK_SECONDS: int = int(os.getenv("JOBS_LEASE_SLACK_SECONDS", 30))  # Lease beyond the timeout to record the result
+    JOBS_MAX_ATTEMPTS: int = int(os.getenv("JOBS_MAX_ATTEMPTS", 5))  # Then the job is parked as dead
+    JOBS_BACKOFF_BASE_SECONDS: float = float(os.getenv("JOBS_BACKOFF_BASE_SECONDS", 2.0))
+    JOBS_BACKOFF_MAX_SECONDS: float = float(os.getenv("JOBS_BACKOFF_MAX_SECONDS", 300.0))
+    JOBS_RETENTION_SECONDS: int = int(os.getenv("JOBS_RETENTION_SECONDS", 86400))  # Finished jobs kept for a day
+    
+    # Report Change Feed (SSE and WebSocket)
+    EVENTS_SOURCE: str = os.getenv("EVENTS_SOURCE", "local")  # local or change_stream (needs a replica set)
+    EVENTS_QUEUE_SIZE: int = int(os.getenv("EVENTS_QUEUE_SIZE", 256))  # Buffered events per consumer
+    EVENTS_HEARTBEAT_SECONDS: int = int(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+    
+    # Media Serving
+    MEDIA_OPEN_FILES: int = int(os.getenv("MEDIA_OPEN_FILES", 256))  # Cached open file descriptors
+    MEDIA_CACHE_MAX_AGE: int = int(os.getenv("MEDIA_CACHE_MAX_AGE", 31536000))  # 1 year, paths are content-addressed
+    MEDIA_READ_CHUNK_SIZE: int = int(os.getenv("MEDIA_READ_CHUNK_SIZE", 262144))  # 256KB
+    
+    # Duplicate Photo Detection (perceptual hashes)
+    PHASH_MAX_DISTANCE: int = int(os.getenv("PHASH_MAX_DISTANCE", 10))  # Hamming bits out of 64
+    PHASH_CELL_DEG: float = float(os.getenv("PHASH_CELL_DEG", 0.01))  # ~1.1 km geo cells
+    PHASH_REFRESH_SECONDS: int = int(os.getenv("PHASH_REFRESH_SECONDS", 30))
+    
+    # Response Compression (applied to large list responses only)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", 4096))  # bytes
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", 5))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", 4))
+    
+    # Bulk Import
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+    IMPORT_MAX_ERRORS: int = int(os.getenv("IMPORT_MAX_ERRORS", 1000))  # Per-row errors returned
+    IMPORT_FALLBACK_DEPARTMENT: str = os.getenv("IMPORT_FALLBACK_DEPARTMENT", "Public Works")  # For issue_type "others"
+    
+    # Streaming Export
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", 1000))  # Cursor batch / Parquet row group
+    EXPORT_CHUNK_BYTES: int = int(os.getenv("EXPORT_CHUNK_BYTES", 65536))
+    
+    # User Directory
+    USER_PAGE_MAX_LIMIT: int = int(os.getenv("USER_PAGE_MAX_LIMIT", 500))
+    
+    # User Stats Write-Behind (leaderboard lags by at most the flush interval)
+    STATS_WRITE_BEHIND: bool = os.getenv("STATS_WRITE_BEHIND", "true").lower() == "true"
+    STATS_FLUSH_INTERVAL_MS: int = int(os.getenv("STATS_FLUSH_INTERVAL_MS", 500))
+    STATS_FLUSH_MAX_ENTRIES: int = int(os.getenv("STATS_FLUSH_MAX_ENTRIES", 500))
     
     # City Coordinates (for map integration)
     CITY_COORDINATES = {
@@ -1,10 +1,12 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import IndexModel, TEXT
+from pymongo import IndexModel, TEXT, GEOSPHERE
 import asyncio
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from app.config import settings
+from app.instrumentation import mongo_event_listeners
+from app.slow_queries import slow_query_log
 
 class Database:
     client = None  # type: ignore  # type: AsyncIOMotorClient
@@ -13,7 +15,10 @@ class Database:
 # Database connection
 async def connect_to_mongo():
     """Create database connection"""
-    Database.client = AsyncIOMotorClient(settings.DATABASE_URL)
+    listeners = mongo_event_listeners() if settings.METRICS_ENABLED else []
+    if settings.SLOW_QUERY_ENABLED:
+        listeners.append(slow_query_log)
+    Database.client = AsyncIOMotorClient(settings.DATABASE_URL, event_listeners=listeners)
     Database.database = Database.client[settings.DATABASE_NAME]
     
     # Create indexes for better performance
@@ -37,8 +42,11 @@ async def create_indexes():
     # Users collection indexes
     await db.users.create_index("employee_id", unique=True)
     await db.users.create_index("email", unique=True)
+    await db.users.create_index([("department", 1), ("employee_id", 1)])  # Directory filters
+    await db.users.create_index([("role", 1), ("employee_id", 1)])
     
     # Reports collection indexes  
+    await db.reports.create_index("id", unique=True)  # Lookups and conditional updates by report ID
     await db.reports.create_index("status")
     await db.reports.create_index("department")
     await db.reports.create_index("location")
@@ -48,8 +56,65 @@ async def create_indexes():
         ("description", TEXT)
     ])  # Text search index
     
+    # Covering indexes for the "summary" sparse fieldset (id, title, status, priority)
+    # newest first, unfiltered or by status. coordinates is an array, so fieldsets
+    # including it cannot be covered and fall back to fetching documents.
+    await db.reports.create_index(
+        [("created_at", -1), ("id", 1), ("title", 1), ("status", 1), ("priority", 1)],
+        name="summary_by_created_at"
+    )
+    await db.reports.create_index(
+        [("status", 1), ("created_at", -1), ("id", 1), ("title", 1), ("priority", 1)],
+        name="summary_by_status"
+    )
+    
+    # Nearby queries on the GeoJSON copy of coordinates (documents without one are skipped)
+    await db.reports.create_index([("geo", GEOSPHERE)])
+    
+    # Incremental sync of the perceptual-hash photo index
+    await db.reports.create_index("media.hashed_at", sparse=True)
+    
+    # Hotspot bins are keyed by {row, col, day, department}; runs rebuild whole days
+    await db.report_cells.create_index("_id.day")
+    await db.reports.create_index("updated_at")  # Days with updated reports are re-binned
+    await db.hotspots.create_index([("generated_at", 1), ("rank", 1)])
+    
+    # Background jobs: claims take the oldest due job; finished jobs expire, dead ones are kept
+    await db.jobs.create_index([("status", 1), ("run_at", 1)])
+    await db.jobs.create_index(
+        "finished_at",
+        expireAfterSeconds=settings.JOBS_RETENTION_SECONDS,
+        partialFilterExpression={"status": "done"}
+    )
+    
+    # Request profiles expire after PROFILE_RETENTION_DAYS
+    await db.profiles.create_index("created_at", expireAfterSeconds=settings.PROFILE_RETENTION_DAYS * 86400)
+    await db.profiles.create_index([("route", 1), ("created_at", -1)])
+    
     # Performance tracking
     await db.user_stats.create_index("user_id", unique=True)
+    # Write-behind outbox: failed flushes, replayed oldest first until dead-lettered
+    await db.user_stats_outbox.create_index([("dead_at", 1), ("_id", 1)])
+
+async def migrate_report_geo() -> int:
+    """
+    Add the GeoJSON `geo` point to reports that only have [lat, lng] coordinates
+    
+    Runs as a single server-side pipeline update, so documents are not read
+    into the application. Returns the number of reports updated.
+    """
+    db = Database.database
+    result = await db.reports.update_many(
+        {"coordinates.1": {"$exists": True}, "geo": None},
+        [{"$set": {"geo": {
+            "type": "Point",
+            "coordinates": [
+                {"$arrayElemAt": ["$coordinates", 1]},
+                {"$arrayElemAt": ["$coordinates", 0]}
+            ]
+        }}}]
+    )
+    return result.modified_count
 
 # Initialize sample data for development
 async def init_sample_data():
@@ -61,6 +126,7 @@ async def init_sample_data():
         return
     
     from app.auth import get_password_hash
+    from app.utils import to_geo_point
     
     # Sample employees (matching frontend expectations)
     sample_employees = [
@@ -107,6 +173,7 @@ async def init_sample_data():
             "status": "Pending",
             "location": "Bhubaneswar",
             "coordinates": settings.CITY_COORDINATES["Bhubaneswar"],
+            "geo": to_geo_point(settings.CITY_COORDINATES["Bhubaneswar"]),
             "priority": "medium",
             "created_at": "2025-09-10T10:00:00",
             "updated_at": "2025-09-10T10:00:00"
@@ -120,6 +187,7 @@ async def init_sample_data():
             "status": "In Progress",
             "location": "Cuttack",
             "coordinates": settings.CITY_COORDINATES["Cuttack"],
+            "geo": to_geo_point(settings.CITY_COORDINATES["Cuttack"]),
             "priority": "high",
             "created_at": "2025-09-11T14:30:00",
             "updated_at": "2025-09-11T16:00:00"
@@ -133,6 +201,7 @@ async def init_sample_data():
             "status": "Resolved", 
             "location": "Puri",
             "coordinates": settings.CITY_COORDINATES["Puri"],
+            "geo": to_geo_point(settings.CITY_COORDINATES["Puri"]),
             "priority": "low",
             "created_at": "2025-09-08T09:00:00",
             "updated_at": "2025-09-09T11:00:00"
@@ -145,7 +214,8 @@ async def init_sample_data():
             "department": "Public Works",
             "status": "Pending",
             "location": "Rourkela",
-            "coordinates": settings.CITY_COORDINATES["Rourkela"], 
+            "coordinates": settings.CITY_COORDINATES["Rourkela"],
+            "geo": to_geo_point(settings.CITY_COORDINATES["Rourkela"]),
             "priority": "low",
             "created_at": "2025-09-12T08:00:00",
             "updated_at": "2025-09-12T08:00:00"
@@ -0,0 +1,201 @@
+import asyncio
+import itertools
+from collections import deque
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+from app.config import settings
+
+# Report event types carried on the change feed
+REPORT_CREATED = "report.created"
+REPORT_UPDATED = "report.updated"
+REPORT_STATUS = "report.status"
+REPORT_DELETED = "report.deleted"
+REPORTS_IMPORTED = "reports.imported"
+
+# Report fields included in event payloads (enough to patch a list or map row)
+EVENT_REPORT_FIELDS = (
+    "id", "title", "department", "location", "coordinates", "priority",
+    "status", "assigned_to", "created_at", "updated_at"
+)
+
+class Subscription:
+    """
+    One consumer's bounded event queue
+
+    When a slow consumer falls max_size events behind, the oldest events are
+    dropped and the consumer is told how many it missed, so a stuck client
+    never grows memory and can refetch instead.
+    """
+
+    def __init__(self, max_size: int, departments: Optional[Set[str]] = None, location: Optional[str] = None):
+        self.queue: deque = deque(maxlen=max_size)
+        self.departments = departments or None
+        self.location = location.lower() if location else None
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def matches(self, event: dict) -> bool:
+        """Check an event against this subscription's department and location filters"""
+        if self.departments:
+            departments = event.get("departments") or [event.get("department")]
+            if not self.departments.intersection(departments):
+                return False
+        if self.location and event.get("location") is not None:
+            return self.location in event["location"].lower()
+        return True
+
+    def offer(self, event: dict) -> bool:
+        """Queue an event without blocking; returns False if an older one was dropped"""
+        dropped = len(self.queue) == self.queue.maxlen
+        if dropped:
+            self.dropped += 1
+        self.queue.append(event)
+        self._ready.set()
+        return not dropped
+
+    async def get(self, timeout: float) -> List[dict]:
+        """Wait up to timeout seconds and drain the queue (empty on timeout)"""
+        if not self.queue:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+        events = list(self.queue)
+        self.queue.clear()
+        if self.dropped:
+            events.insert(0, {"type": "events.dropped", "count": self.dropped})
+            self.dropped = 0
+        return events
+
+class EventBus:
+    """In-process pub/sub for report changes, fanned out to SSE and WebSocket consumers"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscriptions: Set[Subscription] = set()
+        self._sequence = itertools.count(1)
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, departments: Optional[Iterable[str]] = None, location: Optional[str] = None) -> Subscription:
+        """Register a consumer with optional department and location filters"""
+        subscription = Subscription(self.queue_size, set(departments or ()), location)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a consumer"""
+        self.subscriptions.discard(subscription)
+
+    def publish(self, event: dict) -> None:
+        """Stamp an event and hand it to every matching consumer (never blocks)"""
+        event = {"seq": next(self._sequence), "at": datetime.utcnow(), **event}
+        self.published += 1
+        for subscription in self.subscriptions:
+            if subscription.matches(event):
+                self.delivered += 1
+                if not subscription.offer(event):
+                    self.dropped += 1
+
+    def stats(self) -> dict:
+        """Return subscriber count and delivery counters"""
+        return {
+            "source": settings.EVENTS_SOURCE,
+            "subscribers": len(self.subscriptions),
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+        }
+
+event_bus = EventBus(queue_size=settings.EVENTS_QUEUE_SIZE)
+
+def report_event(event_type: str, report: dict) -> dict:
+    """Build a report event from a report document"""
+    return {
+        "type": event_type,
+        "report_id": report.get("id"),
+        "department": report.get("department"),
+        "location": report.get("location"),
+        "report": {field: report[field] for field in EVENT_REPORT_FIELDS if field in report}
+    }
+
+def publish_report_event(event_type: str, report: dict) -> None:
+    """Publish a report change from a request handler (skipped when change streams are the source)"""
+    if settings.EVENTS_SOURCE == "local":
+        event_bus.publish(report_event(event_type, report))
+
+def publish_import_event(inserted: int, departments: Iterable[str]) -> None:
+    """Publish one summary event for a bulk import instead of an event per row"""
+    if settings.EVENTS_SOURCE == "local" and inserted:
+        event_bus.publish({
+            "type": REPORTS_IMPORTED,
+            "inserted": inserted,
+            "departments": sorted(departments)
+        })
+
+class ChangeStreamSource:
+    """
+    Feed the bus from a MongoDB change stream on reports
+
+    Sees writes from every API worker and from scripts, unlike request-side
+    publishing. Needs a replica set; enabled with EVENTS_SOURCE=change_stream.
+    The stream resumes from the last seen token after errors.
+    """
+
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token = None
+
+    async def start(self, db) -> None:
+        """Start watching reports"""
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        """Stop watching"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db) -> None:
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+        while True:
+            try:
+                async with db.reports.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=self._resume_token
+                ) as stream:
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        event = self._to_event(change)
+                        if event is not None:
+                            self.bus.publish(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Report change stream failed, retrying: {e}")
+                await asyncio.sleep(5)
+
+    @staticmethod
+    def _to_event(change: dict) -> Optional[dict]:
+        operation = change["operationType"]
+        if operation == "delete":
+            # Only the _id survives a delete; consumers refetch or drop by _id
+            return {"type": REPORT_DELETED, "document_id": str(change["documentKey"]["_id"])}
+        report = change.get("fullDocument")
+        if report is None:
+            return None
+        if operation == "insert":
+            return report_event(REPORT_CREATED, report)
+        updated_fields = change.get("updateDescription", {}).get("updatedFields", {})
+        return report_event(REPORT_STATUS if "status" in updated_fields else REPORT_UPDATED, report)
+
+change_stream_source = ChangeStreamSource(event_bus)
@@ -0,0 +1,133 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional
+import orjson
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is only available when pyarrow is installed
+    pa = None
+    pq = None
+
+# Flat column layout shared by all export formats (re-importable by the CSV importer)
+EXPORT_COLUMNS = [
+    "id", "title", "description", "department", "status", "priority",
+    "location", "latitude", "longitude", "user", "user_id", "assigned_to",
+    "created_at", "updated_at"
+]
+
+EXPORT_PROJECTION = {
+    "_id": 0,
+    **{column: 1 for column in EXPORT_COLUMNS if column not in ("latitude", "longitude")},
+    "coordinates": 1
+}
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+def _as_datetime(value) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+def export_row(report: dict) -> dict:
+    """Flatten a projected report document into the export column layout"""
+    coordinates = report.get("coordinates") or [None, None]
+    row = {column: report.get(column) for column in EXPORT_COLUMNS}
+    row["latitude"], row["longitude"] = coordinates[0], coordinates[1]
+    return row
+
+async def stream_csv(cursor, chunk_bytes: int) -> AsyncIterator[bytes]:
+    """Encode a report cursor as CSV, yielding chunks of about chunk_bytes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for report in cursor:
+        row = export_row(report)
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else ("" if value is None else value)
+            for value in row.values()
+        ])
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+async def stream_ndjson(cursor, chunk_bytes: int,
+                        transform: Callable[[dict], dict] = export_row) -> AsyncIterator[bytes]:
+    """Encode a cursor as NDJSON, yielding chunks of about chunk_bytes"""
+    buffer = bytearray()
+    async for document in cursor:
+        buffer += orjson.dumps(transform(document))
+        buffer += b"\n"
+        if len(buffer) >= chunk_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+    yield bytes(buffer)
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet footers record absolute offsets, so report the total written
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def _parquet_schema():
+    return pa.schema([
+        (column, pa.float64() if column in ("latitude", "longitude")
+         else pa.timestamp("ms") if column in ("created_at", "updated_at")
+         else pa.string())
+        for column in EXPORT_COLUMNS
+    ])
+
+async def stream_parquet(cursor, rows_per_group: int) -> AsyncIterator[bytes]:
+    """Encode a report cursor as Parquet, one row group per rows_per_group reports"""
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    rows = []
+    try:
+        async for report in cursor:
+            row = export_row(report)
+            row["created_at"] = _as_datetime(row["created_at"])
+            row["updated_at"] = _as_datetime(row["updated_at"])
+            rows.append(row)
+            if len(rows) >= rows_per_group:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                rows = []
+                yield sink.drain()
+        if rows:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,152 @@
+import csv
+import math
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app.config import settings
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+class Place(NamedTuple):
+    name: str
+    kind: str  # city, town, block, ward, ...
+    district: Optional[str]
+    latitude: float
+    longitude: float
+
+class GeocodeResult(NamedTuple):
+    place: Place
+    distance_km: float
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometers"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+class ReverseGeocoder:
+    """
+    Nearest-place lookup over a uniform lat/lng grid
+
+    Places are bucketed into cells of cell_deg degrees. A lookup scans rings
+    of cells outward from the query cell and stops once the next ring cannot
+    hold anything closer than the best match, so its cost depends on local
+    density rather than gazetteer size.
+    """
+
+    def __init__(self, places: Iterable[Place], cell_deg: float, max_distance_km: float):
+        self.cell_deg = cell_deg
+        self.max_distance_km = max_distance_km
+        self.cells: Dict[Tuple[int, int], List[Place]] = {}
+        self.size = 0
+        for place in places:
+            self.cells.setdefault(self._cell(place.latitude, place.longitude), []).append(place)
+            self.size += 1
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg))
+
+    def _min_cos(self, lat: float) -> float:
+        # Cells narrow towards the poles; use the narrowest width within search range
+        edge_lat = min(abs(lat) + self.max_distance_km / KM_PER_DEGREE_LAT, 89.0)
+        return math.cos(math.radians(edge_lat))
+
+    def _ring(self, row: int, col: int, radius: int) -> Iterable[List[Place]]:
+        if radius == 0:
+            cell = self.cells.get((row, col))
+            if cell:
+                yield cell
+            return
+        for d_row in range(-radius, radius + 1):
+            step = 1 if abs(d_row) == radius else 2 * radius
+            for d_col in range(-radius, radius + 1, step):
+                cell = self.cells.get((row + d_row, col + d_col))
+                if cell:
+                    yield cell
+
+    def reverse(self, lat: float, lng: float) -> Optional[GeocodeResult]:
+        """
+        Find the nearest place within max_distance_km
+
+        Candidates are ranked by equirectangular distance (well under 0.1%
+        off haversine at these ranges); the returned distance is haversine.
+        """
+        row, col = self._cell(lat, lng)
+        cell_height_km = self.cell_deg * KM_PER_DEGREE_LAT
+        min_step_km = cell_height_km * self._min_cos(lat)
+        km_per_degree_lng = KM_PER_DEGREE_LAT * math.cos(math.radians(lat))
+
+        # Distance from the point to the nearest edge of its own cell
+        lat_fraction = lat / self.cell_deg - row
+        lng_fraction = lng / self.cell_deg - col
+        edge_km = min(
+            min(lat_fraction, 1 - lat_fraction) * cell_height_km,
+            min(lng_fraction, 1 - lng_fraction) * min_step_km
+        )
+
+        best, best_squared = None, self.max_distance_km ** 2
+        for radius in range(int(self.max_distance_km // min_step_km) + 2):
+            # Nothing in ring r can be closer than the edge gap plus r - 1 whole cells
+            if radius > 0 and (edge_km + (radius - 1) * min_step_km) ** 2 > best_squared:
+                break
+            for cell in self._ring(row, col, radius):
+                for place in cell:
+                    dy = (place.latitude - lat) * KM_PER_DEGREE_LAT
+                    dx = (place.longitude - lng) * km_per_degree_lng
+                    squared = dx * dx + dy * dy
+                    if squared <= best_squared:
+                        best, best_squared = place, squared
+        if best is None:
+            return None
+        return GeocodeResult(best, haversine_km(lat, lng, best.latitude, best.longitude))
+
+    def reverse_many(self, points: Iterable[Optional[List[float]]]) -> List[Optional[GeocodeResult]]:
+        """
+        Reverse geocode a batch of [lat, lng] points (None entries stay None)
+
+        Repeated coordinates, common in imports where rows share a ward or
+        town centroid, are looked up once, and lookups run in grid-cell order
+        so neighbouring points reuse the same cell lists while they are hot.
+        """
+        points = list(points)
+        results: List[Optional[GeocodeResult]] = [None] * len(points)
+        unique: Dict[Tuple[float, float], List[int]] = {}
+        for index, point in enumerate(points):
+            if point and len(point) == 2:
+                unique.setdefault((float(point[0]), float(point[1])), []).append(index)
+
+        for lat, lng in sorted(unique, key=lambda point: self._cell(*point)):
+            result = self.reverse(lat, lng)
+            for index in unique[(lat, lng)]:
+                results[index] = result
+        return results
+
+def load_gazetteer(path: str) -> List[Place]:
+    """Read places from a CSV with name, kind, district, latitude, longitude columns"""
+    with open(path, newline="", encoding="utf-8-sig") as gazetteer_file:
+        return [
+            Place(
+                name=row["name"].strip(),
+                kind=(row.get("kind") or "place").strip(),
+                district=(row.get("district") or "").strip() or None,
+                latitude=float(row["latitude"]),
+                longitude=float(row["longitude"])
+            )
+            for row in csv.DictReader(gazetteer_file)
+            if row.get("name") and row.get("latitude") and row.get("longitude")
+        ]
+
+@lru_cache(maxsize=1)
+def get_geocoder() -> ReverseGeocoder:
+    """Build the reverse geocoder on first use (falls back to CITY_COORDINATES without a gazetteer)"""
+    if os.path.exists(settings.GAZETTEER_PATH):
+        places = load_gazetteer(settings.GAZETTEER_PATH)
+    else:
+        places = [
+            Place(name=city, kind="city", district=None, latitude=lat, longitude=lng)
+            for city, (lat, lng) in settings.CITY_COORDINATES.items()
+        ]
+    return ReverseGeocoder(places, settings.GEOCODER_CELL_DEG, settings.GEOCODER_MAX_DISTANCE_KM)
@@ -0,0 +1,298 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from app.database import get_database
+from app.instrumentation import current_source
+
+DAY_FORMAT = "%Y-%m-%d"
+
+# Reports written in the last few seconds may still be in flight from other workers
+WATERMARK_LAG_SECONDS = 5
+
+def _day_of(created_at) -> Optional[str]:
+    # created_at is a date for API and imported reports, an ISO string in the sample data
+    if isinstance(created_at, str):
+        return created_at[:10] or None
+    return created_at.strftime(DAY_FORMAT) if isinstance(created_at, datetime) else None
+
+def _created_between(start: datetime, end: datetime) -> dict:
+    # Dates and ISO strings never compare equal in MongoDB, so match both forms;
+    # ISO strings sort chronologically, and each branch can use the created_at index
+    return {"$or": [
+        {"created_at": {"$gte": start, "$lt": end}},
+        {"created_at": {"$gte": start.isoformat(), "$lt": end.isoformat()}}
+    ]}
+
+def bin_pipeline(day: str, cell_deg: float) -> list:
+    """Aggregation that rebuilds the geo cell x department bins of one day"""
+    start = datetime.strptime(day, DAY_FORMAT)
+    match = {**_created_between(start, start + timedelta(days=1)), "geo": {"$ne": None}}
+    if not settings.HOTSPOT_INCLUDE_RESOLVED:
+        match["status"] = {"$ne": "Resolved"}
+    return [
+        {"$match": match},
+        {"$project": {
+            "department": 1,
+            "lng": {"$arrayElemAt": ["$geo.coordinates", 0]},
+            "lat": {"$arrayElemAt": ["$geo.coordinates", 1]}
+        }},
+        {"$group": {
+            "_id": {
+                "row": {"$floor": {"$divide": ["$lat", cell_deg]}},
+                "col": {"$floor": {"$divide": ["$lng", cell_deg]}},
+                "day": day,
+                "department": "$department"
+            },
+            "count": {"$sum": 1},
+            "sum_lat": {"$sum": "$lat"},
+            "sum_lng": {"$sum": "$lng"}
+        }},
+        {"$merge": {"into": "report_cells", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+def cluster_cells(cells: Dict[Tuple[str, int, int], dict], min_cell_reports: int, min_reports: int) -> List[dict]:
+    """
+    Density clustering over grid cells (DBSCAN with cells as points)
+
+    Cells with at least min_cell_reports reports are core cells; core cells
+    that touch (8-neighbourhood) form one cluster together with the
+    non-core cells bordering them. Clusters of at least min_reports reports
+    are hotspots. Clustering is per department.
+    """
+    core = {key for key, cell in cells.items() if cell["count"] >= min_cell_reports}
+    assigned = set()
+    hotspots = []
+    for seed in sorted(core):
+        if seed in assigned:
+            continue
+        department = seed[0]
+        members, stack = [], [seed]
+        assigned.add(seed)
+        while stack:
+            key = stack.pop()
+            members.append(key)
+            if key not in core:
+                continue  # Border cells join a cluster but do not extend it
+            _, row, col = key
+            for d_row in (-1, 0, 1):
+                for d_col in (-1, 0, 1):
+                    neighbour = (department, row + d_row, col + d_col)
+                    if neighbour in cells and neighbour not in assigned:
+                        assigned.add(neighbour)
+                        stack.append(neighbour)
+
+        count = sum(cells[key]["count"] for key in members)
+        if count < min_reports:
+            continue
+        rows = [key[1] for key in members]
+        cols = [key[2] for key in members]
+        first_day = min(cells[key]["first_day"] for key in members)
+        last_day = max(cells[key]["last_day"] for key in members)
+        active_days = (datetime.strptime(last_day, DAY_FORMAT) - datetime.strptime(first_day, DAY_FORMAT)).days + 1
+        hotspots.append({
+            "department": department,
+            "latitude": round(sum(cells[key]["sum_lat"] for key in members) / count, 6),
+            "longitude": round(sum(cells[key]["sum_lng"] for key in members) / count, 6),
+            "report_count": count,
+            "cell_count": len(members),
+            "bounds": [
+                round(min(rows) * settings.HOTSPOT_CELL_DEG, 6),
+                round(min(cols) * settings.HOTSPOT_CELL_DEG, 6),
+                round((max(rows) + 1) * settings.HOTSPOT_CELL_DEG, 6),
+                round((max(cols) + 1) * settings.HOTSPOT_CELL_DEG, 6)
+            ],
+            "first_day": first_day,
+            "last_day": last_day,
+            "reports_per_day": round(count / active_days, 2)
+        })
+    hotspots.sort(key=lambda hotspot: -hotspot["report_count"])
+    return hotspots
+
+class HotspotEngine:
+    """
+    Scheduled spatio-temporal hotspot detection
+
+    Reports of the last HOTSPOT_WINDOW_DAYS days are binned into
+    report_cells by geo cell, day and department. Each run re-bins only the
+    days in the window that changed since the previous run: days with new
+    reports (found through an _id watermark) and days with reports whose
+    status, location or other fields were updated (an updated_at
+    watermark), so resolved or moved reports leave their bins. Each day is
+    rebuilt on its own from its created_at range, which also keeps a retried
+    run idempotent. Bins that leave the window are dropped. The window's
+    bins are then clustered and the result replaces the hotspots
+    collection. A lease in hotspot_state makes sure only one worker process
+    runs the job at a time.
+    """
+
+    def __init__(self, interval_seconds: int):
+        self.interval = interval_seconds
+        self.owner = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()  # Scheduled and on-demand runs share the lease owner
+        self.runs = 0
+        self.skipped = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_seconds = 0.0
+        self.last_rebinned_days = 0
+        self.last_hotspots = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the background schedule"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background schedule"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        current_source.set("hotspots")
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Hotspot detection failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _acquire_lease(self, db) -> bool:
+        now = datetime.utcnow()
+        try:
+            await db.hotspot_state.update_one(
+                {"_id": "lease", "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.interval * 2)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False  # Another worker holds the lease
+
+    async def run_once(self) -> bool:
+        """Re-bin new data and recompute hotspots; returns False if another worker holds the lease"""
+        async with self._lock:
+            return await self._run_locked()
+
+    async def _run_locked(self) -> bool:
+        db = await get_database()
+        if not await self._acquire_lease(db):
+            self.skipped += 1
+            return False
+
+        started_at = time.perf_counter()
+        now = datetime.utcnow()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        window_start = today - timedelta(days=settings.HOTSPOT_WINDOW_DAYS - 1)
+        updated_cutoff = now - timedelta(seconds=WATERMARK_LAG_SECONDS)
+        cutoff = ObjectId.from_datetime(updated_cutoff)
+
+        state = await db.hotspot_state.find_one({"_id": "bins"}) or {}
+        if state.get("window_days") != settings.HOTSPOT_WINDOW_DAYS or state.get("cell_deg") != settings.HOTSPOT_CELL_DEG:
+            state = {}  # First run, or the bins were built for another window or grid
+        days = await self._touched_days(db, state, cutoff, updated_cutoff, window_start, today)
+        for day in days:
+            await self._rebin(db, day)
+        await db.hotspot_state.update_one({"_id": "bins"}, {"$set": {
+            "watermark": cutoff,
+            "updated_watermark": updated_cutoff,
+            "window_days": settings.HOTSPOT_WINDOW_DAYS,
+            "cell_deg": settings.HOTSPOT_CELL_DEG
+        }}, upsert=True)
+        await db.report_cells.delete_many({"_id.day": {"$lt": window_start.strftime(DAY_FORMAT)}})
+
+        hotspots = await self._detect(db, window_start)
+        await self._publish(db, hotspots, now)
+
+        self.runs += 1
+        self.last_run_at = now
+        self.last_run_seconds = time.perf_counter() - started_at
+        self.last_rebinned_days = len(days)
+        self.last_hotspots = len(hotspots)
+        return True
+
+    async def _touched_days(self, db, state: dict, cutoff: ObjectId, updated_cutoff: datetime,
+                            window_start: datetime, today: datetime) -> List[str]:
+        if "watermark" not in state:
+            # First run: bin the whole window
+            return [
+                (window_start + timedelta(days=offset)).strftime(DAY_FORMAT)
+                for offset in range((today - window_start).days + 1)
+            ]
+
+        # Imported reports carry historical updated_at values, so inserts are found by _id
+        changed = {"$or": [
+            {"_id": {"$gt": state["watermark"], "$lte": cutoff}},
+            {"updated_at": {"$gt": state["updated_watermark"], "$lte": updated_cutoff}}
+        ]}
+        days = set()
+        async for report in db.reports.find(
+            {"$and": [changed, _created_between(window_start, today + timedelta(days=1))]},
+            {"_id": 0, "created_at": 1}
+        ):
+            days.add(_day_of(report.get("created_at")))
+        days.discard(None)
+        return sorted(days)
+
+    async def _rebin(self, db, day: str) -> None:
+        await db.report_cells.delete_many({"_id.day": day})
+        await db.reports.aggregate(bin_pipeline(day, settings.HOTSPOT_CELL_DEG)).to_list(length=None)
+
+    async def _detect(self, db, window_start: datetime) -> List[dict]:
+        groups = await db.report_cells.aggregate([
+            {"$match": {"_id.day": {"$gte": window_start.strftime(DAY_FORMAT)}}},
+            {"$group": {
+                "_id": {"department": "$_id.department", "row": "$_id.row", "col": "$_id.col"},
+                "count": {"$sum": "$count"},
+                "sum_lat": {"$sum": "$sum_lat"},
+                "sum_lng": {"$sum": "$sum_lng"},
+                "first_day": {"$min": "$_id.day"},
+                "last_day": {"$max": "$_id.day"}
+            }}
+        ]).to_list(length=None)
+        cells = {
+            (group["_id"]["department"], int(group["_id"]["row"]), int(group["_id"]["col"])): group
+            for group in groups
+        }
+        return cluster_cells(cells, settings.HOTSPOT_MIN_CELL_REPORTS, settings.HOTSPOT_MIN_REPORTS)
+
+    async def _publish(self, db, hotspots: List[dict], generated_at: datetime) -> None:
+        # Readers follow the generated_at marker, so the swap is atomic for them
+        if hotspots:
+            await db.hotspots.insert_many([
+                {**hotspot, "rank": rank, "generated_at": generated_at}
+                for rank, hotspot in enumerate(hotspots, start=1)
+            ])
+        await db.hotspot_state.update_one(
+            {"_id": "hotspots"},
+            {"$set": {"generated_at": generated_at, "window_days": settings.HOTSPOT_WINDOW_DAYS}},
+            upsert=True
+        )
+        await db.hotspots.delete_many({"generated_at": {"$ne": generated_at}})
+
+    def stats(self) -> dict:
+        """Return schedule state and the last run's figures"""
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "skipped_runs": self.skipped,
+            "last_run_at": self.last_run_at,
+            "last_run_seconds": round(self.last_run_seconds, 6),
+            "last_rebinned_days": self.last_rebinned_days,
+            "last_hotspots": self.last_hotspots
+        }
+
+hotspot_engine = HotspotEngine(interval_seconds=settings.HOTSPOT_INTERVAL_SECONDS)
@@ -0,0 +1,310 @@
+import codecs
+import csv
+import json
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from app.models import (
+    ReportCreate, ReportStatus, Department,
+    ImportRowError, ImportSummary, UserInDB
+)
+from app.config import settings
+from app.stats_buffer import award_points
+from app.utils import (
+    generate_report_id, validate_coordinates, calculate_priority_from_keywords,
+    calculate_user_points, to_geo_point, append_detected_city
+)
+from app.geocoder import get_geocoder
+
+# Longest line accepted before a body is rejected as malformed
+MAX_LINE_LENGTH = 64 * 1024
+
+# Mapping for the odisha_civic_issues.csv schema (location, description, issue_type, urgency)
+ISSUE_TYPE_DEPARTMENTS = {
+    "pothole": Department.public_works,
+    "road": Department.public_works,
+    "streetlight": Department.electrical,
+    "electricity": Department.electrical,
+    "garbage": Department.sanitation,
+    "sanitation": Department.sanitation,
+    "water": Department.water_supply,
+    "traffic": Department.traffic,
+    "park": Department.parks_recreation
+}
+
+# Catch-all issue types in the source data, filed under IMPORT_FALLBACK_DEPARTMENT
+FALLBACK_ISSUE_TYPES = {"others", "other"}
+
+class ImportFormatError(ValueError):
+    """Raised when an import body cannot be parsed at all"""
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines (newline kept) without buffering the body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        if "\n" not in buffer:
+            if len(buffer) > MAX_LINE_LENGTH:
+                raise ImportFormatError(f"Line longer than {MAX_LINE_LENGTH} characters")
+            continue
+        lines = buffer.split("\n")
+        buffer = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, record, error) for each non-blank NDJSON line"""
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, record, error) for each CSV record after the header"""
+    header = None
+    line_number = 0
+    record_start = 0
+    pending = ""
+
+    async for line in lines:
+        line_number += 1
+        if not pending:
+            record_start = line_number
+        pending += line
+        # A quoted field may span lines; wait until quotes are balanced
+        if pending.count('"') % 2:
+            if len(pending) > MAX_LINE_LENGTH:
+                raise ImportFormatError(f"Unterminated quoted field starting on line {record_start}")
+            continue
+
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+
+        if header is None:
+            header = [column.strip().lower() for column in values]
+            continue
+        if len(values) != len(header):
+            yield record_start, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield record_start, dict(zip(header, values)), None
+
+    if pending.strip():
+        yield record_start, None, "Unterminated quoted field"
+
+def _first(record: dict, *keys: str) -> Optional[object]:
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+def department_for_issue_type(issue_type: str) -> Optional[str]:
+    """Department value for a dataset issue_type, or None if it is unknown"""
+    if issue_type in FALLBACK_ISSUE_TYPES:
+        return settings.IMPORT_FALLBACK_DEPARTMENT
+    mapped = ISSUE_TYPE_DEPARTMENTS.get(issue_type)
+    return mapped.value if mapped else None
+
+def normalize_import_record(record: dict) -> dict:
+    """Map an NDJSON/CSV record onto ReportCreate fields plus optional history"""
+    issue_type = str(_first(record, "issue_type") or "").strip().lower()
+    location = str(_first(record, "location") or "").strip()
+
+    department = _first(record, "department")
+    if department is None and issue_type:
+        department = department_for_issue_type(issue_type)
+        if department is None:
+            raise ValueError(f"Unknown issue_type '{issue_type}', provide a department")
+
+    title = _first(record, "title")
+    if title is None and issue_type:
+        title = f"{issue_type.capitalize()} issue in {location or 'Odisha'}"
+
+    coordinates = _first(record, "coordinates")
+    if coordinates is None:
+        latitude = _first(record, "latitude", "lat")
+        longitude = _first(record, "longitude", "lng", "lon")
+        if latitude is not None and longitude is not None:
+            coordinates = [float(latitude), float(longitude)]
+
+    fields = {
+        "title": title,
+        "description": _first(record, "description"),
+        "department": department,
+        "location": location,
+        "coordinates": coordinates
+    }
+    priority = _first(record, "priority", "urgency")
+    if priority is not None:
+        fields["priority"] = str(priority).strip().lower()
+    return fields
+
+class ReportImporter:
+    """
+    Validate streamed records and insert them in unordered batches
+
+    Points for submitted reports are aggregated per user and handed to the
+    user_stats write-behind buffer once the stream is exhausted.
+    """
+
+    def __init__(self, db, current_user: UserInDB, batch_size: int, max_errors: int):
+        self.db = db
+        self.current_user = current_user
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.total_rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[ImportRowError] = []
+        self.submitted_by_user: Dict[str, dict] = {}
+        self.departments: Set[str] = set()
+        self._batch: List[dict] = []
+        self._batch_rows: List[int] = []
+
+    def _record_error(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(ImportRowError(row=row, error=error))
+
+    def _build_document(self, record: dict) -> dict:
+        fields = normalize_import_record(record)
+        has_priority = "priority" in fields
+        report_data = ReportCreate(**fields)
+
+        if report_data.coordinates and not validate_coordinates(report_data.coordinates):
+            raise ValueError("Invalid coordinates provided")
+        if not has_priority:
+            report_data.priority = calculate_priority_from_keywords(report_data.description)
+
+        # Historical rows may carry their own status and timestamps
+        report_status = ReportStatus(_first(record, "status") or ReportStatus.pending.value)
+        created_at = _first(record, "created_at")
+        created_at = datetime.fromisoformat(str(created_at)) if created_at else datetime.utcnow()
+        updated_at = _first(record, "updated_at")
+        updated_at = datetime.fromisoformat(str(updated_at)) if updated_at else created_at
+
+        user_id = str(_first(record, "user_id") or self.current_user.employee_id)
+        user_name = str(_first(record, "user") or (self.current_user.name if user_id == self.current_user.employee_id else user_id))
+
+        return {
+            "id": generate_report_id(),
+            "user": user_name,
+            "user_id": user_id,
+            "title": report_data.title,
+            "description": report_data.description,
+            "department": report_data.department.value,
+            "location": report_data.location,
+            "coordinates": report_data.coordinates,
+            "geo": to_geo_point(report_data.coordinates),
+            "priority": report_data.priority.value,
+            "status": report_status.value,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+    async def add(self, row: int, record: Optional[dict], error: Optional[str]) -> None:
+        """Validate one record and queue it for the next batch insert"""
+        self.total_rows += 1
+        if error:
+            self._record_error(row, error)
+            return
+        try:
+            document = self._build_document(record)
+        except ValidationError as e:
+            first_error = e.errors()[0]
+            field = ".".join(str(part) for part in first_error["loc"])
+            self._record_error(row, f"{field}: {first_error['msg']}")
+            return
+        except (ValueError, TypeError) as e:
+            self._record_error(row, str(e))
+            return
+
+        self._batch.append(document)
+        self._batch_rows.append(row)
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Insert the queued batch with an unordered insert_many"""
+        if not self._batch:
+            return
+        documents, rows = self._batch, self._batch_rows
+        self._batch, self._batch_rows = [], []
+
+        # Same location enrichment as create_report, geocoded per batch
+        places = get_geocoder().reverse_many(document["coordinates"] for document in documents)
+        for document, place in zip(documents, places):
+            if place:
+                document["location"] = append_detected_city(document["location"], place.place.name)
+
+        failed_indexes = set()
+        try:
+            await self.db.reports.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed_indexes.add(write_error["index"])
+                self._record_error(rows[write_error["index"]], write_error.get("errmsg", "Insert failed"))
+
+        for index, document in enumerate(documents):
+            if index in failed_indexes:
+                continue
+            self.inserted += 1
+            self.departments.add(document["department"])
+            user_totals = self.submitted_by_user.setdefault(
+                document["user_id"], {"user_name": document["user"], "count": 0}
+            )
+            user_totals["count"] += 1
+
+    async def finish(self, started_at: float) -> ImportSummary:
+        """Flush the last batch, award aggregated points and summarize"""
+        await self.flush()
+
+        # One coalesced increment per user, written by the user_stats write-behind buffer
+        points_per_report = calculate_user_points("submit_report")
+        for user_id, totals in self.submitted_by_user.items():
+            await award_points(
+                user_id,
+                user_name=totals["user_name"],
+                points=points_per_report * totals["count"],
+                reports_submitted=totals["count"]
+            )
+
+        duration = time.perf_counter() - started_at
+        return ImportSummary(
+            total_rows=self.total_rows,
+            inserted=self.inserted,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+            duration_seconds=round(duration, 3),
+            rows_per_second=round(self.total_rows / duration, 1) if duration > 0 else 0.0
+        )
+
+def detect_import_format(content_type: str, requested: Optional[str]) -> Optional[str]:
+    """Resolve the import format from the query parameter or Content-Type"""
+    if requested:
+        return requested
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"):
+        return "ndjson"
+    return None
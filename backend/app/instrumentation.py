@@ -0,0 +1,189 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Tuple, Union
+from pymongo import monitoring
+from app.metrics import LatencyStats, LatencyFamily, CounterFamily, FAST_BUCKETS, gauge_lines
+
+# HTTP requests, labelled by route template so path parameters do not create series
+http_latency = LatencyFamily(("method", "route"))
+http_requests = CounterFamily(("method", "route", "status"))
+http_in_flight = 0
+
+# MongoDB commands, labelled by collection and command name
+mongo_latency = LatencyFamily(("collection", "command"), FAST_BUCKETS)
+mongo_failures = CounterFamily(("collection", "command"))
+
+UNMATCHED_ROUTE = "unmatched"
+
+# What issued the current database work: an HTTP scope, or a label such as "job:media.variants".
+# Motor copies the context into its executor threads, so command listeners can read it.
+current_source: ContextVar[Union[dict, str, None]] = ContextVar("current_source", default=None)
+
+def current_route_label() -> str:
+    """Describe the current source, e.g. GET /api/v1/reports/{report_id}, job:media.variants or background"""
+    source = current_source.get()
+    if source is None:
+        return "background"
+    if isinstance(source, str):
+        return source
+    route = source.get("route")
+    return f"{source['method']} {getattr(route, 'path_format', None) or UNMATCHED_ROUTE}"
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request
+
+    The route label is the matched route's path template (read from the
+    scope after routing), so /reports/{report_id} is one series. Requests
+    that match no route share the "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global http_in_flight
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight += 1
+        source_token = current_source.set(scope)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight -= 1
+            current_source.reset(source_token)
+            route = scope.get("route")
+            route_label = getattr(route, "path_format", None) or UNMATCHED_ROUTE
+            http_latency.labels(scope["method"], route_label).observe(time.perf_counter() - started_at)
+            http_requests.inc(scope["method"], route_label, str(status_code))
+
+def _command_collection(event: monitoring.CommandStartedEvent) -> str:
+    if event.command_name == "getMore":
+        return event.command.get("collection", "")
+    target = event.command.get(event.command_name)
+    return target if isinstance(target, str) else ""
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Record the latency of every MongoDB command
+
+    Listeners run synchronously on the driver's I/O threads, so this only
+    stashes the collection name at start and files the driver-measured
+    duration on completion.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple[object, int], str] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = _command_collection(event)
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            return self._collections.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection = self._finish(event)
+        mongo_latency.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection = self._finish(event)
+        mongo_latency.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        mongo_failures.inc(collection, event.command_name)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Track connection pool size, checkouts in use and checkout wait time"""
+
+    def __init__(self):
+        self.open_connections = 0
+        self.checked_out = 0
+        self.pool_clears = 0
+        self.checkout_wait = LatencyStats(FAST_BUCKETS)
+        self.checkout_failures = CounterFamily(("reason",))
+        self._checkout_started = threading.local()  # Checkouts block the thread that asked
+        self._lock = threading.Lock()
+
+    def _add(self, field: str, amount: int) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        self._add("pool_clears", 1)
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        self._add("open_connections", 1)
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        self._add("open_connections", -1)
+
+    def connection_check_out_started(self, event) -> None:
+        self._checkout_started.at = time.perf_counter()
+
+    def _observe_wait(self) -> None:
+        started_at = getattr(self._checkout_started, "at", None)
+        if started_at is not None:
+            self.checkout_wait.observe(time.perf_counter() - started_at)
+            self._checkout_started.at = None
+
+    def connection_check_out_failed(self, event) -> None:
+        self._observe_wait()
+        self.checkout_failures.inc(str(event.reason))
+
+    def connection_checked_out(self, event) -> None:
+        self._observe_wait()
+        self._add("checked_out", 1)
+
+    def connection_checked_in(self, event) -> None:
+        self._add("checked_out", -1)
+
+command_metrics = MongoCommandMetrics()
+pool_metrics = MongoPoolMetrics()
+
+def mongo_event_listeners() -> list:
+    """Listeners to pass to the MongoDB client"""
+    return [command_metrics, pool_metrics]
+
+def request_metric_lines() -> List[str]:
+    """Prometheus lines for HTTP and MongoDB metrics"""
+    return [
+        *http_latency.prometheus_lines("saarthi_http_request_duration_seconds", "HTTP request latency by route template"),
+        *http_requests.prometheus_lines("saarthi_http_requests_total", "HTTP requests by route template and status"),
+        *gauge_lines("saarthi_http_requests_in_flight", "HTTP requests being handled", {(): http_in_flight}),
+        *mongo_latency.prometheus_lines("saarthi_mongo_command_duration_seconds", "MongoDB command latency"),
+        *mongo_failures.prometheus_lines("saarthi_mongo_command_failures_total", "Failed MongoDB commands"),
+        *gauge_lines("saarthi_mongo_pool_connections", "Open MongoDB connections", {(): pool_metrics.open_connections}),
+        *gauge_lines("saarthi_mongo_pool_checked_out", "MongoDB connections in use", {(): pool_metrics.checked_out}),
+        *gauge_lines("saarthi_mongo_pool_clears_total", "MongoDB pool clears", {(): pool_metrics.pool_clears}, metric_type="counter"),
+        "# HELP saarthi_mongo_pool_checkout_wait_seconds Time waiting for a MongoDB connection",
+        "# TYPE saarthi_mongo_pool_checkout_wait_seconds histogram",
+        *pool_metrics.checkout_wait.prometheus_lines("saarthi_mongo_pool_checkout_wait_seconds"),
+        *pool_metrics.checkout_failures.prometheus_lines(
+            "saarthi_mongo_pool_checkout_failures_total", "Failed MongoDB connection checkouts"
+        )
+    ]
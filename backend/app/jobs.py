@@ -0,0 +1,236 @@
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.config import settings
+from app.database import get_database
+from app.instrumentation import current_source
+
+# Job lifecycle: queued -> running -> done, or back to queued with backoff, or dead
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+class JobHandler(NamedTuple):
+    func: Callable[[dict], Awaitable[None]]
+    timeout_seconds: int  # The handler is cancelled after this; the lease adds JOBS_LEASE_SLACK_SECONDS
+    max_attempts: int
+
+_handlers: Dict[str, JobHandler] = {}
+
+def job_handler(name: str, timeout_seconds: Optional[int] = None, max_attempts: Optional[int] = None):
+    """Register an async function(payload) as the handler for a job name"""
+    def register(func: Callable[[dict], Awaitable[None]]):
+        _handlers[name] = JobHandler(
+            func,
+            timeout_seconds or settings.JOBS_VISIBILITY_TIMEOUT_SECONDS,
+            max_attempts or settings.JOBS_MAX_ATTEMPTS
+        )
+        return func
+    return register
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with full jitter for the given number of failed attempts"""
+    ceiling = min(settings.JOBS_BACKOFF_MAX_SECONDS, settings.JOBS_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+async def enqueue(name: str, payload: dict, delay_seconds: float = 0) -> ObjectId:
+    """Persist a job; it survives restarts and runs in whichever worker claims it first"""
+    if name not in _handlers:
+        raise ValueError(f"No handler registered for job {name}")
+    db = await get_database()
+    now = datetime.utcnow()
+    result = await db.jobs.insert_one({
+        "name": name,
+        "payload": payload,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": _handlers[name].max_attempts,
+        "timeout_seconds": _handlers[name].timeout_seconds,
+        "run_at": now + timedelta(seconds=delay_seconds),
+        "created_at": now
+    })
+    job_queue.notify()
+    return result.inserted_id
+
+class JobQueue:
+    """
+    Worker pool for jobs persisted in the jobs collection
+
+    A worker claims the oldest due job with one find_one_and_update that
+    marks it running and leases it by pushing run_at out by the handler's
+    timeout plus JOBS_LEASE_SLACK_SECONDS. The handler is cancelled at its
+    timeout, so the worker settles the job before the lease runs out and
+    nobody else runs it meanwhile. A job whose worker died is claimed again
+    once the lease passes, so handlers must be idempotent. Failed jobs are
+    retried with exponential backoff and parked as dead after max_attempts;
+    finished jobs expire after JOBS_RETENTION_SECONDS.
+    """
+
+    def __init__(self, concurrency: int, poll_interval_seconds: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval_seconds
+        self.worker_id = uuid.uuid4().hex
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self.active = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.dead = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def notify(self) -> None:
+        """Wake an idle worker after a local enqueue instead of waiting for the next poll"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def start(self) -> None:
+        """Start the worker tasks"""
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Stop the workers; a job cut off mid-run is retried once its lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self) -> None:
+        current_source.set("jobs")
+        while True:
+            try:
+                if await self.run_next():
+                    continue
+            except Exception as e:
+                print(f"Job worker failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def claim(self, db) -> Optional[dict]:
+        """Atomically take the oldest due job (queued, or running past its lease)"""
+        now = datetime.utcnow()
+        # One pipeline update both claims the job and leases it for its timeout plus slack to record the result
+        return await db.jobs.find_one_and_update(
+            {"status": {"$in": [QUEUED, RUNNING]}, "run_at": {"$lte": now}, "name": {"$in": list(_handlers)}},
+            [{"$set": {
+                "status": RUNNING,
+                "claimed_by": self.worker_id,
+                "claimed_at": now,
+                "attempts": {"$add": ["$attempts", 1]},
+                "run_at": {"$add": [now, {"$multiply": [
+                    {"$add": ["$timeout_seconds", settings.JOBS_LEASE_SLACK_SECONDS]}, 1000
+                ]}]}
+            }}],
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def run_next(self) -> bool:
+        """Claim and run one job; returns False when nothing is due"""
+        db = await get_database()
+        job = await self.claim(db)
+        if job is None:
+            return False
+
+        handler = _handlers[job["name"]]
+        # Only the current claim may settle the job, not a worker whose lease expired
+        owned = {"_id": job["_id"], "claimed_by": self.worker_id, "attempts": job["attempts"]}
+        started_at = time.perf_counter()
+        self.active += 1
+        self.wait_seconds_total += (job["claimed_at"] - job["created_at"]).total_seconds()
+        source_token = current_source.set(f"job:{job['name']}")
+        try:
+            await asyncio.wait_for(handler.func(job["payload"]), timeout=handler.timeout_seconds)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job["attempts"] >= job["max_attempts"]:
+                self.dead += 1
+                await db.jobs.update_one(owned, {"$set": {
+                    "status": DEAD, "error": error, "finished_at": datetime.utcnow()
+                }})
+            else:
+                self.retried += 1
+                await db.jobs.update_one(owned, {"$set": {
+                    "status": QUEUED,
+                    "error": error,
+                    "run_at": datetime.utcnow() + timedelta(seconds=backoff_seconds(job["attempts"]))
+                }})
+        else:
+            self.succeeded += 1
+            await db.jobs.update_one(owned, {"$set": {"status": DONE, "finished_at": datetime.utcnow()}})
+        finally:
+            current_source.reset(source_token)
+            self.active -= 1
+            self.run_seconds_total += time.perf_counter() - started_at
+        return True
+
+    async def queue_stats(self) -> dict:
+        """Count jobs per name and status across all workers, and the age of the oldest due job"""
+        db = await get_database()
+        counts: Dict[str, Dict[str, int]] = {}
+        async for group in db.jobs.aggregate([
+            {"$group": {"_id": {"name": "$name", "status": "$status"}, "count": {"$sum": 1}}}
+        ]):
+            counts.setdefault(group["_id"]["name"], {})[group["_id"]["status"]] = group["count"]
+        now = datetime.utcnow()
+        oldest = await db.jobs.find_one(
+            {"status": QUEUED, "run_at": {"$lte": now}},
+            {"run_at": 1},
+            sort=[("status", 1), ("run_at", 1)]
+        )
+        return {
+            "counts": counts,
+            "oldest_due_seconds": round((now - oldest["run_at"]).total_seconds(), 3) if oldest else 0.0
+        }
+
+    async def list_dead(self, limit: int) -> List[dict]:
+        """Return the most recently dead-lettered jobs"""
+        db = await get_database()
+        jobs = await db.jobs.find({"status": DEAD}).sort("finished_at", -1).limit(limit).to_list(length=limit)
+        for job in jobs:
+            job["_id"] = str(job["_id"])
+        return jobs
+
+    async def retry(self, job_id: ObjectId) -> bool:
+        """Queue a dead job again with a fresh attempt budget"""
+        db = await get_database()
+        result = await db.jobs.update_one(
+            {"_id": job_id, "status": DEAD},
+            {"$set": {"status": QUEUED, "attempts": 0, "run_at": datetime.utcnow()}, "$unset": {"finished_at": ""}}
+        )
+        if result.modified_count:
+            self.notify()
+        return bool(result.modified_count)
+
+    def stats(self) -> dict:
+        """Return this worker's counters and mean queue wait / run time"""
+        finished = self.succeeded + self.retried + self.dead
+        return {
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "dead": self.dead,
+            "mean_wait_seconds": round(self.wait_seconds_total / finished, 6) if finished else 0.0,
+            "mean_run_seconds": round(self.run_seconds_total / finished, 6) if finished else 0.0
+        }
+
+job_queue = JobQueue(
+    concurrency=settings.JOBS_CONCURRENCY,
+    poll_interval_seconds=settings.JOBS_POLL_INTERVAL_SECONDS
+)
@@ -5,26 +5,58 @@ from fastapi.responses import JSONResponse
 import uvicorn
 import asyncio
 from contextlib import asynccontextmanager
+from datetime import datetime
 
 # Import configurations and database
 from app.config import settings
-from app.database import connect_to_mongo, close_mongo_connection, init_sample_data
+from app.database import Database, connect_to_mongo, close_mongo_connection, init_sample_data, get_database
+from app.auth import password_hasher
+from app.stats_buffer import points_buffer
+from app.media import shutdown_process_pool
+from app.phash import photo_index
+from app.hotspots import hotspot_engine
+from app.events import change_stream_source
+from app.jobs import job_queue
+from app.instrumentation import RequestMetricsMiddleware
+from app.slow_queries import slow_query_log
+from app.profiling import ProfilingMiddleware
 
 # Import route modules
 from app.routes.auth import router as auth_router
 from app.routes.reports import router as reports_router
 from app.routes.stats import router as stats_router
 from app.routes.users import router as users_router
+from app.routes.admin import router as admin_router
+from app.routes.media import router as media_router, open_files
+from app.routes.events import router as events_router
+from app.routes.metrics import router as metrics_router
 
 # Application lifespan management
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    if settings.SLOW_QUERY_ENABLED:
+        await slow_query_log.start(Database.client)
     await init_sample_data()  # Initialize sample data for development
+    await points_buffer.start()
+    await job_queue.start()
+    await photo_index.sync(await get_database(), force=True)  # Load photo hashes for duplicate checks
+    if settings.HOTSPOT_ENABLED:
+        await hotspot_engine.start()
+    if settings.EVENTS_SOURCE == "change_stream":
+        await change_stream_source.start(await get_database())
     yield
     # Shutdown
+    await change_stream_source.stop()
+    await job_queue.stop()
+    await hotspot_engine.stop()
+    await points_buffer.stop()
+    await slow_query_log.stop(Database.client)
     await close_mongo_connection()
+    password_hasher.shutdown()
+    shutdown_process_pool()
+    open_files.close()
 
 # Create FastAPI application
 app = FastAPI(
@@ -59,11 +91,22 @@ app.add_middleware(
     allowed_hosts=["localhost", "127.0.0.1", "*.saarthi.gov.in"]
 )
 
+# On-demand request profiling
+app.add_middleware(ProfilingMiddleware)
+
+# Request latency metrics and query attribution (outermost, so it times the other middleware too)
+if settings.METRICS_ENABLED or settings.SLOW_QUERY_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(reports_router, prefix="/api/v1")
 app.include_router(stats_router, prefix="/api/v1") 
 app.include_router(users_router, prefix="/api/v1")
+app.include_router(admin_router, prefix="/api/v1")
+app.include_router(media_router, prefix="/api/v1")
+app.include_router(events_router, prefix="/api/v1")
+app.include_router(metrics_router)
 
 # Root endpoint
 @app.get("/")
@@ -93,7 +136,7 @@ async def health_check():
         return {
             "status": "healthy",
             "database": "connected",
-            "timestamp": "2025-09-12T14:33:00Z"
+            "timestamp": datetime.utcnow().isoformat() + "Z"
         }
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Database connection failed: {str(e)}")
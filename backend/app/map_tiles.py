@@ -0,0 +1,147 @@
+import math
+from typing import List, NamedTuple, Tuple
+import orjson
+from app.cache import TTLCache
+from app.config import settings
+from app.models import ReportStatus, ReportPriority
+
+# Web Mercator stops at this latitude; tiles never extend past it
+MAX_MERCATOR_LAT = 85.0511287798
+MIN_TILE_ZOOM = 2  # Tiles wider than 90 degrees cannot be queried as GeoJSON polygons
+MAX_TILE_ZOOM = 22
+
+tile_cache = TTLCache(maxsize=settings.MAP_TILE_CACHE_SIZE, ttl=settings.MAP_TILE_CACHE_TTL_SECONDS)
+
+class Tile(NamedTuple):
+    z: int
+    x: int
+    y: int
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """Return (west, south, east, north) in degrees"""
+        n = 2 ** self.z
+        west = self.x / n * 360 - 180
+        east = (self.x + 1) / n * 360 - 180
+        north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * self.y / n))))
+        south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (self.y + 1) / n))))
+        return west, south, east, north
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """Parse "west,south,east,north" (raises ValueError)"""
+    parts = [float(part) for part in bbox.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be west,south,east,north")
+    west, south, east, north = parts
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        raise ValueError("bbox must be west,south,east,north with west < east and south < north")
+    return west, south, east, north
+
+def _tile_x(lng: float, z: int) -> int:
+    return min(int((lng + 180) / 360 * 2 ** z), 2 ** z - 1)
+
+def _tile_y(lat: float, z: int) -> int:
+    lat = max(min(lat, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT)
+    lat_rad = math.radians(lat)
+    y = (1 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2 * 2 ** z
+    return min(max(int(y), 0), 2 ** z - 1)
+
+def tiles_for_bbox(bbox: Tuple[float, float, float, float], zoom: int, max_tiles: int) -> Tuple[int, List[Tile]]:
+    """
+    Cover a bbox with XYZ tiles, zooming out until at most max_tiles are needed
+
+    Returns the zoom actually used and its tiles.
+    """
+    west, south, east, north = bbox
+    zoom = max(min(zoom, MAX_TILE_ZOOM), MIN_TILE_ZOOM)
+    while True:
+        x_range = range(_tile_x(west, zoom), _tile_x(east, zoom) + 1)
+        y_range = range(_tile_y(north, zoom), _tile_y(south, zoom) + 1)
+        if len(x_range) * len(y_range) <= max_tiles or zoom == MIN_TILE_ZOOM:
+            return zoom, [Tile(zoom, x, y) for y in y_range for x in x_range]
+        zoom -= 1
+
+def _query_polygon(west: float, south: float, east: float, north: float) -> dict:
+    """
+    GeoJSON polygon that contains the whole lat/lng tile
+
+    Polygon edges are great circles, which bow towards the pole between two
+    points on the same latitude. The equator-side edge is moved out so the
+    bowed edge still clears the tile; the exact bounds are applied afterwards.
+    """
+    half_width = math.radians(east - west) / 2
+    if south >= 0:
+        south = math.degrees(math.atan(math.tan(math.radians(south)) * math.cos(half_width))) - 1e-9
+    elif north <= 0:
+        north = math.degrees(math.atan(math.tan(math.radians(north)) * math.cos(half_width))) + 1e-9
+    return {
+        "type": "Polygon",
+        "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]]
+    }
+
+def _count_by(field: str, values: List[str]) -> dict:
+    return {
+        f"{field}_{value}": {"$sum": {"$cond": [{"$eq": [f"${field}", value]}, 1, 0]}}
+        for value in values
+    }
+
+STATUS_VALUES = [report_status.value for report_status in ReportStatus]
+PRIORITY_VALUES = [report_priority.value for report_priority in ReportPriority]
+
+def tile_pipeline(tile: Tile, filter_query: dict, grid: int) -> list:
+    """Aggregation bucketing a tile's reports into a grid x grid lattice of cells"""
+    west, south, east, north = tile.bounds()
+    return [
+        {"$match": {**filter_query, "geo": {"$geoWithin": {"$geometry": _query_polygon(west, south, east, north)}}}},
+        {"$project": {
+            "_id": 0, "id": 1, "status": 1, "priority": 1,
+            "lng": {"$arrayElemAt": ["$geo.coordinates", 0]},
+            "lat": {"$arrayElemAt": ["$geo.coordinates", 1]}
+        }},
+        {"$match": {"lng": {"$gte": west, "$lt": east}, "lat": {"$gte": south, "$lt": north}}},
+        {"$group": {
+            "_id": {
+                "col": {"$floor": {"$multiply": [{"$subtract": ["$lng", west]}, grid / (east - west)]}},
+                "row": {"$floor": {"$multiply": [{"$subtract": ["$lat", south]}, grid / (north - south)]}}
+            },
+            "count": {"$sum": 1},
+            "lat": {"$avg": "$lat"},
+            "lng": {"$avg": "$lng"},
+            "report_id": {"$first": "$id"},
+            **_count_by("status", STATUS_VALUES),
+            **_count_by("priority", PRIORITY_VALUES)
+        }}
+    ]
+
+def shape_bucket(group: dict) -> dict:
+    """Turn a $group result into a map bucket (report_id only for single reports)"""
+    return {
+        "lat": round(group["lat"], 6),
+        "lng": round(group["lng"], 6),
+        "count": group["count"],
+        "status": {value: group[f"status_{value}"] for value in STATUS_VALUES if group[f"status_{value}"]},
+        "priority": {value: group[f"priority_{value}"] for value in PRIORITY_VALUES if group[f"priority_{value}"]},
+        "report_id": group["report_id"] if group["count"] == 1 else None
+    }
+
+def tile_cache_key(tile: Tile, filter_query: dict) -> tuple:
+    """Cache key for a tile under a given report filter"""
+    return tile, orjson.dumps(filter_query, default=str, option=orjson.OPT_SORT_KEYS)
+
+async def aggregate_tile(db, tile: Tile, filter_query: dict) -> dict:
+    """Get a tile's buckets from the cache or compute them with one aggregation"""
+    key = tile_cache_key(tile, filter_query)
+    cached = tile_cache.get(key)
+    if cached is not None:
+        return cached
+
+    groups = await db.reports.aggregate(tile_pipeline(tile, filter_query, settings.MAP_TILE_GRID)).to_list(length=None)
+    buckets = sorted((shape_bucket(group) for group in groups), key=lambda bucket: -bucket["count"])
+    result = {
+        "z": tile.z,
+        "x": tile.x,
+        "y": tile.y,
+        "count": sum(bucket["count"] for bucket in buckets),
+        "buckets": buckets
+    }
+    tile_cache.set(key, result)
+    return result
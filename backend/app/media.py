@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, NamedTuple, Optional
+import aiofiles
+from app.config import settings
+from app.database import get_database
+from app.jobs import job_handler
+
+# Formats Pillow may detect in an upload -> content type and extension stored on disk
+IMAGE_FORMATS = {
+    "JPEG": ("image/jpeg", ".jpg"),
+    "PNG": ("image/png", ".png"),
+    "WEBP": ("image/webp", ".webp")
+}
+
+# Upload Content-Types accepted before the body is read (the stored type comes from IMAGE_FORMATS)
+ALLOWED_MEDIA_TYPES = {content_type: extension for content_type, extension in IMAGE_FORMATS.values()}
+
+# Resized variants generated for each original (longest side in pixels)
+VARIANT_SIZES = {
+    "thumb": 256,
+    "medium": 1024
+}
+
+class MediaTooLarge(Exception):
+    """Raised when an upload exceeds MAX_FILE_SIZE"""
+
+class InvalidImage(Exception):
+    """Raised when an upload is not a decodable image"""
+
+class StagedUpload(NamedTuple):
+    sha256: str
+    path: str  # Temporary file, relative to UPLOAD_DIRECTORY
+    size: int
+
+class StoredMedia(NamedTuple):
+    sha256: str
+    path: str  # Relative to UPLOAD_DIRECTORY
+    size: int
+    content_type: str  # From the detected image format, not the request header
+    created: bool  # False when identical content was already stored
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the process pool used for image work (created on first use)"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.MEDIA_WORKERS)
+    return _process_pool
+
+def shutdown_process_pool() -> None:
+    """Stop the image worker processes"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+def content_addressed_path(sha256: str, extension: str, prefix: str = "originals") -> str:
+    """Build the relative storage path for a content hash (fanned out to keep directories small)"""
+    return os.path.join(prefix, sha256[:2], sha256[2:4], sha256 + extension)
+
+def absolute_media_path(relative_path: str) -> str:
+    """Resolve a stored relative path under UPLOAD_DIRECTORY"""
+    return os.path.join(settings.UPLOAD_DIRECTORY, relative_path)
+
+async def stage_upload(stream: AsyncIterator[bytes], max_size: int) -> StagedUpload:
+    """Stream an upload to a temporary file, hashing as it is written"""
+    tmp_dir = os.path.join(settings.UPLOAD_DIRECTORY, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    relative_path = os.path.join("tmp", uuid.uuid4().hex)
+    tmp_path = absolute_media_path(relative_path)
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as tmp_file:
+            async for chunk in stream:
+                size += len(chunk)
+                if size > max_size:
+                    raise MediaTooLarge()
+                hasher.update(chunk)
+                await tmp_file.write(chunk)
+        return StagedUpload(hasher.hexdigest(), relative_path, size)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def store_upload(staged: StagedUpload, image_format: Optional[str]) -> StoredMedia:
+    """
+    Move a verified upload to its content-addressed path
+
+    The extension and content type follow the format Pillow detected, so a
+    PNG sent as image/jpeg is still stored and served as a PNG. The rename
+    is atomic, so identical photos are stored once and readers never see a
+    partial file.
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise InvalidImage(f"Unsupported image format {image_format}")
+    content_type, extension = IMAGE_FORMATS[image_format]
+    relative_path = content_addressed_path(staged.sha256, extension)
+    final_path = absolute_media_path(relative_path)
+    if os.path.exists(final_path):
+        discard_upload(staged)
+        return StoredMedia(staged.sha256, relative_path, staged.size, content_type, created=False)
+
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(absolute_media_path(staged.path), final_path)
+    return StoredMedia(staged.sha256, relative_path, staged.size, content_type, created=True)
+
+def discard_upload(staged: StagedUpload) -> None:
+    """Remove a staged upload that was rejected (no-op once it has been stored)"""
+    tmp_path = absolute_media_path(staged.path)
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+def write_variants(upload_directory: str, relative_path: str, sha256: str) -> Dict[str, str]:
+    """
+    Write the resized variants of a stored image (runs in a worker process)
+
+    Variants are content-addressed by the original's hash, so re-uploads and
+    retried jobs reuse them. Returns variant name -> relative path.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(os.path.join(upload_directory, relative_path)) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            variants = {}
+            for name, max_side in VARIANT_SIZES.items():
+                variant_path = content_addressed_path(sha256, ".jpg", prefix=os.path.join("variants", name))
+                absolute_path = os.path.join(upload_directory, variant_path)
+                if not os.path.exists(absolute_path):
+                    os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+                    resized = image.copy()
+                    resized.thumbnail((max_side, max_side))
+                    tmp_path = f"{absolute_path}.{uuid.uuid4().hex}.tmp"
+                    resized.save(tmp_path, format="JPEG", quality=82, optimize=True)
+                    os.replace(tmp_path, absolute_path)
+                variants[name] = variant_path
+            return variants
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise InvalidImage(str(e))
+
+def existing_variants(sha256: str) -> Optional[Dict[str, str]]:
+    """Return the variant paths of an original if all of them were already written"""
+    variants = {
+        name: content_addressed_path(sha256, ".jpg", prefix=os.path.join("variants", name))
+        for name in VARIANT_SIZES
+    }
+    if all(os.path.exists(absolute_media_path(path)) for path in variants.values()):
+        return variants
+    return None
+
+def hash_image(upload_directory: str, relative_path: str) -> Dict[str, str]:
+    """Verify an image and compute its perceptual hashes plus its detected format (runs in a worker process)"""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+    from app.phash import compute_image_hashes
+
+    source_path = os.path.join(upload_directory, relative_path)
+    try:
+        with Image.open(source_path) as image:
+            image_format = image.format
+            image.verify()
+        with Image.open(source_path) as image:
+            return {**compute_image_hashes(ImageOps.exif_transpose(image)), "format": image_format}
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise InvalidImage(str(e))
+
+async def hash_image_async(relative_path: str) -> Dict[str, str]:
+    """Verify and hash an upload in the media process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), hash_image, settings.UPLOAD_DIRECTORY, relative_path)
+
+@job_handler("media.variants", timeout_seconds=120)
+async def generate_variants_job(payload: dict) -> None:
+    """Write thumbnails for an uploaded photo and record them on its report"""
+    loop = asyncio.get_running_loop()
+    variants = await loop.run_in_executor(
+        get_process_pool(), write_variants,
+        settings.UPLOAD_DIRECTORY, payload["path"], payload["sha256"]
+    )
+    db = await get_database()
+    await db.reports.update_one(
+        {"id": payload["report_id"], "media.sha256": payload["sha256"]},
+        {"$set": {"media.$.variants": variants}}
+    )
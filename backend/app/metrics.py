@@ -0,0 +1,134 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Upper bounds (seconds) of latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Database commands are mostly sub-millisecond to tens of milliseconds
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render a Prometheus label set, e.g. {method="GET",route="/"}"""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in zip(names, values)) + "}"
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class LatencyStats:
+    """Thread-safe fixed-bucket latency histogram"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record one duration"""
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket holding it"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.bucket_counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+            return self.max
+
+    def snapshot(self) -> dict:
+        """Return summary statistics in seconds"""
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "mean_seconds": round(self.sum / self.count, 6) if self.count else 0.0,
+            "max_seconds": round(self.max, 6),
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99)
+        }
+
+    def prometheus_lines(self, name: str, label_names: Sequence[str] = (), label_values: Sequence[str] = ()) -> List[str]:
+        """Render as a Prometheus histogram (cumulative buckets, _sum and _count)"""
+        with self._lock:
+            bucket_counts, total, count = list(self.bucket_counts), self.sum, self.count
+        names = tuple(label_names) + ("le",)
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{format_labels(names, tuple(label_values) + (le,))} {cumulative}")
+        labels = format_labels(label_names, label_values)
+        lines.append(f"{name}_sum{labels} {total!r}")
+        lines.append(f"{name}_count{labels} {count}")
+        return lines
+
+class LatencyFamily:
+    """LatencyStats per label combination, e.g. per (method, route)"""
+
+    def __init__(self, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple[str, ...], LatencyStats] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> LatencyStats:
+        """Get the histogram for a label combination (created on first use)"""
+        stats = self.series.get(values)
+        if stats is None:
+            with self._lock:
+                stats = self.series.setdefault(values, LatencyStats(self.buckets))
+        return stats
+
+    def prometheus_lines(self, name: str, help_text: str) -> List[str]:
+        """Render every series as one histogram family"""
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for values, stats in sorted(self.series.items()):
+            lines.extend(stats.prometheus_lines(name, self.label_names, values))
+        return lines
+
+class CounterFamily:
+    """Monotonic counters per label combination"""
+
+    def __init__(self, label_names: Sequence[str]):
+        self.label_names = tuple(label_names)
+        self.values: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values: str, amount: int = 1) -> None:
+        """Add to the counter for a label combination"""
+        with self._lock:
+            self.values[values] = self.values.get(values, 0) + amount
+
+    def prometheus_lines(self, name: str, help_text: str) -> List[str]:
+        """Render every series as one counter family"""
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for values, value in sorted(self.values.items()):
+            lines.append(f"{name}{format_labels(self.label_names, values)} {value}")
+        return lines
+
+def gauge_lines(name: str, help_text: str, samples: Dict[Tuple[str, ...], float],
+                label_names: Sequence[str] = (), metric_type: str = "gauge") -> List[str]:
+    """Render point-in-time values (or counters kept elsewhere) as one metric family"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for values, value in samples.items():
+        lines.append(f"{name}{format_labels(label_names, values)} {_format_number(value)}")
+    return lines
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -55,6 +55,11 @@ class UserOut(UserBase):
 class UserInDB(UserOut):
     password: str
 
+class UserPage(BaseModel):
+    items: List[UserOut]
+    next_cursor: Optional[str] = None  # Pass as `after` to fetch the next page
+    has_more: bool
+
 # Authentication Models
 class LoginRequest(BaseModel):
     employee_id: str
@@ -107,6 +112,48 @@ class ReportOut(ReportBase):
 class ReportInDB(ReportOut):
     user_id: str  # Employee ID who created the report
 
+class NearbyReport(ReportOut):
+    distance_m: float  # Great-circle distance from the query point in meters
+
+# Map Models
+class MapBucket(BaseModel):
+    lat: float  # Centroid of the reports in the bucket
+    lng: float
+    count: int
+    status: Dict[str, int] = {}
+    priority: Dict[str, int] = {}
+    report_id: Optional[str] = None  # Set when the bucket holds a single report
+
+class MapTile(BaseModel):
+    z: int
+    x: int
+    y: int
+    count: int
+    buckets: List[MapBucket]
+
+class MapResponse(BaseModel):
+    zoom: int  # Zoom actually used (lowered when the bbox needs too many tiles)
+    total: int
+    tiles: List[MapTile]
+
+# Hotspot Models
+class Hotspot(BaseModel):
+    rank: int
+    department: Department
+    latitude: float  # Centroid of the member reports
+    longitude: float
+    report_count: int
+    cell_count: int
+    bounds: List[float]  # [south, west, north, east]
+    first_day: str
+    last_day: str
+    reports_per_day: float
+
+class HotspotResponse(BaseModel):
+    generated_at: Optional[datetime] = None
+    window_days: int
+    hotspots: List[Hotspot]
+
 # Statistics Models
 class DepartmentStats(BaseModel):
     department: Department
@@ -167,13 +214,57 @@ class PaginatedResponse(BaseModel):
     limit: int
     has_more: bool
 
-# File Upload Models (for future media upload feature)
+# Bulk Status Models
+class BulkStatusUpdate(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=1000)
+    status: ReportStatus
+
+class BulkStatusFailure(BaseModel):
+    id: str
+    reason: str
+
+class BulkStatusResult(BaseModel):
+    status: ReportStatus
+    updated: List[str]
+    failed: List[BulkStatusFailure]
+
+# Bulk Import Models
+class ImportRowError(BaseModel):
+    row: int  # Line number in the uploaded file
+    error: str
+
+class ImportSummary(BaseModel):
+    total_rows: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+    duration_seconds: float
+    rows_per_second: float
+
+# File Upload Models
+class MediaDuplicate(BaseModel):
+    report_id: str
+    sha256: str
+    phash_distance: int
+    dhash_distance: int
+    text_score: float = 0.0  # Word-count cosine similarity of title and description
+
 class FileUploadResponse(BaseModel):
     filename: str
-    file_path: str
+    file_path: str  # Content-addressed path relative to UPLOAD_DIRECTORY
     file_size: int
     content_type: str
     upload_timestamp: datetime
+    sha256: Optional[str] = None
+    variants: Dict[str, str] = {}  # Variant name -> relative path
+    variants_pending: bool = False  # True while a background job writes the variants
+    deduplicated: bool = False  # True when identical content was already stored
+    duplicates: List[MediaDuplicate] = []  # Similar photos on other nearby reports
+
+class DuplicateCheckResponse(BaseModel):
+    report_id: str
+    matches: List[MediaDuplicate]
 
 # City/Location Models
 class CityCoordinates(BaseModel):
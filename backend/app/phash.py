@@ -0,0 +1,194 @@
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+
+# DCT-II basis for the 32x32 pHash input, only the 8 lowest frequencies are needed
+_DCT_SIZE = 32
+_DCT_KEEP = 8
+_DCT_BASIS = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * _DCT_SIZE)) for x in range(_DCT_SIZE)]
+    for u in range(_DCT_KEEP)
+]
+
+def dhash(image, hash_size: int = 8) -> int:
+    """Difference hash: compare horizontally adjacent pixels of a tiny grayscale image"""
+    from PIL import Image
+
+    pixels = list(image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+def phash(image) -> int:
+    """Perceptual hash: sign of the low-frequency DCT coefficients against their median"""
+    from PIL import Image
+
+    pixels = list(image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS).getdata())
+    rows = [pixels[y * _DCT_SIZE:(y + 1) * _DCT_SIZE] for y in range(_DCT_SIZE)]
+
+    # Separable 2D DCT, keeping the top-left 8x8 block
+    row_dct = [[sum(b * p for b, p in zip(basis, row)) for basis in _DCT_BASIS] for row in rows]
+    coefficients = [
+        sum(_DCT_BASIS[v][y] * row_dct[y][u] for y in range(_DCT_SIZE))
+        for v in range(_DCT_KEEP) for u in range(_DCT_KEEP)
+    ]
+
+    # The DC term only encodes average brightness
+    median = sorted(coefficients[1:])[len(coefficients[1:]) // 2]
+    value = 0
+    for coefficient in coefficients:
+        value = (value << 1) | (coefficient > median)
+    return value
+
+def compute_image_hashes(image) -> Dict[str, str]:
+    """Compute pHash and dHash as 16-digit hex strings (64-bit values do not fit BSON int64)"""
+    return {
+        "phash": f"{phash(image):016x}",
+        "dhash": f"{dhash(image):016x}"
+    }
+
+def hamming_distance(a: int, b: int) -> int:
+    """Count differing bits between two hashes"""
+    return bin(a ^ b).count("1")
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes for sub-linear Hamming radius queries"""
+
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+        self.size = 0
+
+    def add(self, value: int, item) -> None:
+        """Insert an item under a hash (equal hashes share a node)"""
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """Return (distance, item) pairs within max_distance, nearest first"""
+        results = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, item) for item in node[1])
+            # Triangle inequality: only children in [d - r, d + r] can match
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        results.sort(key=lambda result: result[0])
+        return results
+
+def scope_keys(coordinates: Optional[List[float]], location: Optional[str], neighbors: bool = False) -> List[str]:
+    """Geo cell key(s) for coordinates, or a location key when there are none"""
+    if coordinates and len(coordinates) == 2:
+        cell = settings.PHASH_CELL_DEG
+        row, col = int(math.floor(coordinates[0] / cell)), int(math.floor(coordinates[1] / cell))
+        if not neighbors:
+            return [f"cell:{row}:{col}"]
+        return [f"cell:{row + dr}:{col + dc}" for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+    return [f"loc:{(location or '').strip().lower()}"]
+
+# hashed_at is stamped before the write commits (the backfill script uses one time per batch),
+# so each sync re-reads this much before its watermark; add() skips photos already indexed
+SYNC_OVERLAP = timedelta(minutes=5)
+
+class PhotoHashIndex:
+    """
+    Per-area BK-trees of report photo hashes
+
+    Photos are bucketed by geo cell (or by location name when a report has no
+    coordinates); lookups search the cell and its neighbours. The index lives
+    in each worker process and pulls photos uploaded by other workers from
+    MongoDB at most every PHASH_REFRESH_SECONDS.
+    """
+
+    def __init__(self):
+        self.trees: Dict[str, BKTree] = {}
+        self.watermark: Optional[datetime] = None
+        self.refreshed_at = 0.0
+        self._indexed = set()
+
+    def add(self, phash_hex: str, dhash_hex: str, report_id: str, sha256: str,
+            coordinates: Optional[List[float]], location: Optional[str]) -> None:
+        """Index one photo (once per report and content hash)"""
+        if (report_id, sha256) in self._indexed:
+            return
+        self._indexed.add((report_id, sha256))
+        key = scope_keys(coordinates, location)[0]
+        self.trees.setdefault(key, BKTree()).add(
+            int(phash_hex, 16), (report_id, sha256, int(dhash_hex, 16))
+        )
+
+    def search(self, phash_hex: str, dhash_hex: str, coordinates: Optional[List[float]],
+               location: Optional[str], max_distance: int) -> List[dict]:
+        """Find indexed photos near a hash in the same or neighbouring area"""
+        phash_value, dhash_value = int(phash_hex, 16), int(dhash_hex, 16)
+        matches = []
+        for key in scope_keys(coordinates, location, neighbors=True):
+            tree = self.trees.get(key)
+            if tree is None:
+                continue
+            for distance, (report_id, sha256, other_dhash) in tree.search(phash_value, max_distance):
+                matches.append({
+                    "report_id": report_id,
+                    "sha256": sha256,
+                    "phash_distance": distance,
+                    "dhash_distance": hamming_distance(dhash_value, other_dhash)
+                })
+        matches.sort(key=lambda match: (match["phash_distance"], match["dhash_distance"]))
+        return matches
+
+    async def sync(self, db, force: bool = False) -> None:
+        """Load photos hashed since the last sync"""
+        if not force and time.monotonic() - self.refreshed_at < settings.PHASH_REFRESH_SECONDS:
+            return
+        self.refreshed_at = time.monotonic()
+
+        media_filter = {"media.hashed_at": {"$exists": True}}
+        if self.watermark is not None:
+            media_filter["media.hashed_at"] = {"$gt": self.watermark - SYNC_OVERLAP}
+        cursor = db.reports.find(
+            media_filter,
+            {"_id": 0, "id": 1, "coordinates": 1, "location": 1, "media": 1}
+        ).batch_size(1000)
+
+        newest = self.watermark
+        async for report in cursor:
+            for media in report.get("media", []):
+                hashed_at = media.get("hashed_at")
+                if hashed_at is None or "phash" not in media:
+                    continue
+                self.add(media["phash"], media["dhash"], report["id"], media["sha256"],
+                         report.get("coordinates"), report.get("location"))
+                if newest is None or hashed_at > newest:
+                    newest = hashed_at
+        self.watermark = newest
+
+    def stats(self) -> dict:
+        """Return index size"""
+        return {
+            "areas": len(self.trees),
+            "photos": sum(tree.size for tree in self.trees.values()),
+            "watermark": self.watermark
+        }
+
+photo_index = PhotoHashIndex()
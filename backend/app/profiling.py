@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import hmac
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.config import settings
+from app.database import get_database
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_QUERY_PARAM = "__profile"
+PROFILE_TOKEN_PATTERN = re.compile(r"([0-9]{1,12})\.([0-9a-f]{64})", re.ASCII)
+
+def create_profile_token(expires_at: int) -> str:
+    """Sign a profiling token valid until the given unix time"""
+    signature = hmac.new(settings.SECRET_KEY.encode(), f"profile:{expires_at}".encode(), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{signature}"
+
+def verify_profile_token(token: str) -> bool:
+    """Check a profiling token's signature and expiry (False for anything malformed)"""
+    match = PROFILE_TOKEN_PATTERN.fullmatch(token)
+    if match is None or int(match.group(1)) < time.time():
+        return False
+    return hmac.compare_digest(create_profile_token(int(match.group(1))).encode(), token.encode())
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def _thread_stack(frame, root_frame) -> List[str]:
+    """Stack of the running thread from the task's own coroutine down (root first)"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        if frame is root_frame:
+            break
+        frame = frame.f_back
+    return [_frame_name(frame) for frame in reversed(frames)]
+
+def _await_stack(coro) -> List[str]:
+    """Where a suspended task is waiting, following the chain of awaited coroutines"""
+    names = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            names.append(f"[{type(coro).__name__}]")  # A future, e.g. a database call in an executor
+            break
+        names.append(_frame_name(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    names.append("[waiting]")
+    return names
+
+class RequestProfile:
+    """Folded-stack samples for one request"""
+
+    def __init__(self, task: asyncio.Task, trigger: str, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.task = task
+        self.root_frame = task.get_coro().cr_frame
+        self.trigger = trigger  # "token" or "sampled"
+        self.method = method
+        self.path = path
+        self.started_at = time.perf_counter()
+        self.created_at = datetime.utcnow()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.closed = False  # Set under the profiler lock; the sampler then leaves stacks alone
+
+    def to_document(self, route: Optional[str], status_code: int, max_stacks: int) -> dict:
+        """Render the profile in flamegraph.pl / speedscope folded format"""
+        top = self.stacks.most_common(max_stacks)
+        return {
+            "_id": self.id,
+            "created_at": self.created_at,
+            "trigger": self.trigger,
+            "method": self.method,
+            "path": self.path,
+            "route": route,
+            "status": status_code,
+            "duration_ms": round((time.perf_counter() - self.started_at) * 1000, 3),
+            "interval_ms": settings.PROFILE_INTERVAL_MS,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "truncated": len(self.stacks) > len(top),
+            "folded": "\n".join(f"{stack} {count}" for stack, count in top)
+        }
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for individual requests
+
+    A daemon thread wakes every PROFILE_INTERVAL_MS while a request is being
+    profiled. If the request's task is running on the event loop, the loop
+    thread's stack is sampled; if it is suspended, the chain of awaited
+    coroutines is recorded with a [waiting] leaf, so time spent on database
+    round trips shows up too. Only profiled requests pay for sampling.
+    """
+
+    def __init__(self, interval_ms: int, max_seconds: int):
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self._active: Dict[asyncio.Task, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self.profiled = 0
+
+    def begin(self, trigger: str, method: str, path: str) -> RequestProfile:
+        """Start sampling the current task"""
+        task = asyncio.current_task()
+        profile = RequestProfile(task, trigger, method, path)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread_id = threading.get_ident()
+            self._active[task] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return profile
+
+    def end(self, profile: RequestProfile) -> None:
+        """Stop sampling a request; its stacks are not touched after this returns"""
+        with self._lock:
+            self._active.pop(profile.task, None)
+            profile.closed = True
+        self.profiled += 1
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                profiles = list(self._active.values())
+                loop, loop_thread_id = self._loop, self._loop_thread_id
+
+            running_task = asyncio.current_task(loop)
+            loop_frame = sys._current_frames().get(loop_thread_id)
+            now = time.perf_counter()
+            samples = []
+            for profile in profiles:
+                if now - profile.started_at > self.max_seconds:
+                    continue  # Long-lived streams stop collecting after PROFILE_MAX_SECONDS
+                if profile.task is running_task and loop_frame is not None:
+                    stack = _thread_stack(loop_frame, profile.root_frame)
+                else:
+                    stack = _await_stack(profile.task.get_coro())
+                samples.append((profile, ";".join(stack)))
+
+            # end() may have run since the copy above; closed profiles are being saved
+            with self._lock:
+                for profile, stack in samples:
+                    if not profile.closed:
+                        profile.stacks[stack] += 1
+                        profile.samples += 1
+
+    def stats(self) -> dict:
+        """Return active and completed profile counts"""
+        return {
+            "active": len(self._active),
+            "profiled": self.profiled,
+            "interval_ms": self.interval * 1000,
+            "sample_rate": settings.PROFILE_SAMPLE_RATE
+        }
+
+profiler = SamplingProfiler(interval_ms=settings.PROFILE_INTERVAL_MS, max_seconds=settings.PROFILE_MAX_SECONDS)
+
+def _requested_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER.encode():
+            return value.decode("latin-1")
+    query = scope.get("query_string", b"").decode("latin-1")
+    for part in query.split("&"):
+        key, _, value = part.partition("=")
+        if key == PROFILE_QUERY_PARAM:
+            return value
+    return None
+
+class ProfilingMiddleware:
+    """
+    Profile requests that carry a signed token, plus a random PROFILE_SAMPLE_RATE share
+
+    Admins mint tokens at POST /admin/profiles/token and send them in the
+    X-Profile-Token header (or ?__profile=). Profiled responses carry an
+    X-Profile-Id header; profiles are listed at /admin/profiles.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _requested_token(scope)
+        if token is not None and verify_profile_token(token):
+            trigger = "token"
+        elif settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+            trigger = "sampled"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.begin(trigger, scope["method"], scope["path"])
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.end(profile)
+            route = getattr(scope.get("route"), "path_format", None)
+            try:
+                db = await get_database()
+                await db.profiles.insert_one(profile.to_document(route, status_code, settings.PROFILE_MAX_STACKS))
+            except Exception as e:
+                print(f"Saving request profile failed: {e}")
@@ -0,0 +1,146 @@
+import gzip
+from functools import lru_cache
+from typing import Any, Optional, Tuple, Type
+import orjson
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response
+from pydantic import BaseModel, create_model
+from app.config import settings
+from app.models import ReportOut, UserOut
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+# Fields returned for a report, used as the Mongo projection on trusted read paths
+REPORT_OUT_FIELDS = tuple(ReportOut.model_fields)
+REPORT_OUT_PROJECTION = {"_id": 0, **{field: 1 for field in REPORT_OUT_FIELDS}}
+
+# Defaults for optional ReportOut fields that may be missing from stored documents
+REPORT_OUT_DEFAULTS = {
+    name: field.get_default()
+    for name, field in ReportOut.model_fields.items()
+    if not field.is_required()
+}
+
+# Named sparse fieldsets; "summary" is answered from a covering index (see create_indexes)
+REPORT_FIELD_SETS = {
+    "summary": ("id", "title", "status", "priority"),
+    "map": ("id", "title", "status", "priority", "coordinates")
+}
+
+# Fields returned for a user; the inclusion projection never reads password hashes
+USER_OUT_FIELDS = tuple(UserOut.model_fields)
+USER_OUT_PROJECTION = {"_id": 0, **{field: 1 for field in USER_OUT_FIELDS}}
+
+USER_OUT_DEFAULTS = {
+    name: field.get_default()
+    for name, field in UserOut.model_fields.items()
+    if not field.is_required()
+}
+
+def parse_report_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse a `fields` query value into ReportOut field names (id is always kept)"""
+    if not fields:
+        return None
+    requested = set()
+    for name in fields.split(","):
+        name = name.strip()
+        if name:
+            requested.update(REPORT_FIELD_SETS.get(name, (name,)))
+
+    unknown = sorted(requested - set(REPORT_OUT_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown report fields: {', '.join(unknown)}"
+        )
+    requested.add("id")
+    return tuple(field for field in REPORT_OUT_FIELDS if field in requested)
+
+def report_projection(fields: Optional[Tuple[str, ...]]) -> dict:
+    """Build the Mongo projection for a sparse fieldset (all ReportOut fields by default)"""
+    if fields is None:
+        return REPORT_OUT_PROJECTION
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+@lru_cache(maxsize=64)
+def report_fields_model(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Build (once per fieldset) a response model with only the requested ReportOut fields"""
+    return create_model(
+        "ReportOut_" + "_".join(fields),
+        **{field: (ReportOut.model_fields[field].annotation, ReportOut.model_fields[field]) for field in fields}
+    )
+
+@lru_cache(maxsize=64)
+def _report_field_defaults(fields: Tuple[str, ...]) -> dict:
+    return {name: value for name, value in REPORT_OUT_DEFAULTS.items() if name in fields}
+
+def trusted_report_out(report: dict, fields: Optional[Tuple[str, ...]] = None) -> dict:
+    """Shape a projected report document like ReportOut without re-validating it"""
+    defaults = REPORT_OUT_DEFAULTS if fields is None else _report_field_defaults(fields)
+    return {**defaults, **report}
+
+def trusted_user_out(user: dict) -> dict:
+    """Shape a projected user document like UserOut without re-validating it"""
+    return {**USER_OUT_DEFAULTS, **user}
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the supported content encoding with the highest q-value from an Accept-Encoding header
+    
+    "*" only covers encodings not listed by name, so "br;q=0, *" never picks
+    br. Ties go to brotli, which compresses JSON smaller.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.lower().startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in supported:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress_body(body: bytes, encoding: Optional[str]) -> bytes:
+    """Compress a response body with the negotiated encoding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+    return body
+
+def negotiated_json_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """
+    Encode content with orjson and compress it when the client accepts it
+
+    Bodies smaller than COMPRESSION_MIN_SIZE are sent as-is, since compressing
+    them costs more CPU than the bytes it saves.
+    """
+    body = orjson.dumps(content)
+    headers = {"Vary": "Accept-Encoding"}
+
+    if len(body) >= settings.COMPRESSION_MIN_SIZE:
+        encoding = select_encoding(request.headers.get("accept-encoding", ""))
+        if encoding:
+            body = compress_body(body, encoding)
+            headers["Content-Encoding"] = encoding
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
@@ -0,0 +1,233 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import time
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime, timedelta
+from app.models import UserInDB, MessageResponse
+from app.config import settings
+from app.auth import require_admin_role, user_cache, token_cache, password_hasher
+from app.stats_buffer import points_buffer
+from app.phash import photo_index
+from app.routes.media import open_files
+from app.map_tiles import tile_cache
+from app.hotspots import hotspot_engine
+from app.events import event_bus
+from app.jobs import job_queue
+from app.slow_queries import slow_query_log, top_slow_queries
+from app.profiling import profiler, create_profile_token, PROFILE_HEADER, PROFILE_QUERY_PARAM
+from app.database import get_database
+from app.utils import handle_database_error
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+@router.get("/cache-stats")
+async def get_cache_stats(
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Get hit rates of the authentication, map tile and media file caches (admin only)
+    
+    Counters are per worker process and reset on restart.
+    """
+    return {
+        "users": user_cache.stats(),
+        "tokens": token_cache.stats(),
+        "map_tiles": tile_cache.stats(),
+        "media_files": open_files.stats()
+    }
+
+@router.get("/hashing-stats")
+async def get_hashing_stats(
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Get password hashing queue depth and latency (admin only)
+    """
+    return password_hasher.stats()
+
+@router.get("/stats-buffer")
+async def get_stats_buffer(
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Get the state of the user_stats write-behind buffer (admin only)
+    """
+    return points_buffer.stats()
+
+@router.get("/photo-index")
+async def get_photo_index_stats(
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Get the size of this worker's perceptual-hash photo index (admin only)
+    """
+    return photo_index.stats()
+
+@router.get("/hotspots")
+async def get_hotspot_job_stats(
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Get the state of the hotspot detection job in this worker (admin only)
+    """
+    return hotspot_engine.stats()
+
+@router.get("/events")
+async def get_event_bus_stats(
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Get change feed subscribers and delivery counters for this worker (admin only)
+    """
+    return event_bus.stats()
+
+@router.post("/hotspots/refresh")
+async def refresh_hotspots(
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Run hotspot detection now instead of waiting for the schedule (admin only)
+    
+    Returns 409 while another worker holds the job lease.
+    """
+    if not await hotspot_engine.run_once():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Hotspot detection is running in another worker"
+        )
+    return hotspot_engine.stats()
+
+@router.get("/jobs")
+async def get_job_stats(
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Get background job queue depth and this worker's job counters (admin only)
+    """
+    return {
+        "worker": job_queue.stats(),
+        "queue": await job_queue.queue_stats()
+    }
+
+@router.get("/jobs/dead")
+async def get_dead_jobs(
+    limit: int = Query(50, ge=1, le=500, description="Number of jobs to return"),
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    List jobs that failed on every attempt, newest first (admin only)
+    """
+    return await job_queue.list_dead(limit)
+
+@router.post("/jobs/{job_id}/retry", response_model=MessageResponse)
+async def retry_dead_job(
+    job_id: str,
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Queue a dead job again (admin only)
+    """
+    try:
+        object_id = ObjectId(job_id)
+    except InvalidId:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job ID"
+        )
+    if not await job_queue.retry(object_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dead job not found"
+        )
+    return MessageResponse(message=f"Job {job_id} queued again", success=True)
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    minutes: int = Query(60, ge=1, le=10080, description="Look back this many minutes"),
+    limit: int = Query(20, ge=1, le=100, description="Number of query shapes to return"),
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Top slow MongoDB query shapes by total time, across all workers (admin only)
+    
+    Commands slower than SLOW_QUERY_THRESHOLD_MS are grouped by collection,
+    command and normalized filter/pipeline shape, with the routes that issued
+    them and the latest sampled explain("executionStats") summary.
+    """
+    try:
+        db = await get_database()
+        since = datetime.utcnow() - timedelta(minutes=minutes)
+        return {
+            "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+            "since": since,
+            "worker": slow_query_log.stats(),
+            "queries": await top_slow_queries(db, since, limit)
+        }
+    except Exception as e:
+        raise handle_database_error(e)
+
+@router.post("/profiles/token")
+async def create_profiling_token(
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Mint a signed token that profiles any request carrying it (admin only)
+    
+    Send it as the X-Profile-Token header, or as ?__profile= from a browser.
+    The token expires after PROFILE_TOKEN_TTL_SECONDS.
+    """
+    expires_at = int(time.time()) + settings.PROFILE_TOKEN_TTL_SECONDS
+    return {
+        "token": create_profile_token(expires_at),
+        "header": PROFILE_HEADER,
+        "query_param": PROFILE_QUERY_PARAM,
+        "expires_at": datetime.utcfromtimestamp(expires_at)
+    }
+
+@router.get("/profiles")
+async def list_profiles(
+    route: Optional[str] = Query(None, description="Only profiles of this route template"),
+    limit: int = Query(50, ge=1, le=500, description="Number of profiles to return"),
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    List recorded request profiles, newest first (admin only)
+    """
+    try:
+        db = await get_database()
+        query = {"route": route} if route else {}
+        profiles = await db.profiles.find(query, {"folded": 0}).sort("created_at", -1).limit(limit).to_list(length=limit)
+        for profile in profiles:
+            profile["id"] = profile.pop("_id")
+        return {"profiler": profiler.stats(), "profiles": profiles}
+    except Exception as e:
+        raise handle_database_error(e)
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(
+    profile_id: str,
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Download a profile as folded stacks (admin only)
+    
+    One "frame;frame;frame count" line per stack, ready for flamegraph.pl or
+    speedscope. Stacks ending in [waiting] are time the request spent
+    suspended, e.g. on database round trips.
+    """
+    try:
+        db = await get_database()
+        profile = await db.profiles.find_one({"_id": profile_id}, {"folded": 1})
+    except Exception as e:
+        raise handle_database_error(e)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return PlainTextResponse(
+        profile["folded"] + "\n",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'}
+    )
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
+import orjson
+from app.config import settings
+from app.models import Department, UserInDB
+from app.auth import verify_token, get_cached_user
+from app.events import event_bus
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+async def authenticate_stream(authorization: Optional[str], token: Optional[str]) -> UserInDB:
+    """
+    Resolve the user for a streaming connection
+
+    Browsers cannot set headers on EventSource or WebSocket requests, so the
+    access token may also be passed as ?token=.
+    """
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    token_data = verify_token(token)
+    user = await get_cached_user(token_data.employee_id)
+    if user is None or not getattr(user, "is_active", True):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
+
+def format_sse(event: dict) -> bytes:
+    """Encode one event as a text/event-stream frame"""
+    frame = b"event: " + event["type"].encode() + b"\n"
+    if "seq" in event:
+        frame += b"id: " + str(event["seq"]).encode() + b"\n"
+    return frame + b"data: " + orjson.dumps(event) + b"\n\n"
+
+@router.get("/reports")
+async def stream_report_events(
+    request: Request,
+    department: Optional[List[Department]] = Query(None, description="Only events for these departments"),
+    location: Optional[str] = Query(None, description="Only events whose location contains this text"),
+    token: Optional[str] = Query(None, description="Access token, for clients that cannot send headers")
+):
+    """
+    Server-Sent Events feed of report changes
+
+    Emits report.created, report.updated, report.status, report.deleted and
+    reports.imported events. A consumer that falls EVENTS_QUEUE_SIZE events
+    behind loses the oldest ones and receives an events.dropped event with
+    the count, after which it should refetch. A comment line is sent every
+    EVENTS_HEARTBEAT_SECONDS to keep proxies from closing an idle stream.
+    """
+    await authenticate_stream(request.headers.get("authorization"), token)
+    subscription = event_bus.subscribe([value.value for value in department or []], location)
+
+    async def stream():
+        try:
+            yield b"retry: 5000\n\n"
+            while not await request.is_disconnected():
+                events = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                if not events:
+                    yield b": heartbeat\n\n"
+                    continue
+                yield b"".join(format_sse(event) for event in events)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/reports/ws")
+async def report_events_socket(
+    websocket: WebSocket,
+    department: Optional[List[Department]] = Query(None),
+    location: Optional[str] = Query(None),
+    token: Optional[str] = Query(None)
+):
+    """
+    WebSocket feed of report changes (same events and filters as the SSE feed)
+
+    Each message is a JSON array of the events queued since the last send.
+    """
+    try:
+        await authenticate_stream(websocket.headers.get("authorization"), token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    subscription = event_bus.subscribe([value.value for value in department or []], location)
+
+    async def watch_disconnect():
+        # Clients do not send anything; a receive only returns on close
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    disconnected = asyncio.create_task(watch_disconnect())
+    try:
+        while not disconnected.done():
+            events = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            if disconnected.done():
+                break
+            # An empty array doubles as the heartbeat
+            await websocket.send_text(orjson.dumps(events).decode())
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        disconnected.cancel()
+        event_bus.unsubscribe(subscription)
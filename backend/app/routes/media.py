@@ -0,0 +1,101 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response
+import re
+from app.config import settings
+from app.media import absolute_media_path
+from app.static_files import OpenFileCache, FileRangeResponse, RangeNotSatisfiable, parse_range
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+# Only content-addressed paths written by store_upload/write_variants are served
+MEDIA_PATH_PATTERN = re.compile(
+    r"^(?P<prefix>originals|variants/[a-z]+)/[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})\.(?P<ext>jpg|png|webp)$"
+)
+
+MEDIA_CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp"
+}
+
+open_files = OpenFileCache(maxsize=settings.MEDIA_OPEN_FILES)
+
+def media_etag(prefix: str, sha256: str) -> str:
+    """Strong ETag for a content-addressed file (variants differ from their original)"""
+    if prefix == "originals":
+        return f'"{sha256}"'
+    return f'"{prefix.split("/", 1)[1]}-{sha256}"'
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Check an If-None-Match / If-Range value against an ETag"""
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"])
+async def get_media(file_path: str, request: Request):
+    """
+    Serve an uploaded photo or one of its variants
+
+    Unlike the report endpoints this needs no bearer token, so the paths work
+    in `<img src>`. They are capability URLs: only the SHA-256 of a photo's
+    content leads to it, and the paths are handed out only to signed-in
+    users (the upload response, duplicate matches). Paths are the
+    content-addressed `file_path`/`variants` values returned by the upload
+    endpoint, so responses never change and are cached as immutable. Single byte ranges are supported (`Range: bytes=start-end`);
+    other range forms get the full file. Files are streamed from a small LRU
+    of open descriptors instead of being read into memory.
+    """
+    match = MEDIA_PATH_PATTERN.match(file_path)
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media not found"
+        )
+
+    etag = media_etag(match.group("prefix"), match.group("sha256"))
+    headers = {
+        "Cache-Control": f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable",
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        handle = await open_files.acquire(absolute_media_path(file_path))
+    except (FileNotFoundError, IsADirectoryError):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media not found"
+        )
+
+    try:
+        byte_range = None
+        if_range = request.headers.get("if-range")
+        if not if_range or etag_matches(if_range, etag):
+            byte_range = parse_range(request.headers.get("range"), handle.size)
+    except RangeNotSatisfiable:
+        open_files.release(handle)
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{handle.size}"}
+        )
+
+    if byte_range is None:
+        start, end, status_code = 0, handle.size - 1, status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{handle.size}"
+
+    return FileRangeResponse(
+        open_files, handle, start, end,
+        status_code=status_code,
+        headers=headers,
+        media_type=MEDIA_CONTENT_TYPES[match.group("ext")],
+        chunk_size=settings.MEDIA_READ_CHUNK_SIZE,
+        send_body=request.method != "HEAD"
+    )
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response
+import hmac
+from app.config import settings
+from app.auth import user_cache, token_cache, password_hasher
+from app.stats_buffer import points_buffer
+from app.map_tiles import tile_cache
+from app.hotspots import hotspot_engine
+from app.events import event_bus
+from app.jobs import job_queue
+from app.phash import photo_index
+from app.metrics import gauge_lines
+from app.instrumentation import request_metric_lines
+from app.routes.media import open_files
+
+router = APIRouter(tags=["Monitoring"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def component_metric_lines() -> list:
+    """Prometheus lines for the in-process caches, buffers and background jobs"""
+    caches = {
+        "users": user_cache.stats(),
+        "tokens": token_cache.stats(),
+        "map_tiles": tile_cache.stats(),
+        "media_files": open_files.stats()
+    }
+    hashing = password_hasher.stats()
+    buffer = points_buffer.stats()
+    jobs = job_queue.stats()
+    events = event_bus.stats()
+    hotspots = hotspot_engine.stats()
+    return [
+        *gauge_lines("saarthi_cache_hits_total", "Cache hits", {(name,): stats["hits"] for name, stats in caches.items()},
+                     ("cache",), metric_type="counter"),
+        *gauge_lines("saarthi_cache_misses_total", "Cache misses", {(name,): stats["misses"] for name, stats in caches.items()},
+                     ("cache",), metric_type="counter"),
+        *gauge_lines("saarthi_cache_entries", "Cache entries", {(name,): stats["size"] for name, stats in caches.items()},
+                     ("cache",)),
+        *gauge_lines("saarthi_password_hash_pending", "Password hashes queued or running", {(): hashing["pending"]}),
+        *gauge_lines("saarthi_password_hash_rejected_total", "Password hashes rejected when the queue was full",
+                     {(): hashing["rejected"]}, metric_type="counter"),
+        "# HELP saarthi_password_hash_duration_seconds bcrypt hash and verify latency",
+        "# TYPE saarthi_password_hash_duration_seconds histogram",
+        *password_hasher.hash_latency.prometheus_lines("saarthi_password_hash_duration_seconds"),
+        *gauge_lines("saarthi_stats_buffer_pending_users", "Users with unflushed stats increments",
+                     {(): buffer["pending_users"]}),
+        *gauge_lines("saarthi_stats_buffer_flushes_total", "User stats flushes", {(): buffer["flushes"]},
+                     metric_type="counter"),
+        *gauge_lines("saarthi_jobs_active", "Background jobs running in this worker", {(): jobs["active"]}),
+        *gauge_lines("saarthi_jobs_finished_total", "Background job attempts finished in this worker", {
+            ("succeeded",): jobs["succeeded"], ("retried",): jobs["retried"], ("dead",): jobs["dead"]
+        }, ("outcome",), metric_type="counter"),
+        *gauge_lines("saarthi_event_subscribers", "Change feed consumers", {(): events["subscribers"]}),
+        *gauge_lines("saarthi_events_dropped_total", "Change feed events dropped for slow consumers",
+                     {(): events["dropped"]}, metric_type="counter"),
+        *gauge_lines("saarthi_hotspot_runs_total", "Hotspot detection runs", {(): hotspots["runs"]},
+                     metric_type="counter"),
+        *gauge_lines("saarthi_photo_index_photos", "Photos in the duplicate detection index",
+                     {(): photo_index.stats()["photos"]})
+    ]
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """
+    Prometheus metrics for this worker process
+
+    Scrape every worker (or run one worker per target); counters are per
+    process and reset on restart. When METRICS_TOKEN is set, scrapers must
+    send it as a Bearer token.
+    """
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("authorization", "")
+        if not hmac.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+    lines = request_metric_lines() + component_metric_lines()
+    return Response("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,68 +1,256 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import os
+import time
 from app.models import (
     ReportCreate, ReportUpdate, ReportOut, ReportFilter, 
     PaginatedResponse, MessageResponse, UserInDB, ReportStatus, 
-    Department, ReportPriority
+    Department, ReportPriority, ImportSummary, BulkStatusUpdate,
+    BulkStatusResult, BulkStatusFailure, FileUploadResponse,
+    MediaDuplicate, DuplicateCheckResponse, NearbyReport, MapResponse
 )
+from app.config import settings
+from bson import ObjectId
+from pymongo import UpdateOne, ReturnDocument
 from app.auth import get_current_active_user, require_admin_role
 from app.database import get_database
+from app.importer import (
+    ReportImporter, ImportFormatError, detect_import_format,
+    iter_lines, iter_csv_records, iter_ndjson_records
+)
+from app.exporter import (
+    EXPORT_PROJECTION, EXPORT_MEDIA_TYPES, stream_csv, stream_ndjson,
+    stream_parquet, pq
+)
+from app.stats_buffer import award_points
+from app.media import (
+    ALLOWED_MEDIA_TYPES, MediaTooLarge, InvalidImage, stage_upload, store_upload,
+    discard_upload, hash_image_async, existing_variants
+)
+from app.jobs import enqueue
+from app.phash import photo_index
+from app.events import (
+    REPORT_CREATED, REPORT_UPDATED, REPORT_STATUS, REPORT_DELETED,
+    publish_report_event, publish_import_event
+)
+from app.map_tiles import parse_bbox, tiles_for_bbox, aggregate_tile
+from app.responses import (
+    REPORT_OUT_PROJECTION, trusted_report_out, negotiated_json_response,
+    parse_report_fields, report_projection, report_fields_model
+)
 from app.utils import (
     generate_report_id, validate_coordinates, get_city_from_coordinates,
     calculate_priority_from_keywords, build_report_filter, 
-    validate_status_transition, handle_database_error, calculate_user_points
+    validate_status_transition, handle_database_error, calculate_user_points,
+    get_allowed_source_statuses, sanitize_filename, text_similarity, to_geo_point,
+    append_detected_city
 )
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
-@router.get("/", response_model=PaginatedResponse)
-async def get_reports(
-    skip: int = Query(0, ge=0, description="Number of reports to skip"),
-    limit: int = Query(50, ge=1, le=100, description="Number of reports to return"),
+def report_filter_params(
     department: Optional[Department] = Query(None, description="Filter by department"),
     status: Optional[ReportStatus] = Query(None, description="Filter by status"),
     location: Optional[str] = Query(None, description="Filter by location"),
     priority: Optional[ReportPriority] = Query(None, description="Filter by priority"),
     search: Optional[str] = Query(None, description="Search in title and description"),
     date_from: Optional[datetime] = Query(None, description="Filter reports from this date"),
-    date_to: Optional[datetime] = Query(None, description="Filter reports until this date"),
+    date_to: Optional[datetime] = Query(None, description="Filter reports until this date")
+) -> dict:
+    """Build the MongoDB report filter from the shared query parameters"""
+    return build_report_filter(
+        department=department,
+        status=status, 
+        location=location,
+        priority=priority,
+        search=search,
+        date_from=date_from,
+        date_to=date_to
+    )
+
+def report_fields_params(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated report fields to return, or a named set (summary, map)"
+    )
+) -> Optional[tuple]:
+    """Parse the sparse fieldset query parameter"""
+    return parse_report_fields(fields)
+
+@router.get("/", response_model=PaginatedResponse)
+async def get_reports(
+    request: Request,
+    skip: int = Query(0, ge=0, description="Number of reports to skip"),
+    limit: int = Query(50, ge=1, le=100, description="Number of reports to return"),
+    filter_query: dict = Depends(report_filter_params),
+    fields: Optional[tuple] = Depends(report_fields_params),
     current_user: UserInDB = Depends(get_current_active_user)
 ):
     """
     Get paginated list of reports with filtering options
+    
+    Documents come straight from MongoDB through a fixed projection, so they
+    are shaped without Pydantic validation and encoded with orjson. With
+    `fields=summary` the page is answered from a covering index.
     """
     try:
         db = await get_database()
         
-        # Build filter query
-        filter_query = build_report_filter(
-            department=department,
-            status=status, 
-            location=location,
-            priority=priority,
-            search=search,
-            date_from=date_from,
-            date_to=date_to
-        )
-        
         # Get total count for pagination
         total = await db.reports.count_documents(filter_query)
         
         # Get reports with pagination
-        cursor = db.reports.find(filter_query).skip(skip).limit(limit).sort("created_at", -1)
+        cursor = db.reports.find(filter_query, report_projection(fields)).skip(skip).limit(limit).sort("created_at", -1)
         reports_data = await cursor.to_list(length=limit)
         
-        # Convert to response models
-        reports = [ReportOut(**report) for report in reports_data]
+        # Trusted read path: skip response model re-validation
+        return negotiated_json_response(request, {
+            "items": [trusted_report_out(report, fields) for report in reports_data],
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+            "has_more": (skip + limit) < total
+        })
+        
+    except Exception as e:
+        raise handle_database_error(e)
+
+@router.get("/export")
+async def export_reports(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$", description="Export format"),
+    filter_query: dict = Depends(report_filter_params),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Export all reports matching the filters as a streamed file
+    
+    Rows are read from a MongoDB cursor in batches of EXPORT_BATCH_SIZE and
+    written to the response as they arrive, so memory stays flat no matter
+    how many reports match.
+    """
+    if format == "parquet" and pq is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow to be installed"
+        )
+    
+    db = await get_database()
+    cursor = (
+        db.reports.find(filter_query, EXPORT_PROJECTION)
+        .sort("created_at", -1)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+    
+    async def generate():
+        try:
+            if format == "csv":
+                encoder = stream_csv(cursor, settings.EXPORT_CHUNK_BYTES)
+            elif format == "ndjson":
+                encoder = stream_ndjson(cursor, settings.EXPORT_CHUNK_BYTES)
+            else:
+                encoder = stream_parquet(cursor, settings.EXPORT_BATCH_SIZE)
+            async for chunk in encoder:
+                if chunk:
+                    yield chunk
+        finally:
+            # Release the server-side cursor if the client disconnects early
+            await cursor.close()
+    
+    filename = f"reports-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/nearby", response_model=List[NearbyReport])
+async def get_nearby_reports(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the search point"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude of the search point"),
+    radius: float = Query(500, gt=0, le=settings.NEARBY_MAX_RADIUS_M, description="Search radius in meters"),
+    limit: int = Query(50, ge=1, le=200, description="Number of reports to return"),
+    filter_query: dict = Depends(report_filter_params),
+    fields: Optional[tuple] = Depends(report_fields_params),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Get reports within a radius of a point, nearest first
+    
+    Uses $geoNear on the 2dsphere `geo` index, with the usual status,
+    department, location, priority and date filters applied inside the same
+    index scan. Each report carries `distance_m`. Reports created before the
+    geo migration are only found once scripts/migrate_geo.py has run.
+    """
+    if "$text" in filter_query:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="search cannot be combined with a nearby query"
+        )
+    
+    try:
+        db = await get_database()
+        pipeline = [
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": [lng, lat]},
+                "key": "geo",
+                "distanceField": "distance_m",
+                "maxDistance": radius,
+                "query": filter_query,
+                "spherical": True
+            }},
+            {"$limit": limit},
+            {"$project": {**report_projection(fields), "distance_m": 1}}
+        ]
+        reports_data = await db.reports.aggregate(pipeline).to_list(length=limit)
+        
+        return negotiated_json_response(request, [
+            {**trusted_report_out(report, fields), "distance_m": round(report["distance_m"], 1)}
+            for report in reports_data
+        ])
         
-        return PaginatedResponse(
-            items=reports,
-            total=total,
-            skip=skip,
-            limit=limit,
-            has_more=(skip + limit) < total
+    except Exception as e:
+        raise handle_database_error(e)
+
+@router.get("/map", response_model=MapResponse)
+async def get_report_map(
+    request: Request,
+    bbox: str = Query(..., description="Viewport as west,south,east,north in degrees"),
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level"),
+    filter_query: dict = Depends(report_filter_params),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Get report clusters for a map viewport
+    
+    The viewport is covered with XYZ tiles (at most MAP_MAX_TILES; the zoom
+    is lowered when more would be needed) and each tile is split into a
+    MAP_TILE_GRID x MAP_TILE_GRID lattice. Every non-empty cell comes back as
+    one bucket with its centroid and counts by status and priority, so the
+    payload depends on the viewport, not on the number of reports. Tiles are
+    cached for MAP_TILE_CACHE_TTL_SECONDS per filter combination.
+    """
+    try:
+        bounds = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
+    
+    try:
+        db = await get_database()
+        used_zoom, tiles = tiles_for_bbox(bounds, zoom, settings.MAP_MAX_TILES)
+        results = await asyncio.gather(*(aggregate_tile(db, tile, filter_query) for tile in tiles))
+        
+        return negotiated_json_response(request, {
+            "zoom": used_zoom,
+            "total": sum(tile["count"] for tile in results),
+            "tiles": [tile for tile in results if tile["count"]]
+        })
         
     except Exception as e:
         raise handle_database_error(e)
@@ -91,8 +279,7 @@ async def create_report(
             
             # Auto-detect city from coordinates if location not precise
             detected_city = get_city_from_coordinates(report_data.coordinates)
-            if detected_city and detected_city.lower() not in report_data.location.lower():
-                report_data.location = f"{report_data.location}, {detected_city}"
+            report_data.location = append_detected_city(report_data.location, detected_city)
         
         # Auto-calculate priority if not specified
         if report_data.priority == ReportPriority.medium:
@@ -109,6 +296,7 @@ async def create_report(
             "department": report_data.department.value,
             "location": report_data.location,
             "coordinates": report_data.coordinates,
+            "geo": to_geo_point(report_data.coordinates),
             "priority": report_data.priority.value,
             "status": ReportStatus.pending.value,
             "created_at": datetime.utcnow(),
@@ -120,34 +308,174 @@ async def create_report(
         
         # Update user stats (add points for submitting report)
         points_earned = calculate_user_points("submit_report")
-        await db.user_stats.update_one(
-            {"user_id": current_user.employee_id},
-            {
-                "$inc": {
-                    "points": points_earned,
-                    "reports_submitted": 1
-                },
-                "$set": {"user_name": current_user.name}
-            },
-            upsert=True
+        await award_points(
+            current_user.employee_id,
+            user_name=current_user.name,
+            points=points_earned,
+            reports_submitted=1
         )
         
+        publish_report_event(REPORT_CREATED, report_doc)
         return ReportOut(**report_doc)
         
     except Exception as e:
         raise handle_database_error(e)
 
+@router.post("/import", response_model=ImportSummary)
+async def import_reports(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Body format, defaults to the Content-Type"),
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Bulk import historical reports from a streamed CSV or NDJSON body (admin only)
+    
+    Rows are validated with ReportCreate and inserted in unordered batches of
+    IMPORT_BATCH_SIZE while the body is still being received. CSV files in the
+    odisha_civic_issues.csv schema (location, description, issue_type, urgency)
+    are accepted as-is. Invalid rows are reported individually and skipped.
+    """
+    import_format = detect_import_format(request.headers.get("content-type", ""), format)
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"
+        )
+    
+    try:
+        db = await get_database()
+        started_at = time.perf_counter()
+        importer = ReportImporter(
+            db, current_user,
+            batch_size=settings.IMPORT_BATCH_SIZE,
+            max_errors=settings.IMPORT_MAX_ERRORS
+        )
+        
+        lines = iter_lines(request.stream())
+        records = iter_csv_records(lines) if import_format == "csv" else iter_ndjson_records(lines)
+        async for row, record, error in records:
+            await importer.add(row, record, error)
+        
+        summary = await importer.finish(started_at)
+        publish_import_event(summary.inserted, importer.departments)
+        return summary
+        
+    except ImportFormatError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise handle_database_error(e)
+
+@router.post("/bulk-status", response_model=BulkStatusResult)
+async def bulk_update_report_status(
+    bulk_update: BulkStatusUpdate,
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Move many reports to the same status in one write (admin only)
+    
+    Each update only matches while the report is still in a status that may
+    transition to the target, so concurrent changes cannot slip through.
+    """
+    try:
+        db = await get_database()
+        
+        report_ids = list(dict.fromkeys(bulk_update.ids))
+        new_status = bulk_update.status
+        allowed_sources = [source.value for source in get_allowed_source_statuses(new_status)]
+        
+        # One read to explain why ids cannot transition (and to route change events)
+        current_reports = {
+            report["id"]: report
+            async for report in db.reports.find(
+                {"id": {"$in": report_ids}},
+                {"_id": 0, "id": 1, "status": 1, "department": 1, "location": 1}
+            )
+        }
+        
+        failed = []
+        eligible_ids = []
+        for report_id in report_ids:
+            current_status = current_reports.get(report_id, {}).get("status")
+            if current_status is None:
+                failed.append(BulkStatusFailure(id=report_id, reason="Report not found"))
+            elif current_status not in allowed_sources:
+                failed.append(BulkStatusFailure(
+                    id=report_id,
+                    reason=f"Invalid status transition from {current_status} to {new_status.value}"
+                ))
+            else:
+                eligible_ids.append(report_id)
+        
+        updated_ids = []
+        if eligible_ids:
+            updated_at = datetime.utcnow()
+            # Marks the reports this request moved; updated_at alone can collide with a concurrent change
+            bulk_status_id = ObjectId()
+            result = await db.reports.bulk_write([
+                UpdateOne(
+                    {"id": report_id, "status": {"$in": allowed_sources}},
+                    {"$set": {"status": new_status.value, "updated_at": updated_at, "bulk_status_id": bulk_status_id}}
+                )
+                for report_id in eligible_ids
+            ], ordered=False)
+            
+            if result.matched_count == len(eligible_ids):
+                updated_ids = eligible_ids
+            else:
+                # Some reports changed status between the read and the write
+                applied = set(await db.reports.distinct(
+                    "id",
+                    {"id": {"$in": eligible_ids}, "bulk_status_id": bulk_status_id}
+                ))
+                for report_id in eligible_ids:
+                    if report_id in applied:
+                        updated_ids.append(report_id)
+                    else:
+                        failed.append(BulkStatusFailure(id=report_id, reason="Report status changed concurrently"))
+            
+            for report_id in updated_ids:
+                publish_report_event(REPORT_STATUS, {
+                    **current_reports[report_id],
+                    "status": new_status.value,
+                    "updated_at": updated_at
+                })
+        
+        # Award all resolution points as a single increment
+        if new_status == ReportStatus.resolved and updated_ids:
+            points_earned = calculate_user_points("resolve_report") * len(updated_ids)
+            await award_points(
+                current_user.employee_id,
+                points=points_earned,
+                reports_resolved=len(updated_ids)
+            )
+        
+        return BulkStatusResult(status=new_status, updated=updated_ids, failed=failed)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise handle_database_error(e)
+
 @router.get("/{report_id}", response_model=ReportOut)
 async def get_report(
     report_id: str,
+    request: Request,
+    fields: Optional[tuple] = Depends(report_fields_params),
     current_user: UserInDB = Depends(get_current_active_user)
 ):
     """
     Get a specific report by ID
+    
+    With `fields`, only the requested fields are read and returned.
     """
     try:
         db = await get_database()
-        report_data = await db.reports.find_one({"id": report_id})
+        report_data = await db.reports.find_one({"id": report_id}, report_projection(fields))
         
         if not report_data:
             raise HTTPException(
@@ -155,6 +483,11 @@ async def get_report(
                 detail="Report not found"
             )
         
+        if fields:
+            # Validate against a model trimmed to the requested fields
+            trimmed = report_fields_model(fields).model_validate(report_data)
+            return negotiated_json_response(request, trimmed.model_dump(mode="json"))
+        
         return ReportOut(**report_data)
         
     except HTTPException:
@@ -170,34 +503,14 @@ async def update_report(
 ):
     """
     Update a report (status updates require admin role)
+    
+    The status transition is checked inside the update filter, so the common
+    case is a single find_one_and_update and concurrent resolutions cannot
+    both succeed or both award points.
     """
     try:
         db = await get_database()
-        
-        # Get existing report
-        existing_report = await db.reports.find_one({"id": report_id})
-        if not existing_report:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Report not found"
-            )
-        
-        # Check permissions for status updates
-        if update_data.status and update_data.status != existing_report["status"]:
-            if current_user.role not in ["admin", "super_admin"]:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Only admins can update report status"
-                )
-            
-            # Validate status transition
-            current_status = ReportStatus(existing_report["status"])
-            new_status = update_data.status
-            if not validate_status_transition(current_status, new_status):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid status transition from {current_status.value} to {new_status.value}"
-                )
+        is_admin = current_user.role in ["admin", "super_admin"]
         
         # Build update document
         update_doc = {"updated_at": datetime.utcnow()}
@@ -215,36 +528,78 @@ async def update_report(
         if update_data.coordinates:
             if validate_coordinates(update_data.coordinates):
                 update_doc["coordinates"] = update_data.coordinates
+                update_doc["geo"] = to_geo_point(update_data.coordinates)
             else:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid coordinates provided"
                 )
-        if update_data.status:
-            update_doc["status"] = update_data.status.value
+        
+        # Only match while the report is in a status that may move to the new one
+        report_filter = {"id": report_id}
+        new_status = update_data.status
+        if new_status:
+            update_doc["status"] = new_status.value
+            if is_admin:
+                report_filter["status"] = {
+                    "$in": [source.value for source in get_allowed_source_statuses(new_status)]
+                }
+            else:
+                # Non-admins may only resend the current status
+                report_filter["status"] = new_status.value
+        
+        updated_report = await db.reports.find_one_and_update(
+            report_filter,
+            {"$set": update_doc},
+            projection=REPORT_OUT_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        transitioned = updated_report is not None and new_status is not None and is_admin
+        
+        if updated_report is None:
+            # Explain the miss with one extra read
+            existing_report = await db.reports.find_one({"id": report_id}, {"_id": 0, "status": 1})
+            if not existing_report:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Report not found"
+                )
+            
+            current_status = ReportStatus(existing_report["status"])
+            if new_status and current_status != new_status:
+                if not is_admin:
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="Only admins can update report status"
+                    )
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid status transition from {current_status.value} to {new_status.value}"
+                )
             
-            # Award points if report is being resolved
-            if update_data.status == ReportStatus.resolved:
-                points_earned = calculate_user_points("resolve_report")
-                await db.user_stats.update_one(
-                    {"user_id": current_user.employee_id},
-                    {
-                        "$inc": {
-                            "points": points_earned,
-                            "reports_resolved": 1
-                        }
-                    },
-                    upsert=True
+            # Status is already the requested one: apply the other fields only
+            updated_report = await db.reports.find_one_and_update(
+                {"id": report_id, "status": current_status.value},
+                {"$set": update_doc},
+                projection=REPORT_OUT_PROJECTION,
+                return_document=ReturnDocument.AFTER
+            )
+            if updated_report is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Report was modified concurrently, please retry"
                 )
         
-        # Update report
-        result = await db.reports.update_one(
-            {"id": report_id},
-            {"$set": update_doc}
-        )
+        # Award points only when this request performed the resolution
+        if transitioned and new_status == ReportStatus.resolved:
+            points_earned = calculate_user_points("resolve_report")
+            await award_points(
+                current_user.employee_id,
+                points=points_earned,
+                reports_resolved=1
+            )
         
-        # Get updated report
-        updated_report = await db.reports.find_one({"id": report_id})
+        publish_report_event(REPORT_STATUS if transitioned else REPORT_UPDATED, updated_report)
         return ReportOut(**updated_report)
         
     except HTTPException:
@@ -263,14 +618,18 @@ async def delete_report(
     try:
         db = await get_database()
         
-        result = await db.reports.delete_one({"id": report_id})
+        deleted_report = await db.reports.find_one_and_delete(
+            {"id": report_id},
+            projection={"_id": 0, "id": 1, "department": 1, "location": 1}
+        )
         
-        if result.deleted_count == 0:
+        if deleted_report is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Report not found"
             )
         
+        publish_report_event(REPORT_DELETED, deleted_report)
         return MessageResponse(
             message=f"Report {report_id} deleted successfully",
             success=True
@@ -289,51 +648,223 @@ async def update_report_status(
 ):
     """
     Quick status update endpoint (admin only)
+    
+    Enforces the transition atomically with a single find_one_and_update.
     """
     try:
         db = await get_database()
         
-        # Get existing report
-        existing_report = await db.reports.find_one({"id": report_id})
-        if not existing_report:
+        # Update status only from an allowed source status
+        allowed_sources = [source.value for source in get_allowed_source_statuses(new_status)]
+        updated_report = await db.reports.find_one_and_update(
+            {"id": report_id, "status": {"$in": allowed_sources}},
+            {"$set": {"status": new_status.value, "updated_at": datetime.utcnow()}},
+            projection=REPORT_OUT_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if updated_report is None:
+            existing_report = await db.reports.find_one({"id": report_id}, {"_id": 0, "status": 1})
+            if not existing_report:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Report not found"
+                )
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Report not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid status transition from {existing_report['status']} to {new_status.value}"
             )
         
-        # Validate status transition
-        current_status = ReportStatus(existing_report["status"])
-        if not validate_status_transition(current_status, new_status):
+        # Award points if resolved
+        if new_status == ReportStatus.resolved:
+            points_earned = calculate_user_points("resolve_report")
+            await award_points(current_user.employee_id, points=points_earned, reports_resolved=1)
+        
+        publish_report_event(REPORT_STATUS, updated_report)
+        return ReportOut(**updated_report)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise handle_database_error(e)
+
+async def find_photo_duplicates(db, report_id: str, report: dict, hashes: dict) -> List[MediaDuplicate]:
+    """Look up similar photos on other reports nearby and score their text against this report"""
+    matches = [
+        match for match in photo_index.search(
+            hashes["phash"], hashes["dhash"], report.get("coordinates"),
+            report.get("location"), settings.PHASH_MAX_DISTANCE
+        )
+        if match["report_id"] != report_id
+    ]
+    if not matches:
+        return []
+    
+    others = await db.reports.find(
+        {"id": {"$in": list({match["report_id"] for match in matches})}},
+        {"_id": 0, "id": 1, "title": 1, "description": 1}
+    ).to_list(length=None)
+    texts = {other["id"]: f"{other['title']} {other['description']}" for other in others}
+    own_text = f"{report['title']} {report['description']}"
+    
+    return [
+        MediaDuplicate(**match, text_score=text_similarity(own_text, texts[match["report_id"]]))
+        for match in matches
+        if match["report_id"] in texts  # Skip reports deleted since they were indexed
+    ]
+
+@router.get("/{report_id}/duplicates", response_model=DuplicateCheckResponse)
+async def get_report_duplicates(
+    report_id: str,
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Find likely duplicates of a report by its photos
+    
+    Each attached photo is compared by perceptual hash against photos on other
+    reports in the same or a neighbouring geo cell (or the same location when
+    the report has no coordinates). Matches carry the pHash/dHash Hamming
+    distances next to the text similarity score.
+    """
+    try:
+        db = await get_database()
+        report = await db.reports.find_one(
+            {"id": report_id},
+            {"_id": 0, "title": 1, "description": 1, "coordinates": 1, "location": 1, "media": 1}
+        )
+        if not report:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid status transition from {current_status.value} to {new_status.value}"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Report not found"
             )
         
-        # Update status
-        update_doc = {
-            "status": new_status.value,
-            "updated_at": datetime.utcnow()
-        }
+        await photo_index.sync(db)
+        best = {}
+        for media in report.get("media", []):
+            if "phash" not in media:
+                continue
+            for duplicate in await find_photo_duplicates(db, report_id, report, media):
+                key = (duplicate.report_id, duplicate.sha256)
+                if key not in best or duplicate.phash_distance < best[key].phash_distance:
+                    best[key] = duplicate
         
-        await db.reports.update_one(
+        matches = sorted(best.values(), key=lambda match: (match.phash_distance, match.dhash_distance))
+        return DuplicateCheckResponse(report_id=report_id, matches=matches)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise handle_database_error(e)
+
+@router.post("/{report_id}/media", response_model=FileUploadResponse)
+async def upload_report_media(
+    report_id: str,
+    request: Request,
+    filename: Optional[str] = Query(None, description="Original file name"),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Attach a photo to a report
+    
+    Send the raw image as the request body with an image/jpeg, image/png or
+    image/webp Content-Type. The body is streamed to disk, hashed while it is
+    written and stored under its SHA-256, so identical photos are kept once.
+    The image is verified and perceptually hashed in a process pool, and its
+    extension and stored content type follow the format detected there. The
+    response lists visually similar photos already attached to other reports
+    in the same area. Thumbnails are written by a background job unless they
+    already exist, in which case `variants` is filled and
+    `variants_pending` is false.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in ALLOWED_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported media type, use one of: {', '.join(ALLOWED_MEDIA_TYPES)}"
+        )
+    
+    # Reject oversized uploads before reading the body when the size is declared
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the maximum size of {settings.MAX_FILE_SIZE} bytes"
+        )
+    
+    try:
+        db = await get_database()
+        report = await db.reports.find_one(
             {"id": report_id},
-            {"$set": update_doc}
+            {"_id": 0, "title": 1, "description": 1, "coordinates": 1, "location": 1}
         )
+        if not report:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Report not found"
+            )
         
-        # Award points if resolved
-        if new_status == ReportStatus.resolved:
-            points_earned = calculate_user_points("resolve_report")
-            await db.user_stats.update_one(
-                {"user_id": current_user.employee_id},
-                {"$inc": {"points": points_earned, "reports_resolved": 1}},
-                upsert=True
+        staged = await stage_upload(request.stream(), settings.MAX_FILE_SIZE)
+        
+        # Only verified images reach their content-addressed path, named for the detected format
+        try:
+            hashes = await hash_image_async(staged.path)
+            stored = store_upload(staged, hashes["format"])
+        except InvalidImage:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file is not a valid image"
             )
+        finally:
+            discard_upload(staged)
+        
+        variants = existing_variants(stored.sha256)
+        uploaded_at = datetime.utcnow()
+        media_doc = {
+            "sha256": stored.sha256,
+            "path": stored.path,
+            "content_type": stored.content_type,
+            "size": stored.size,
+            "filename": sanitize_filename(filename) if filename else None,
+            "variants": variants or {},
+            "phash": hashes["phash"],
+            "dhash": hashes["dhash"],
+            "hashed_at": uploaded_at,
+            "uploaded_by": current_user.employee_id,
+            "uploaded_at": uploaded_at
+        }
         
-        # Return updated report
-        updated_report = await db.reports.find_one({"id": report_id})
-        return ReportOut(**updated_report)
+        # Attach once per report even if the same photo is sent again
+        await db.reports.update_one(
+            {"id": report_id, "media.sha256": {"$ne": stored.sha256}},
+            {"$push": {"media": media_doc}, "$set": {"updated_at": uploaded_at}}
+        )
+        if variants is None:
+            await enqueue("media.variants", {"report_id": report_id, "sha256": stored.sha256, "path": stored.path})
+        
+        await photo_index.sync(db)
+        duplicates = await find_photo_duplicates(db, report_id, report, hashes)
+        photo_index.add(hashes["phash"], hashes["dhash"], report_id, stored.sha256,
+                        report.get("coordinates"), report.get("location"))
+        
+        return FileUploadResponse(
+            filename=media_doc["filename"] or os.path.basename(stored.path),
+            file_path=stored.path,
+            file_size=stored.size,
+            content_type=stored.content_type,
+            upload_timestamp=uploaded_at,
+            sha256=stored.sha256,
+            variants=variants or {},
+            variants_pending=variants is None,
+            deduplicated=not stored.created,
+            duplicates=duplicates
+        )
         
+    except MediaTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the maximum size of {settings.MAX_FILE_SIZE} bytes"
+        )
     except HTTPException:
         raise
     except Exception as e:
-        raise handle_database_error(e)
\ No newline at end of file
+        raise handle_database_error(e)
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from app.models import StatsResponse, TopPerformer, OverallStats, UserInDB
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from typing import List, Optional
+from app.models import StatsResponse, TopPerformer, OverallStats, UserInDB, Department, HotspotResponse
+from app.config import settings
 from app.auth import get_current_active_user
 from app.database import get_database
 from app.utils import handle_database_error
@@ -53,7 +54,7 @@ async def get_stats_summary(
         stats["submitted"] = total_reports
         
         # Get top performers
-        top_performers_data = await db.user_stats.find({}).sort("points", -1).limit(5).to_list(length=5)
+        top_performers_data = await db.user_stats.find({}, {"applied_drains": 0}).sort("points", -1).limit(5).to_list(length=5)
         
         top_performers = [
             TopPerformer(
@@ -87,7 +88,7 @@ async def get_top_performers(
     try:
         db = await get_database()
         
-        performers_data = await db.user_stats.find({}).sort("points", -1).limit(limit).to_list(length=limit)
+        performers_data = await db.user_stats.find({}, {"applied_drains": 0}).sort("points", -1).limit(limit).to_list(length=limit)
         
         performers = [
             TopPerformer(
@@ -223,6 +224,44 @@ async def get_trends_data(
     except Exception as e:
         raise handle_database_error(e)
 
+@router.get("/hotspots", response_model=HotspotResponse)
+async def get_hotspots(
+    department: Optional[Department] = Query(None, description="Filter by department"),
+    min_reports: int = Query(0, ge=0, description="Only hotspots with at least this many reports"),
+    limit: int = Query(50, ge=1, le=500, description="Number of hotspots to return"),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Get the latest detected issue hotspots, largest first
+    
+    Hotspots are precomputed by the background hotspot job (every
+    HOTSPOT_INTERVAL_SECONDS) over the last HOTSPOT_WINDOW_DAYS of reports,
+    so this reads a small collection regardless of how many reports exist.
+    """
+    try:
+        db = await get_database()
+        
+        state = await db.hotspot_state.find_one({"_id": "hotspots"})
+        if not state:
+            return HotspotResponse(window_days=settings.HOTSPOT_WINDOW_DAYS, hotspots=[])
+        
+        hotspot_filter = {"generated_at": state["generated_at"]}
+        if department:
+            hotspot_filter["department"] = department.value
+        if min_reports:
+            hotspot_filter["report_count"] = {"$gte": min_reports}
+        
+        hotspots = await db.hotspots.find(hotspot_filter, {"_id": 0, "generated_at": 0}).sort("rank", 1).limit(limit).to_list(length=limit)
+        
+        return HotspotResponse(
+            generated_at=state["generated_at"],
+            window_days=state["window_days"],
+            hotspots=hotspots
+        )
+        
+    except Exception as e:
+        raise handle_database_error(e)
+
 @router.get("/user/{employee_id}")
 async def get_user_statistics(
     employee_id: str,
@@ -242,7 +281,7 @@ async def get_user_statistics(
             )
         
         # Get user stats
-        user_stats = await db.user_stats.find_one({"user_id": employee_id})
+        user_stats = await db.user_stats.find_one({"user_id": employee_id}, {"applied_drains": 0})
         
         if not user_stats:
             # Initialize empty stats if user hasn't performed any actions yet
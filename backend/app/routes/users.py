@@ -1,7 +1,14 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from app.models import UserOut, UserCreate, UserUpdate, MessageResponse, UserInDB
-from app.auth import get_current_active_user, require_admin_role, get_password_hash
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.models import (
+    UserOut, UserCreate, UserUpdate, MessageResponse, UserInDB, UserPage,
+    UserRole, Department
+)
+from app.config import settings
+from app.exporter import stream_ndjson
+from app.responses import USER_OUT_PROJECTION, trusted_user_out, negotiated_json_response
+from app.auth import get_current_active_user, require_admin_role, get_password_hash_async, invalidate_user
 from app.database import get_database
 from app.utils import validate_employee_id, handle_database_error
 from datetime import datetime
@@ -54,6 +61,7 @@ async def update_my_profile(
             {"employee_id": current_user.employee_id},
             {"$set": update_doc}
         )
+        invalidate_user(current_user.employee_id)
         
         # Get updated user
         updated_user = await db.users.find_one({"employee_id": current_user.employee_id})
@@ -64,21 +72,78 @@ async def update_my_profile(
     except Exception as e:
         raise handle_database_error(e)
 
-@router.get("/", response_model=List[UserOut])
+def build_user_filter(
+    department: Optional[Department] = Query(None, description="Filter by department"),
+    role: Optional[UserRole] = Query(None, description="Filter by role")
+) -> dict:
+    """Build the MongoDB user directory filter"""
+    filter_query = {}
+    if department:
+        filter_query["department"] = department.value
+    if role:
+        filter_query["role"] = role.value
+    return filter_query
+
+@router.get("/", response_model=UserPage)
 async def get_all_users(
+    request: Request,
+    after: Optional[str] = Query(None, description="Employee ID cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=settings.USER_PAGE_MAX_LIMIT, description="Number of users to return"),
+    filter_query: dict = Depends(build_user_filter),
     current_user: UserInDB = Depends(require_admin_role)
 ):
     """
-    Get all users (admin only)
+    Get a page of the user directory (admin only)
+    
+    Pages are keyed on employee_id, so each page is an index range scan
+    instead of a growing skip. Password hashes are never read.
     """
     try:
         db = await get_database()
-        users_data = await db.users.find({}).to_list(length=None)
-        return [UserOut(**user) for user in users_data]
+        
+        if after:
+            filter_query["employee_id"] = {"$gt": after}
+        
+        # Fetch one extra user to know whether another page exists
+        cursor = db.users.find(filter_query, USER_OUT_PROJECTION).sort("employee_id", 1).limit(limit + 1)
+        users_data = await cursor.to_list(length=limit + 1)
+        has_more = len(users_data) > limit
+        users_data = users_data[:limit]
+        
+        return negotiated_json_response(request, {
+            "items": [trusted_user_out(user) for user in users_data],
+            "next_cursor": users_data[-1]["employee_id"] if has_more else None,
+            "has_more": has_more
+        })
         
     except Exception as e:
         raise handle_database_error(e)
 
+@router.get("/stream")
+async def stream_all_users(
+    filter_query: dict = Depends(build_user_filter),
+    current_user: UserInDB = Depends(require_admin_role)
+):
+    """
+    Stream the full user directory as NDJSON for sync tools (admin only)
+    """
+    db = await get_database()
+    cursor = (
+        db.users.find(filter_query, USER_OUT_PROJECTION)
+        .sort("employee_id", 1)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+    
+    async def generate():
+        try:
+            async for chunk in stream_ndjson(cursor, settings.EXPORT_CHUNK_BYTES, transform=trusted_user_out):
+                if chunk:
+                    yield chunk
+        finally:
+            await cursor.close()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @router.post("/", response_model=UserOut)
 async def create_user(
     user_data: UserCreate,
@@ -113,12 +178,15 @@ async def create_user(
                 detail="Email already registered"
             )
         
+        # Hash outside the event loop before building the document
+        password_hash = await get_password_hash_async(user_data.password)
+        
         # Create user document
         user_doc = {
             "employee_id": user_data.employee_id,
             "name": user_data.name,
             "email": user_data.email,
-            "password": get_password_hash(user_data.password),
+            "password": password_hash,
             "role": user_data.role.value,
             "department": user_data.department.value if user_data.department else None,
             "is_active": True,
@@ -226,6 +294,7 @@ async def update_user(
             {"employee_id": employee_id},
             {"$set": update_doc}
         )
+        invalidate_user(employee_id)
         
         # Update user stats if name changed
         if update_data.name:
@@ -264,6 +333,7 @@ async def delete_user(
         
         # Delete user
         result = await db.users.delete_one({"employee_id": employee_id})
+        invalidate_user(employee_id)
         
         if result.deleted_count == 0:
             raise HTTPException(
@@ -306,6 +376,7 @@ async def deactivate_user(
             {"employee_id": employee_id},
             {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
         )
+        invalidate_user(employee_id)
         
         if result.matched_count == 0:
             raise HTTPException(
@@ -338,6 +409,7 @@ async def activate_user(
             {"employee_id": employee_id},
             {"$set": {"is_active": True, "updated_at": datetime.utcnow()}}
         )
+        invalidate_user(employee_id)
         
         if result.matched_count == 0:
             raise HTTPException(
@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import orjson
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid
+from app.config import settings
+from app.instrumentation import current_route_label
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+# Cursor continuations, handshakes and our own explains are never logged
+IGNORED_COMMANDS = {
+    "getMore", "explain", "killCursors", "endSessions", "hello", "isMaster", "ismaster",
+    "ping", "saslStart", "saslContinue", "buildInfo", "listCollections", "createIndexes"
+}
+
+# Driver and session fields that explain does not accept inside the explained command
+EXPLAIN_STRIPPED_FIELDS = {
+    "lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"
+}
+
+# Where each command keeps its filter
+FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query"
+}
+
+def normalize_shape(value):
+    """
+    Replace literal values with "?" so queries differing only in values share a shape
+
+    Field names and operators are kept; lists of sub-documents (e.g. $and,
+    $or, pipeline stages) are normalized element by element.
+    """
+    if isinstance(value, dict):
+        return {key: normalize_shape(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)) and value and all(isinstance(item, dict) for item in value):
+        return [normalize_shape(item) for item in value]
+    return "?"
+
+def command_shape(command_name: str, command: dict) -> Optional[dict]:
+    """Normalized shape of a command's filter, sort or pipeline (None when it has none)"""
+    if command_name == "aggregate":
+        return {"pipeline": normalize_shape(command.get("pipeline", []))}
+    if command_name in FILTER_FIELDS:
+        shape = {"filter": normalize_shape(command.get(FILTER_FIELDS[command_name]) or {})}
+        if command.get("sort"):
+            shape["sort"] = {key: direction for key, direction in command["sort"].items()}
+        if command_name == "distinct":
+            shape["key"] = command.get("key")
+        return shape
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or []
+        return {"filter": normalize_shape(statements[0].get("q", {})) if statements else {}}
+    return None
+
+def shape_hash(collection: str, command_name: str, shape: Optional[dict]) -> str:
+    """Stable key for grouping slow commands of the same shape"""
+    encoded = orjson.dumps([collection, command_name, shape], option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+def explain_command(command_name: str, command: dict) -> Optional[dict]:
+    """The command to wrap in explain, without driver-added fields (None if it cannot be explained)"""
+    if command_name not in ("find", "aggregate", "count", "distinct"):
+        return None  # Writes are not explained; re-running their plan is not worth the risk
+    if command_name == "aggregate":
+        stages = {next(iter(stage), None) for stage in command.get("pipeline", [])}
+        if stages & {"$out", "$merge"}:
+            return None
+    return {
+        key: value for key, value in command.items()
+        if not key.startswith("$") and key not in EXPLAIN_STRIPPED_FIELDS
+    }
+
+def _plan_stages(plan: Optional[dict]) -> List[str]:
+    stages = []
+    while plan:
+        plan = plan.get("queryPlan", plan)  # Slot-based engine wraps the plan
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage += f"({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+def summarize_explain(explain: dict) -> dict:
+    """Keep the winning plan and execution counters of an explain, without query literals"""
+    pipeline = []
+    cursor = explain
+    if "stages" in explain:
+        pipeline = [next(iter(stage)) for stage in explain["stages"]]
+        cursor = explain["stages"][0].get("$cursor", {})
+    execution = cursor.get("executionStats", {})
+    return {
+        "plan": _plan_stages(cursor.get("queryPlanner", {}).get("winningPlan")),
+        "pipeline": pipeline[1:],
+        "n_returned": execution.get("nReturned"),
+        "keys_examined": execution.get("totalKeysExamined"),
+        "docs_examined": execution.get("totalDocsExamined"),
+        "execution_ms": execution.get("executionTimeMillis")
+    }
+
+class SlowQueryLog(monitoring.CommandListener):
+    """
+    Record MongoDB commands slower than SLOW_QUERY_THRESHOLD_MS
+
+    The listener runs on the driver's I/O threads and only queues entries.
+    A background task writes them to a capped collection and, for a sample
+    of shapes not explained within SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    re-runs the command under explain("executionStats").
+    """
+
+    def __init__(self, threshold_ms: int, max_pending: int = 1000):
+        self.threshold_micros = threshold_ms * 1000
+        self._started: Dict[Tuple[object, int], tuple] = {}
+        self._lock = threading.Lock()
+        self._pending: deque = deque(maxlen=max_pending)  # Appends are thread-safe
+        self._last_explained: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.recorded = 0
+        self.explained = 0
+        self.explain_failures = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str) or collection == SLOW_QUERY_COLLECTION:
+            return
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (
+                collection, event.command, event.database_name, current_route_label()
+            )
+
+    def _finish(self, event, error: Optional[str]) -> None:
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None or event.duration_micros < self.threshold_micros:
+            return
+        collection, command, database_name, route = started
+        shape = command_shape(event.command_name, command)
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append({
+            "at": datetime.utcnow(),
+            "route": route,
+            "database": database_name,
+            "collection": collection,
+            "command": event.command_name,
+            # Stored as JSON text: shapes are full of $-prefixed operator keys
+            "shape": orjson.dumps(shape, option=orjson.OPT_SORT_KEYS).decode() if shape else None,
+            "shape_hash": shape_hash(collection, event.command_name, shape),
+            "duration_ms": round(event.duration_micros / 1000, 3),
+            "error": error,
+            "_explain": explain_command(event.command_name, command)
+        })
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, None)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, str(event.failure.get("errmsg", "failed")))
+
+    def _should_explain(self, shape_key: str) -> bool:
+        if random.random() >= settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            return False
+        now = time.monotonic()
+        last = self._last_explained.get(shape_key)
+        if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+            return False
+        self._last_explained[shape_key] = now
+        return True
+
+    async def _explain(self, client, database_name: str, command: dict) -> dict:
+        try:
+            explain = await client[database_name].command({"explain": command, "verbosity": "executionStats"})
+            self.explained += 1
+            return summarize_explain(explain)
+        except Exception as e:
+            self.explain_failures += 1
+            return {"error": str(e)}
+
+    async def flush(self, client) -> None:
+        """Write queued entries, explaining a sample of them first"""
+        entries = []
+        while self._pending:
+            entries.append(self._pending.popleft())
+        if not entries:
+            return
+        try:
+            for entry in entries:
+                command = entry.pop("_explain", None)
+                if command is not None and self._should_explain(entry["shape_hash"]):
+                    entry["explain"] = await self._explain(client, entry["database"], command)
+            await client[settings.DATABASE_NAME][SLOW_QUERY_COLLECTION].insert_many(entries, ordered=False)
+        except asyncio.CancelledError:
+            # Put the batch back so a later flush still writes it
+            for entry in reversed(entries):
+                entry.pop("_id", None)
+                self._pending.appendleft(entry)
+            raise
+        self.recorded += len(entries)
+
+    async def start(self, client) -> None:
+        """Create the capped collection if needed and start the writer"""
+        db = client[settings.DATABASE_NAME]
+        try:
+            await db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=settings.SLOW_QUERY_LOG_BYTES)
+        except CollectionInvalid:
+            pass  # Already exists
+        await db[SLOW_QUERY_COLLECTION].create_index([("shape_hash", 1), ("at", -1)])
+        await db[SLOW_QUERY_COLLECTION].create_index("at")
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run(client))
+
+    async def stop(self, client) -> None:
+        """Let the writer finish its current flush, then write what is left"""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+            await self.flush(client)
+
+    async def _run(self, client) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=1)
+                return  # stop() writes the rest
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush(client)
+            except Exception as e:
+                print(f"Slow query log flush failed: {e}")
+
+    def stats(self) -> dict:
+        """Return counters for this worker"""
+        return {
+            "running": self.running,
+            "threshold_ms": self.threshold_micros / 1000,
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "explained": self.explained,
+            "explain_failures": self.explain_failures,
+            "dropped": self.dropped
+        }
+
+slow_query_log = SlowQueryLog(threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS)
+
+async def top_slow_queries(db, since: datetime, limit: int) -> List[dict]:
+    """Group logged commands by shape, worst total time first, each with its latest explain"""
+    groups = await db[SLOW_QUERY_COLLECTION].aggregate([
+        {"$match": {"at": {"$gte": since}}},
+        {"$group": {
+            "_id": "$shape_hash",
+            "collection": {"$first": "$collection"},
+            "command": {"$first": "$command"},
+            "shape": {"$first": "$shape"},
+            "routes": {"$addToSet": "$route"},
+            "count": {"$sum": 1},
+            "errors": {"$sum": {"$cond": [{"$ifNull": ["$error", False]}, 1, 0]}},
+            "total_ms": {"$sum": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "last_at": {"$max": "$at"}
+        }},
+        {"$sort": {"total_ms": -1}},
+        {"$limit": limit}
+    ]).to_list(length=limit)
+
+    explains = await asyncio.gather(*(
+        db[SLOW_QUERY_COLLECTION].find_one(
+            {"shape_hash": group["_id"], "explain": {"$exists": True}},
+            {"_id": 0, "explain": 1, "at": 1},
+            sort=[("at", -1)]
+        )
+        for group in groups
+    ))
+    return [
+        {
+            "shape_hash": group["_id"],
+            "collection": group["collection"],
+            "command": group["command"],
+            "shape": orjson.loads(group["shape"]) if group["shape"] else None,
+            "routes": sorted(group["routes"]),
+            "count": group["count"],
+            "errors": group["errors"],
+            "total_ms": round(group["total_ms"], 3),
+            "mean_ms": round(group["total_ms"] / group["count"], 3),
+            "max_ms": group["max_ms"],
+            "last_at": group["last_at"],
+            "explain": explained["explain"] if explained else None,
+            "explained_at": explained["at"] if explained else None
+        }
+        for group, explained in zip(groups, explains)
+    ]
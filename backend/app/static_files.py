@@ -0,0 +1,187 @@
+import os
+import re
+from collections import OrderedDict
+from typing import Optional, Tuple
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Byte ranges we serve: "bytes=start-end", "bytes=start-" and suffix "bytes=-length"
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header lies entirely outside the file"""
+
+class OpenFile:
+    """An open file shared by concurrent responses (reads use pread, so no shared offset)"""
+
+    def __init__(self, path: str, fd: int, size: int):
+        self.path = path
+        self.fd = fd
+        self.size = size
+        self.refs = 0
+        self.evicted = False
+
+class OpenFileCache:
+    """
+    LRU of open file descriptors for immutable files
+
+    Content-addressed media never changes once written, so a descriptor can be
+    reused across requests without re-checking the file. Evicted descriptors
+    stay open until the last response reading them releases them.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._files: "OrderedDict[str, OpenFile]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def acquire(self, path: str) -> OpenFile:
+        """Get an open handle for path (raises FileNotFoundError); release it when done"""
+        handle = self._files.get(path)
+        if handle is not None:
+            self._files.move_to_end(path)
+            self.hits += 1
+        else:
+            self.misses += 1
+            fd, size = await anyio.to_thread.run_sync(_open_file, path)
+            handle = self._files.get(path)
+            if handle is not None:
+                os.close(fd)  # Another request opened it while we waited
+            else:
+                handle = OpenFile(path, fd, size)
+                self._files[path] = handle
+                self._evict()
+        handle.refs += 1
+        return handle
+
+    def release(self, handle: OpenFile) -> None:
+        """Return a handle, closing it if it was evicted while in use"""
+        handle.refs -= 1
+        if handle.evicted and handle.refs == 0:
+            os.close(handle.fd)
+
+    def _evict(self) -> None:
+        while len(self._files) > self.maxsize:
+            _, handle = self._files.popitem(last=False)
+            handle.evicted = True
+            self.evictions += 1
+            if handle.refs == 0:
+                os.close(handle.fd)
+
+    def close(self) -> None:
+        """Close every idle descriptor"""
+        while self._files:
+            _, handle = self._files.popitem(last=False)
+            handle.evicted = True
+            if handle.refs == 0:
+                os.close(handle.fd)
+
+    def stats(self) -> dict:
+        """Return size and hit-rate counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._files),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+def _open_file(path: str) -> Tuple[int, int]:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return fd, os.fstat(fd).st_size
+    except BaseException:
+        os.close(fd)
+        raise
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range into inclusive (start, end) offsets
+
+    Returns None when the whole file should be sent: no header, a malformed
+    header, or a multi-range request (which we answer with the full body
+    rather than multipart/byteranges).
+    """
+    if not range_header:
+        return None
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, end
+
+class FileRangeResponse(Response):
+    """
+    Stream part or all of an open file without loading it into memory
+
+    Uses the ASGI zero-copy send extension (os.sendfile in the server) when
+    the server offers it, otherwise pread()s fixed-size chunks in a worker
+    thread. The handle is released back to its cache once the body is sent.
+    """
+
+    def __init__(self, cache: OpenFileCache, handle: OpenFile, start: int, end: int,
+                 status_code: int, headers: dict, media_type: str, chunk_size: int,
+                 send_body: bool = True):
+        self.cache = cache
+        self.handle = handle
+        self.start = start
+        self.length = end - start + 1
+        self.chunk_size = chunk_size
+        self.send_body = send_body
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers({**headers, "content-length": str(self.length)})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers
+            })
+            if not self.send_body or self.length == 0:
+                await send({"type": "http.response.body", "body": b""})
+            elif "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": self.handle.fd,
+                    "offset": self.start,
+                    "count": self.length
+                })
+            else:
+                await self._send_chunks(send)
+        finally:
+            self.cache.release(self.handle)
+
+    async def _send_chunks(self, send: Send) -> None:
+        offset, remaining = self.start, self.length
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(
+                os.pread, self.handle.fd, min(self.chunk_size, remaining), offset
+            )
+            if not chunk:
+                break  # File shorter than at open time; nothing more to send
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,242 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.database import get_database
+
+# Drain ids remembered on each user_stats document, so re-applying a drain is a no-op
+APPLIED_DRAINS_KEPT = 200
+
+# Replays that may fail for an outbox entry before it is set aside with dead_at
+OUTBOX_MAX_ATTEMPTS = 5
+
+class PointsBuffer:
+    """
+    Coalesce user_stats increments in memory and flush them with one bulk_write
+
+    Increments are summed per user and written every flush_interval_ms, or
+    sooner once max_entries users are pending, so the leaderboard lags by at
+    most the flush interval and a request never waits on user_stats. Only a
+    hard crash can lose the increments of the current interval.
+
+    Each flush tags its per-user updates with a drain id. An update pushes
+    its drain id onto the user's applied_drains (last APPLIED_DRAINS_KEPT
+    kept) and only matches while the id is not there yet, so writing the
+    same drain twice applies it once. When a flush fails, or its outcome is
+    unknown, the affected updates are saved with their drain ids to the
+    user_stats_outbox collection and replayed before the next flush; the
+    replay also runs at startup. Entries that fail OUTBOX_MAX_ATTEMPTS
+    replays are marked dead_at and no longer retried.
+    """
+
+    def __init__(self, flush_interval_ms: int, max_entries: int):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_entries = max_entries
+        self._pending: Dict[str, dict] = {}
+        self._unsaved: List[dict] = []  # Failed drains the outbox could not take either
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._outbox_dirty = True  # Replay anything left by a previous process
+        self.flushes = 0
+        self.flushed_users = 0
+        self.outboxed = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add(self, user_id: str, user_name: Optional[str] = None, **increments: int) -> None:
+        """Queue increments for a user (e.g. points=10, reports_submitted=1)"""
+        entry = self._pending.setdefault(user_id, {"inc": {}, "user_name": None})
+        for field, amount in increments.items():
+            entry["inc"][field] = entry["inc"].get(field, 0) + amount
+        if user_name:
+            entry["user_name"] = user_name
+        if len(self._pending) >= self.max_entries and self._wake is not None:
+            self._wake.set()
+
+    async def start(self) -> None:
+        """Start the background flush loop"""
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Let the flush loop finish its current flush, then write out everything still pending"""
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._unsaved:
+            print(f"Lost user stats increments for {len(self._unsaved)} users at shutdown")
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stopping:
+                return  # stop() runs the final flush
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"User stats flush failed: {e}")
+
+    async def flush(self) -> None:
+        """Replay the outbox if needed, then write all pending increments with one unordered bulk_write"""
+        db = await get_database()
+        if self._outbox_dirty:
+            await self._replay_outbox(db)
+        if not self._pending and not self._unsaved:
+            return
+
+        started_at = time.perf_counter()
+        drain_id = ObjectId()
+        entries = self._unsaved + [
+            {"user_id": user_id, "drain_id": drain_id, **entry} for user_id, entry in self._pending.items()
+        ]
+        self._unsaved, self._pending = [], {}
+        try:
+            failed = await self._apply(db, entries)
+        except Exception:
+            # Some of the bulk may have landed; the drain ids make replaying all of it safe
+            await self._write_outbox(db, entries)
+            raise
+        if failed:
+            await self._write_outbox(db, failed)
+        self.flushes += 1
+        self.flushed_users += len(entries) - len(failed)
+        self.last_flush_seconds = time.perf_counter() - started_at
+
+    async def _apply(self, db, entries: List[dict]) -> List[dict]:
+        """Write one update per entry, skipping drains already applied; returns the entries that failed"""
+        operations = []
+        for entry in entries:
+            update = {
+                "$inc": entry["inc"],
+                "$push": {"applied_drains": {"$each": [entry["drain_id"]], "$slice": -APPLIED_DRAINS_KEPT}}
+            }
+            if entry.get("user_name"):
+                update["$set"] = {"user_name": entry["user_name"]}
+            operations.append(UpdateOne(
+                {"user_id": entry["user_id"], "applied_drains": {"$ne": entry["drain_id"]}}, update, upsert=True
+            ))
+        try:
+            await db.user_stats.bulk_write(operations, ordered=False)
+            return []
+        except BulkWriteError as e:
+            errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+
+        failed = [entries[index] for index in sorted(errors)]
+        # The filter misses an existing user once the drain is applied, and the upsert then hits the
+        # unique user_id index; a duplicate key can also be a racing first insert, so check which it was
+        conflicted = {entries[index]["user_id"] for index, error in errors.items() if error.get("code") == 11000}
+        if conflicted:
+            applied = set()
+            async for stats in db.user_stats.find(
+                {"user_id": {"$in": list(conflicted)}}, {"_id": 0, "user_id": 1, "applied_drains": 1}
+            ):
+                applied.update((stats["user_id"], drain_id) for drain_id in stats.get("applied_drains", []))
+            failed = [entry for entry in failed if (entry["user_id"], entry["drain_id"]) not in applied]
+        return failed
+
+    async def _write_outbox(self, db, entries: List[dict]) -> None:
+        try:
+            await db.user_stats_outbox.insert_many([
+                {
+                    "user_id": entry["user_id"],
+                    "user_name": entry.get("user_name"),
+                    "inc": entry["inc"],
+                    "drain_id": entry["drain_id"],
+                    "attempts": 0,
+                    "created_at": datetime.utcnow()
+                }
+                for entry in entries
+            ])
+            self.outboxed += len(entries)
+            self._outbox_dirty = True
+        except Exception:
+            # Database unreachable: retry the same drains with the next flush
+            self._unsaved.extend(entries)
+
+    async def _replay_outbox(self, db) -> None:
+        while True:
+            entries = await db.user_stats_outbox.find({"dead_at": {"$exists": False}}).sort("_id", 1) \
+                .limit(self.max_entries).to_list(length=self.max_entries)
+            # At most APPLIED_DRAINS_KEPT entries per user, so none of a batch's drain ids are trimmed
+            # before its delete lands and a replay after a failed delete still sees all of them
+            per_user: Dict[str, int] = {}
+            batch = []
+            for entry in entries:
+                if per_user.get(entry["user_id"], 0) < APPLIED_DRAINS_KEPT:
+                    per_user[entry["user_id"]] = per_user.get(entry["user_id"], 0) + 1
+                    batch.append(entry)
+            if not batch:
+                self._outbox_dirty = False
+                return
+
+            failed_ids = {entry["_id"] for entry in await self._apply(db, batch)}
+            done = [entry["_id"] for entry in batch if entry["_id"] not in failed_ids]
+            if done:
+                await db.user_stats_outbox.delete_many({"_id": {"$in": done}})
+                self.replayed += len(done)
+            if failed_ids:
+                await self._record_failures(db, list(failed_ids))
+                return  # Failed entries are retried on the next flush, not in a tight loop
+            if len(batch) == len(entries) and len(entries) < self.max_entries:
+                self._outbox_dirty = False
+                return
+
+    async def _record_failures(self, db, ids: list) -> None:
+        await db.user_stats_outbox.update_many({"_id": {"$in": ids}}, {"$inc": {"attempts": 1}})
+        result = await db.user_stats_outbox.update_many(
+            {"_id": {"$in": ids}, "attempts": {"$gte": OUTBOX_MAX_ATTEMPTS}},
+            {"$set": {"dead_at": datetime.utcnow()}}
+        )
+        if result.modified_count:
+            self.dead_lettered += result.modified_count
+            print(f"Set aside {result.modified_count} user stats increments after {OUTBOX_MAX_ATTEMPTS} failed replays")
+
+    def stats(self) -> dict:
+        """Return pending size and flush counters"""
+        return {
+            "running": self.running,
+            "pending_users": len(self._pending),
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "max_entries": self.max_entries,
+            "flushes": self.flushes,
+            "flushed_users": self.flushed_users,
+            "outboxed": self.outboxed,
+            "replayed": self.replayed,
+            "dead_lettered": self.dead_lettered,
+            "last_flush_seconds": round(self.last_flush_seconds, 6)
+        }
+
+points_buffer = PointsBuffer(
+    flush_interval_ms=settings.STATS_FLUSH_INTERVAL_MS,
+    max_entries=settings.STATS_FLUSH_MAX_ENTRIES
+)
+
+async def award_points(user_id: str, user_name: Optional[str] = None, **increments: int) -> None:
+    """Apply user_stats increments through the write-behind buffer when it is running"""
+    if settings.STATS_WRITE_BEHIND and points_buffer.running:
+        points_buffer.add(user_id, user_name, **increments)
+        return
+
+    db = await get_database()
+    update = {"$inc": increments}
+    if user_name:
+        update["$set"] = {"user_name": user_name}
+    await db.user_stats.update_one({"user_id": user_id}, update, upsert=True)
@@ -32,28 +32,28 @@ def validate_coordinates(coordinates: List[float]) -> bool:
         
     return True
 
-def get_city_from_coordinates(coordinates: List[float]) -> Optional[str]:
-    """Get city name from coordinates (simplified mapping)"""
-    from config import settings
-    
+def to_geo_point(coordinates: Optional[List[float]]) -> Optional[dict]:
+    """Convert [lat, lng] coordinates to a GeoJSON Point (which is [lng, lat])"""
     if not coordinates or len(coordinates) != 2:
         return None
-        
     lat, lng = coordinates
-    min_distance = float('inf')
-    closest_city = None
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+def get_city_from_coordinates(coordinates: List[float]) -> Optional[str]:
+    """Get the nearest gazetteer place name within GEOCODER_MAX_DISTANCE_KM"""
+    from app.geocoder import get_geocoder
     
-    for city, city_coords in settings.CITY_COORDINATES.items():
-        city_lat, city_lng = city_coords
-        distance = ((lat - city_lat) ** 2 + (lng - city_lng) ** 2) ** 0.5
-        if distance < min_distance:
-            min_distance = distance
-            closest_city = city
+    if not coordinates or len(coordinates) != 2:
+        return None
     
-    # If coordinates are within reasonable distance (0.1 degrees ~ 11km)
-    if min_distance < 0.1:
-        return closest_city
-    return None
+    result = get_geocoder().reverse(coordinates[0], coordinates[1])
+    return result.place.name if result else None
+
+def append_detected_city(location: str, city: Optional[str]) -> str:
+    """Add a detected city to a free-text location unless it is already mentioned"""
+    if city and city.lower() not in location.lower():
+        return f"{location}, {city}"
+    return location
 
 def calculate_priority_from_keywords(description: str) -> ReportPriority:
     """Auto-calculate priority based on description keywords"""
@@ -108,6 +108,24 @@ def parse_search_query(query: str) -> dict:
         }
     }
 
+def _text_tokens(text: str) -> List[str]:
+    text = re.sub(r'[^a-z0-9\s]', ' ', text.lower())
+    return text.split()
+
+def text_similarity(text_a: str, text_b: str) -> float:
+    """Cosine similarity of word counts (same normalisation as the ML DuplicateDetector)"""
+    counts_a, counts_b = {}, {}
+    for token in _text_tokens(text_a):
+        counts_a[token] = counts_a.get(token, 0) + 1
+    for token in _text_tokens(text_b):
+        counts_b[token] = counts_b.get(token, 0) + 1
+    if not counts_a or not counts_b:
+        return 0.0
+    dot = sum(count * counts_b.get(token, 0) for token, count in counts_a.items())
+    norm_a = sum(count * count for count in counts_a.values()) ** 0.5
+    norm_b = sum(count * count for count in counts_b.values()) ** 0.5
+    return round(dot / (norm_a * norm_b), 4)
+
 def build_report_filter(
     department: Optional[Department] = None,
     status: Optional[ReportStatus] = None,
@@ -157,6 +175,13 @@ def validate_status_transition(current_status: ReportStatus, new_status: ReportS
     
     return new_status in allowed_transitions.get(current_status, [])
 
+def get_allowed_source_statuses(new_status: ReportStatus) -> List[ReportStatus]:
+    """Get the statuses from which a transition to new_status is allowed"""
+    return [
+        current_status for current_status in ReportStatus
+        if validate_status_transition(current_status, new_status)
+    ]
+
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for file uploads"""
     # Remove dangerous characters
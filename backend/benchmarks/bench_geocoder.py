@@ -0,0 +1,63 @@
+"""
+Compare reverse geocoding cost against gazetteer size
+
+Usage (from backend/):
+    python -m benchmarks.bench_geocoder --sizes 100,10000,100000
+
+Synthetic places are spread uniformly over Odisha's bounding box. The grid
+lookup should stay flat as the gazetteer grows; the linear scan (the old
+get_city_from_coordinates approach, with haversine) grows with it.
+"""
+import argparse
+import random
+from benchmarks.common import measure, format_seconds
+from app.config import settings
+from app.geocoder import Place, ReverseGeocoder, haversine_km
+
+ODISHA_BOUNDS = ((17.8, 22.6), (81.4, 87.5))
+
+def make_places(count: int, rng: random.Random) -> list:
+    (lat_min, lat_max), (lng_min, lng_max) = ODISHA_BOUNDS
+    return [
+        Place(f"ward-{i}", "ward", None, rng.uniform(lat_min, lat_max), rng.uniform(lng_min, lng_max))
+        for i in range(count)
+    ]
+
+def linear_reverse(places: list, lat: float, lng: float, max_distance_km: float):
+    best, best_distance = None, max_distance_km
+    for place in places:
+        distance = haversine_km(lat, lng, place.latitude, place.longitude)
+        if distance <= best_distance:
+            best, best_distance = place, distance
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,10000,100000", help="Gazetteer sizes")
+    parser.add_argument("--queries", type=int, default=200, help="Points per timed call")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    (lat_min, lat_max), (lng_min, lng_max) = ODISHA_BOUNDS
+    points = [[rng.uniform(lat_min, lat_max), rng.uniform(lng_min, lng_max)] for _ in range(args.queries)]
+    max_distance_km = settings.GEOCODER_MAX_DISTANCE_KM
+
+    print(f"Reverse geocoding, time per point (median of {args.repeat} runs, {args.queries} points per run)")
+    for size in (int(value) for value in args.sizes.split(",")):
+        places = make_places(size, rng)
+        geocoder = ReverseGeocoder(places, settings.GEOCODER_CELL_DEG, max_distance_km)
+
+        grid = measure(lambda: [geocoder.reverse(*point) for point in points], 1, args.repeat)
+        batch = measure(lambda: geocoder.reverse_many(points), 1, args.repeat)
+        # The linear scan is slow on large gazetteers, so time a slice of the points
+        sample = points[:max(1, args.queries * 100 // size)] if size > 100 else points
+        linear = measure(lambda: [linear_reverse(places, *point, max_distance_km) for point in sample], 1, args.repeat)
+
+        print(f"\n  {size} places")
+        print(f"    {'grid reverse()':<22} {format_seconds(grid['median'] / len(points)):>12}")
+        print(f"    {'grid reverse_many()':<22} {format_seconds(batch['median'] / len(points)):>12}")
+        print(f"    {'linear scan':<22} {format_seconds(linear['median'] / len(sample)):>12}")
+
+if __name__ == "__main__":
+    main()
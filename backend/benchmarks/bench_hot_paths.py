@@ -0,0 +1,167 @@
+"""
+Micro-benchmarks for helpers and models on every request's path, with stored baselines
+
+Usage (from backend/):
+    python -m benchmarks.bench_hot_paths --save baseline.json
+    python -m benchmarks.bench_hot_paths --compare baseline.json --threshold 10
+    python -m benchmarks.bench_hot_paths --only token
+
+Each case is timed with common.measure (CPU time, median of --repeat runs).
+--save writes the results with interpreter and platform details. --compare
+flags a case as a regression when its median is more than --threshold
+percent slower than the baseline and the slowdown is larger than twice the
+combined run-to-run noise; the exit status is 1 if anything regressed, so
+the comparison can gate CI. Baselines are machine specific: compare runs
+from the same host.
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+from benchmarks.common import measure, format_seconds
+from app.auth import create_access_token, verify_token, token_cache
+from app.config import settings
+from app.models import PaginatedResponse, ReportOut, Department, ReportStatus, ReportPriority
+from app.utils import build_report_filter, calculate_priority_from_keywords, generate_report_id, validate_coordinates
+
+DESCRIPTIONS = [
+    "Large pothole causing traffic slowdowns near the bus stand, needs urgent repair",
+    "Streetlight not working on the corner of Station Road for two weeks",
+    "Garbage bins overflowing near the vegetable market, bad smell in the area",
+    "Water pipe leak flooding the lane outside the primary school after the storm",
+    "Fallen tree branches on the park walking path, regular cleaning needed"
+]
+
+def make_documents(count: int) -> list:
+    """Report documents shaped like the REPORT_OUT_PROJECTION output"""
+    rng = random.Random(42)
+    cities = list(settings.CITY_COORDINATES.items())
+    now = datetime.utcnow()
+    documents = []
+    for i in range(count):
+        city, (lat, lng) = rng.choice(cities)
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        documents.append({
+            "id": f"R{i:06d}",
+            "user": "Ananya Gupta",
+            "title": "Pothole near the main market road",
+            "description": rng.choice(DESCRIPTIONS),
+            "department": rng.choice(list(Department)).value,
+            "location": city,
+            "coordinates": [lat + rng.uniform(-0.05, 0.05), lng + rng.uniform(-0.05, 0.05)],
+            "priority": rng.choice(list(ReportPriority)).value,
+            "status": rng.choice(list(ReportStatus)).value,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(hours=rng.randint(0, 48))
+        })
+    return documents
+
+def build_cases(page_size: int) -> Dict[str, Callable[[], object]]:
+    """Name -> zero-argument callable for every benchmarked hot path"""
+    documents = make_documents(page_size)
+    token = create_access_token({"sub": "E001"})
+    date_from = datetime.utcnow() - timedelta(days=30)
+
+    def verify_token_uncached():
+        token_cache.clear()
+        return verify_token(token)
+
+    return {
+        "build_report_filter.empty": lambda: build_report_filter(),
+        "build_report_filter.department_status": lambda: build_report_filter(
+            department=Department.sanitation, status=ReportStatus.pending
+        ),
+        "build_report_filter.all": lambda: build_report_filter(
+            department=Department.public_works, status=ReportStatus.in_progress, location="Cuttack",
+            priority=ReportPriority.high, search="pothole road", date_from=date_from, date_to=datetime.utcnow()
+        ),
+        "calculate_priority_from_keywords": lambda: [calculate_priority_from_keywords(text) for text in DESCRIPTIONS],
+        "generate_report_id": generate_report_id,
+        "validate_coordinates": lambda: validate_coordinates([20.296059, 85.824539]),
+        "token.create": lambda: create_access_token({"sub": "E001"}),
+        "token.verify_cached": lambda: verify_token(token),
+        "token.verify_uncached": verify_token_uncached,
+        "model.ReportOut": lambda: ReportOut(**documents[0]),
+        "model.ReportOut_dump": lambda: ReportOut(**documents[0]).model_dump(mode="json"),
+        f"model.PaginatedResponse[{page_size}]": lambda: PaginatedResponse(
+            items=[ReportOut(**document) for document in documents],
+            total=10000, skip=0, limit=page_size, has_more=True
+        ).model_dump(mode="json")
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print each case against the baseline; return the names that regressed"""
+    regressions = []
+    print(f"\n{'case':<45} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, stats in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<45} {'-':>12} {format_seconds(stats['median']):>12}       new")
+            continue
+        change = (stats["median"] - base["median"]) / base["median"] * 100
+        # Relative noise of both runs; a slowdown inside it is not reported
+        noise = math.hypot(stats["stdev"] / stats["median"], base["stdev"] / base["median"]) * 100
+        regressed = change > threshold and change > 2 * noise
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<45} {format_seconds(base['median']):>12} {format_seconds(stats['median']):>12} "
+              f"{change:>+8.1f}%" + ("  REGRESSION" if regressed else ""))
+    for name in sorted(baseline["results"].keys() - results.keys()):
+        print(f"{name:<45} (in baseline only)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200, help="Calls per timed run")
+    parser.add_argument("--repeat", type=int, default=9, help="Timed runs")
+    parser.add_argument("--page-size", type=int, default=50, help="Reports in the PaginatedResponse case")
+    parser.add_argument("--only", help="Run cases whose name contains this text")
+    parser.add_argument("--save", help="Write results to this baseline file")
+    parser.add_argument("--compare", help="Baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    cases = build_cases(args.page_size)
+    if args.only:
+        cases = {name: fn for name, fn in cases.items() if args.only in name}
+
+    results = {}
+    print(f"{'case':<45} {'median':>12} {'min':>12} {'stdev':>12}")
+    for name, fn in cases.items():
+        stats = measure(fn, args.number, args.repeat)
+        results[name] = stats
+        print(f"{name:<45} {format_seconds(stats['median']):>12} {format_seconds(stats['min']):>12} "
+              f"{format_seconds(stats['stdev']):>12}")
+
+    if args.save:
+        with open(args.save, "w") as baseline_file:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "number": args.number,
+                "repeat": args.repeat,
+                "results": results
+            }, baseline_file, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if args.only:
+            baseline["results"] = {name: stats for name, stats in baseline["results"].items() if args.only in name}
+        if baseline.get("python") != platform.python_version() or baseline.get("machine") != platform.machine():
+            print(f"\nNote: baseline is from Python {baseline.get('python')} on {baseline.get('machine')}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold}%")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compare serving uploaded media through the range-aware route with naive handlers
+
+Usage (from backend/):
+    python -m benchmarks.bench_media --sizes 20000,1000000,5000000
+
+Each handler is driven directly as an ASGI app (no sockets), so the numbers
+are the per-request cost inside the worker: wall time and the peak Python
+memory held while the response is sent. Servers that implement the ASGI
+zero-copy extension avoid the chunk copies entirely; this harness measures
+the pread fallback.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarks.common import measure, format_seconds
+import aiofiles
+from fastapi import FastAPI
+from fastapi.responses import FileResponse, Response
+from app.config import settings
+from app.media import content_addressed_path
+
+async def call_asgi(app, path: str, headers: list = ()) -> int:
+    """Run one GET through an ASGI app and return the number of body bytes sent"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "server": ("localhost", 80),
+        "client": ("127.0.0.1", 1234), "extensions": {},
+        "headers": [(b"host", b"localhost"), *headers]
+    }
+    received = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return received
+
+def build_naive_app(upload_directory: str) -> FastAPI:
+    naive = FastAPI()
+
+    @naive.get("/read/{file_path:path}")
+    async def read_and_return(file_path: str):
+        # Whole file read into memory per request
+        async with aiofiles.open(os.path.join(upload_directory, file_path), "rb") as media_file:
+            return Response(await media_file.read(), media_type="image/jpeg")
+
+    @naive.get("/fileresponse/{file_path:path}")
+    async def file_response(file_path: str):
+        # Starlette FileResponse: streams, but opens and stats the file on every request
+        return FileResponse(os.path.join(upload_directory, file_path), media_type="image/jpeg")
+
+    return naive
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="20000,1000000,5000000", help="File sizes in bytes")
+    parser.add_argument("--number", type=int, default=50, help="Requests per timed run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs")
+    args = parser.parse_args()
+
+    upload_directory = tempfile.mkdtemp(prefix="bench_media_")
+    settings.UPLOAD_DIRECTORY = upload_directory
+    from app.routes.media import router, open_files
+
+    media_app = FastAPI()
+    media_app.include_router(router)
+    naive_app = build_naive_app(upload_directory)
+    loop = asyncio.new_event_loop()
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        data = os.urandom(size)
+        relative_path = content_addressed_path(os.urandom(32).hex(), ".jpg")
+        absolute_path = os.path.join(upload_directory, relative_path)
+        os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+        with open(absolute_path, "wb") as media_file:
+            media_file.write(data)
+
+        cases = {
+            "naive read-and-return": (naive_app, "/read/" + relative_path, []),
+            "starlette FileResponse": (naive_app, "/fileresponse/" + relative_path, []),
+            "media route (cached fd, pread)": (media_app, "/media/" + relative_path, []),
+            "media route, 64KB range": (media_app, "/media/" + relative_path, [(b"range", b"bytes=0-65535")]),
+            "media route, If-None-Match": (
+                media_app, "/media/" + relative_path,
+                [(b"if-none-match", b'"' + relative_path.rsplit("/", 1)[1][:64].encode() + b'"')]
+            )
+        }
+
+        print(f"\nFile of {size} bytes (wall time per request, median of {args.repeat} runs; peak memory)")
+        for name, (app, path, headers) in cases.items():
+            def request():
+                return loop.run_until_complete(call_asgi(app, path, headers))
+
+            stats = measure(request, args.number, args.repeat, timer=time.perf_counter)
+            tracemalloc.start()
+            request()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {name:<34} {format_seconds(stats['median']):>12}  peak {peak / 1024:8.1f} KB")
+
+    print(f"\nOpen file cache: {open_files.stats()}")
+    open_files.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compare the CPU cost of the report list serialization paths
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization --limit 100
+"""
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta
+from benchmarks.common import measure, format_seconds
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.config import settings
+from app.models import PaginatedResponse, ReportOut, Department, ReportStatus, ReportPriority
+from app.responses import trusted_report_out, compress_body, brotli
+
+def make_documents(count: int) -> list:
+    """Build report documents shaped like the REPORT_OUT_PROJECTION output"""
+    rng = random.Random(42)
+    cities = list(settings.CITY_COORDINATES.items())
+    now = datetime.utcnow()
+    documents = []
+    for i in range(count):
+        city, (lat, lng) = rng.choice(cities)
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        documents.append({
+            "id": f"R{i:06d}",
+            "user": "Ananya Gupta",
+            "title": "Pothole near the main market road",
+            "description": "Large pothole causing traffic slowdowns near the bus stand, needs urgent repair",
+            "department": rng.choice(list(Department)).value,
+            "location": city,
+            "coordinates": [lat + rng.uniform(-0.05, 0.05), lng + rng.uniform(-0.05, 0.05)],
+            "priority": rng.choice(list(ReportPriority)).value,
+            "status": rng.choice(list(ReportStatus)).value,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(hours=rng.randint(0, 48))
+        })
+    return documents
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=100, help="Reports per page")
+    parser.add_argument("--number", type=int, default=50, help="Calls per timed run")
+    parser.add_argument("--repeat", type=int, default=7, help="Timed runs")
+    args = parser.parse_args()
+
+    documents = make_documents(args.limit)
+    loop = asyncio.new_event_loop()
+    response_field = create_response_field(name="Response_get_reports", type_=PaginatedResponse)
+
+    def page(items):
+        return {"items": items, "total": 10000, "skip": 0, "limit": args.limit, "has_more": True}
+
+    def legacy_path() -> bytes:
+        # ReportOut per document, response_model re-validation, stdlib json encoder
+        payload = PaginatedResponse(**page([ReportOut(**doc) for doc in documents]))
+        content = loop.run_until_complete(serialize_response(
+            field=response_field, response_content=payload, is_coroutine=True
+        ))
+        return JSONResponse(content).body
+
+    def trusted_path() -> bytes:
+        return orjson.dumps(page([trusted_report_out(doc) for doc in documents]))
+
+    legacy_body = legacy_path()
+    trusted_body = trusted_path()
+    results = {
+        "legacy (ReportOut + response_model + json)": measure(legacy_path, args.number, args.repeat),
+        "trusted (projection + orjson)": measure(trusted_path, args.number, args.repeat),
+        "gzip level %d" % settings.GZIP_LEVEL: measure(lambda: compress_body(trusted_body, "gzip"), args.number, args.repeat),
+    }
+    if brotli is not None:
+        results["brotli quality %d" % settings.BROTLI_QUALITY] = measure(
+            lambda: compress_body(trusted_body, "br"), args.number, args.repeat
+        )
+
+    print(f"Report list page with {args.limit} items (CPU time per request, median of {args.repeat} runs)")
+    for name, stats in results.items():
+        print(f"  {name:<45} {format_seconds(stats['median']):>12}  (stdev {format_seconds(stats['stdev'])})")
+
+    saved = results["legacy (ReportOut + response_model + json)"]["median"] - results["trusted (projection + orjson)"]["median"]
+    print(f"\nCPU saved per request: {format_seconds(saved)}")
+    print(f"Body size: legacy {len(legacy_body)} B, orjson {len(trusted_body)} B, "
+          f"gzip {len(compress_body(trusted_body, 'gzip'))} B"
+          + (f", brotli {len(compress_body(trusted_body, 'br'))} B" if brotli is not None else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict
+
+# Make the `app` package importable when running `python -m benchmarks.<name>` from backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def measure(fn: Callable[[], object], number: int = 100, repeat: int = 7,
+            timer: Callable[[], float] = time.process_time) -> Dict[str, float]:
+    """Time fn over `repeat` runs of `number` calls and summarize seconds per call"""
+    fn()  # Warm up caches and lazily built validators
+    samples = []
+    for _ in range(repeat):
+        start = timer()
+        for _ in range(number):
+            fn()
+        samples.append((timer() - start) / number)
+
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "runs": repeat,
+        "calls_per_run": number
+    }
+
+def format_seconds(seconds: float) -> str:
+    """Format a duration with a readable unit"""
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.2f} us"
@@ -0,0 +1,337 @@
+"""
+End-to-end HTTP load test against a real API process and mongod
+
+Usage (from backend/, with mongod listening on localhost:27017):
+    python -m benchmarks.loadtest --reports 20000 --users 200 --duration 60 --output run.json
+    python -m benchmarks.loadtest --duration 60 --output run2.json --compare run.json
+
+Seeds a scratch database (DATABASE_NAME is set to --database, dropped
+first), boots `uvicorn app.main:app` against it and drives virtual users
+through a weighted scenario mix: login bursts, filtered lists, text search,
+detail views, report creation, status changes and dashboard stats. Results
+are written as JSON with throughput and p50/p95/p99 latency per endpoint;
+--compare prints the p95 change against an earlier run. Pass --base-url to
+load an already running server instead (seeding still targets --mongo-url).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from benchmarks.common import format_seconds
+import httpx
+from pymongo import MongoClient
+from app.config import settings
+from app.models import Department, ReportPriority, ReportStatus
+from app.utils import to_geo_point
+
+LOADTEST_PASSWORD = "loadtest"
+
+# Scenario weights; login is bcrypt-bound, so it is a burst rather than steady traffic
+DEFAULT_MIX = "list=30,search=10,detail=25,create=10,status=5,dashboard=15,login=5"
+
+SEARCH_TERMS = ["pothole", "streetlight", "garbage", "leak", "drain", "signal", "tree", "bench", "water", "road"]
+ISSUES = [
+    ("Pothole on main road", "Large pothole causing traffic near the market", "Public Works"),
+    ("Streetlight not working", "Streetlight out for a week on the lane", "Electrical"),
+    ("Garbage not collected", "Overflowing garbage bin attracting stray animals", "Sanitation"),
+    ("Pipe leak", "Water leak from the municipal pipe flooding the road", "Water Supply"),
+    ("Signal malfunction", "Traffic signal stuck on red at the junction", "Traffic"),
+    ("Fallen tree in park", "Tree fell across the walking path after the storm", "Parks & Recreation"),
+    ("Blocked drain", "Drain blocked and overflowing during rain", "Sanitation"),
+    ("Broken bench", "Bench broken near the bus stop", "Public Works")
+]
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def seed(mongo_url: str, database: str, reports: int, users: int, rng: random.Random) -> None:
+    """Drop and fill the scratch database with employees and reports"""
+    from app.auth import get_password_hash
+
+    client = MongoClient(mongo_url)
+    client.drop_database(database)
+    db = client[database]
+    password = get_password_hash(LOADTEST_PASSWORD)  # One bcrypt hash shared by every employee
+    departments = [department.value for department in Department]
+    db.users.insert_many([
+        {
+            "employee_id": f"L{index:05d}",
+            "name": f"Load Test {index}",
+            "email": f"loadtest{index}@saarthi.gov.in",
+            "password": password,
+            "role": "admin" if index % 10 == 0 else "staff",
+            "department": departments[index % len(departments)],
+            "created_at": datetime.utcnow().isoformat()
+        }
+        for index in range(users)
+    ])
+
+    cities = list(settings.CITY_COORDINATES.items())
+    now = datetime.utcnow()
+    statuses = [ReportStatus.pending.value] * 5 + [ReportStatus.in_progress.value] * 3 + [ReportStatus.resolved.value] * 2
+    batch = []
+    for index in range(reports):
+        title, description, department = rng.choice(ISSUES)
+        city, (lat, lng) = rng.choice(cities)
+        coordinates = [round(lat + rng.uniform(-0.05, 0.05), 6), round(lng + rng.uniform(-0.05, 0.05), 6)]
+        created_at = now - timedelta(minutes=rng.randint(0, 90 * 24 * 60))
+        user = rng.randrange(users)
+        batch.append({
+            "id": f"LT{index:08d}",
+            "user": f"Load Test {user}",
+            "user_id": f"L{user:05d}",
+            "title": title,
+            "description": description,
+            "department": department,
+            "location": city,
+            "coordinates": coordinates,
+            "geo": to_geo_point(coordinates),
+            "priority": rng.choice([priority.value for priority in ReportPriority]),
+            "status": rng.choice(statuses),
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+        if len(batch) == 5000:
+            db.reports.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.reports.insert_many(batch, ordered=False)
+    db.user_stats.insert_many([
+        {
+            "user_id": f"L{index:05d}",
+            "user_name": f"Load Test {index}",
+            "points": rng.randint(0, 500),
+            "reports_submitted": rng.randint(0, 50),
+            "reports_resolved": rng.randint(0, 25)
+        }
+        for index in range(users)
+    ])
+    client.close()
+
+def start_server(args) -> subprocess.Popen:
+    """Boot uvicorn against the scratch database"""
+    env = {
+        **os.environ,
+        "DATABASE_URL": args.mongo_url,
+        "DATABASE_NAME": args.database,
+        "HOTSPOT_ENABLED": "false"
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(args.port), "--workers", str(args.workers), "--no-access-log"],
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("API did not become healthy in time")
+
+class LoadTest:
+    """Virtual users running a weighted scenario mix, recording latency per endpoint"""
+
+    def __init__(self, client: httpx.AsyncClient, mix: dict, users: int, reports: int, rng: random.Random):
+        self.client = client
+        self.scenarios = list(mix)
+        self.weights = [mix[name] for name in self.scenarios]
+        self.users = users
+        self.reports = reports
+        self.rng = rng
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.pending_ids = deque(maxlen=10000)  # Reports created in this run, free to move through statuses
+        self.in_progress_ids = deque(maxlen=10000)
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started_at = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - started_at)
+        self.statuses[endpoint][str(response.status_code)] += 1
+        return response
+
+    async def login(self, employee_index: int) -> dict:
+        response = await self.request("POST /auth/login", "POST", "/api/v1/auth/login", json={
+            "employee_id": f"L{employee_index:05d}", "password": LOADTEST_PASSWORD
+        })
+        if response.status_code != 200:
+            return {}
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def run_user(self, headers: dict, admin_headers: dict, deadline: float) -> None:
+        rng = self.rng
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(self.scenarios, self.weights)[0]
+            if scenario == "list":
+                params = {"limit": 20, "skip": rng.choice([0, 0, 20, 40])}
+                if rng.random() < 0.6:
+                    params["department"] = rng.choice(list(Department)).value
+                if rng.random() < 0.4:
+                    params["status"] = rng.choice(list(ReportStatus)).value
+                await self.request("GET /reports", "GET", "/api/v1/reports/", params=params, headers=headers)
+            elif scenario == "search":
+                await self.request("GET /reports?search", "GET", "/api/v1/reports/",
+                                   params={"search": rng.choice(SEARCH_TERMS), "limit": 20}, headers=headers)
+            elif scenario == "detail":
+                report_id = f"LT{rng.randrange(self.reports):08d}"
+                await self.request("GET /reports/{id}", "GET", f"/api/v1/reports/{report_id}", headers=headers)
+            elif scenario == "create":
+                title, description, department = rng.choice(ISSUES)
+                city, coordinates = rng.choice(list(settings.CITY_COORDINATES.items()))
+                response = await self.request("POST /reports", "POST", "/api/v1/reports/", headers=headers, json={
+                    "title": title, "description": description, "department": department,
+                    "location": city, "coordinates": coordinates
+                })
+                if response.status_code == 200:
+                    self.pending_ids.append(response.json()["id"])
+            elif scenario == "status":
+                if self.in_progress_ids and rng.random() < 0.5:
+                    report_id, new_status = self.in_progress_ids.popleft(), ReportStatus.resolved
+                elif self.pending_ids:
+                    report_id, new_status = self.pending_ids.popleft(), ReportStatus.in_progress
+                else:
+                    continue
+                response = await self.request("PUT /reports/{id}/status", "PUT", f"/api/v1/reports/{report_id}/status",
+                                              params={"new_status": new_status.value}, headers=admin_headers)
+                if response.status_code == 200 and new_status == ReportStatus.in_progress:
+                    self.in_progress_ids.append(report_id)
+            elif scenario == "dashboard":
+                await self.request("GET /stats/summary", "GET", "/api/v1/stats/summary", headers=headers)
+                await self.request("GET /stats/department-wise", "GET", "/api/v1/stats/department-wise", headers=headers)
+            elif scenario == "login":
+                # A burst of logins, as at the start of a shift
+                await asyncio.gather(*(self.login(rng.randrange(self.users)) for _ in range(5)))
+
+    async def run(self, concurrency: int, duration: float) -> float:
+        """Log virtual users in, then run them for `duration` seconds; returns elapsed seconds"""
+        sessions = await asyncio.gather(*(self.login(index % self.users) for index in range(concurrency)))
+        admin_headers = await self.login(0)  # Employee 0 is an admin
+        if not admin_headers or not all(sessions):
+            raise RuntimeError("Login failed; was the database seeded with these --users?")
+        self.latencies.clear()  # Warm-up logins are not part of the run
+        self.statuses.clear()
+
+        started_at = time.perf_counter()
+        deadline = started_at + duration
+        await asyncio.gather(*(self.run_user(headers, admin_headers, deadline) for headers in sessions))
+        return time.perf_counter() - started_at
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            samples.sort()
+            errors = sum(count for code, count in self.statuses[endpoint].items() if not code.startswith("2"))
+            endpoints[endpoint] = {
+                "count": len(samples),
+                "errors": errors,
+                "rps": round(len(samples) / elapsed, 2),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+                "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+                "max_ms": round(samples[-1] * 1000, 3),
+                "status": dict(self.statuses[endpoint])
+            }
+        total = sum(endpoint["count"] for endpoint in endpoints.values())
+        return {
+            "duration_seconds": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+            "endpoints": endpoints
+        }
+
+def print_summary(result: dict, baseline: dict = None) -> None:
+    print(f"\n{result['requests']} requests in {result['duration_seconds']} s, "
+          f"{result['throughput_rps']} req/s, {result['errors']} errors")
+    header = f"  {'endpoint':<28} {'req/s':>8} {'p50':>11} {'p95':>11} {'p99':>11} {'errors':>7}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    print(header)
+    for endpoint, stats in result["endpoints"].items():
+        line = (f"  {endpoint:<28} {stats['rps']:>8} {format_seconds(stats['p50_ms'] / 1000):>11} "
+                f"{format_seconds(stats['p95_ms'] / 1000):>11} {format_seconds(stats['p99_ms'] / 1000):>11} "
+                f"{stats['errors']:>7}")
+        base = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if base and base["p95_ms"]:
+            line += f" {(stats['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100:>+11.1f}%"
+        print(line)
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    mix = {name: float(weight) for name, weight in (part.split("=") for part in args.mix.split(","))}
+
+    if not args.no_seed:
+        print(f"Seeding {args.database}: {args.users} employees, {args.reports} reports")
+        seed(args.mongo_url, args.database, args.reports, args.users, rng)
+
+    server = None if args.base_url else start_server(args)
+    base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            await wait_until_ready(client, timeout=60)
+            load_test = LoadTest(client, mix, args.users, args.reports, rng)
+            print(f"Running {args.concurrency} virtual users for {args.duration} s against {base_url}")
+            elapsed = await load_test.run(args.concurrency, args.duration)
+            result = load_test.summary(elapsed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    result["config"] = {
+        "reports": args.reports, "users": args.users, "concurrency": args.concurrency,
+        "duration": args.duration, "workers": args.workers, "mix": mix, "seed": args.seed,
+        "started_at": datetime.utcnow().isoformat()
+    }
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017", help="mongod to seed and test against")
+    parser.add_argument("--database", default="saarthi_loadtest", help="Scratch database (dropped when seeding)")
+    parser.add_argument("--reports", type=int, default=20000, help="Reports to seed")
+    parser.add_argument("--users", type=int, default=200, help="Employees to seed")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the existing scratch database")
+    parser.add_argument("--base-url", help="Test a running server instead of booting one")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the booted server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Scenario weights, name=weight,...")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and scenario choice")
+    parser.add_argument("--output", help="Write the JSON result here")
+    parser.add_argument("--compare", help="Earlier JSON result to compare p95 latency against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_summary(result, baseline)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(result, output_file, indent=2)
+        print(f"\nWrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""
+Generate realistic synthetic reports, employees and user stats
+
+Usage (from backend/):
+    python -m scripts.generate_data --reports 1000000 --users 5000 --drop
+    python -m scripts.generate_data --reports 200000 --output reports.csv
+    python -m scripts.generate_data --reports 200000 --output reports.ndjson
+
+Vocabulary, issue mix and urgency per issue type are learned from
+odisha_civic_issues.csv: descriptions are recombined with a word-level
+Markov chain per issue type, with the city name and numbers re-sampled.
+Locations come from the gazetteer with a Zipf skew towards cities and
+places that are frequent in the CSV; coordinates scatter around each place.
+Reports arrive with a growth trend and a daytime peak, and move through
+Pending -> In Progress -> Resolved with priority-dependent delays, so the
+status at "now" is consistent with updated_at. Submitters are Zipf
+distributed over employees and resolutions are credited to department
+admins, which is how user_stats is derived.
+
+Reports are produced in chunks by a process pool; each chunk has its own
+seed, so output does not depend on --workers. Against MongoDB every worker
+writes its chunks with unordered insert_many; with --output the reports are
+written as importer-compatible CSV or as NDJSON documents, and employees and
+user stats go to sibling files (reports.users.csv, reports.user_stats.csv).
+"""
+import argparse
+import asyncio
+import csv
+import math
+import multiprocessing
+import os
+import random
+import re
+import sys
+import time
+from bisect import bisect
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection
+from app.geocoder import Place, load_gazetteer
+from app.importer import department_for_issue_type
+from app.models import Department, ReportPriority, ReportStatus
+from app.utils import calculate_priority_from_keywords, calculate_user_points, to_geo_point, validate_coordinates
+
+DEFAULT_SOURCE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "ML Model", "odisha_civic_issues.csv"
+)
+
+CITY_TOKEN = "{city}"
+NUMBER_TOKEN = "{n}"
+END_TOKEN = None
+
+# Median hours from report to pickup, and from pickup to resolution, by priority
+PICKUP_HOURS = {"critical": 2, "high": 12, "medium": 36, "low": 72}
+RESOLVE_HOURS = {"critical": 24, "high": 48, "medium": 96, "low": 168}
+NEVER_PICKED_UP = 0.08  # Share of reports nobody ever acts on
+
+# Relative report volume by hour of day (local time): morning and evening peaks
+HOURLY_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 6, 9, 10, 10, 9, 8, 7, 7, 7, 8, 9, 9, 7, 5, 3, 2, 1]
+
+REPORT_CSV_FIELDS = [
+    "title", "description", "department", "location", "latitude", "longitude",
+    "priority", "status", "created_at", "updated_at", "user_id", "user"
+]
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Amit", "Ananya", "Anjali", "Arjun", "Bikash", "Deepa", "Debasish", "Gayatri",
+    "Ipsita", "Jyoti", "Kiran", "Lipika", "Manas", "Meena", "Nitin", "Pooja", "Pradeep", "Priya",
+    "Rahul", "Rashmi", "Ritesh", "Sagar", "Sandeep", "Sasmita", "Smruti", "Soumya", "Subhash", "Swati",
+    "Tapan", "Vikram"
+]
+LAST_NAMES = [
+    "Behera", "Das", "Dash", "Gupta", "Jena", "Mahapatra", "Mishra", "Mohanty", "Nair", "Nayak",
+    "Panda", "Pattnaik", "Pradhan", "Rath", "Rout", "Sahoo", "Samal", "Sethi", "Singh", "Swain",
+    "Tripathy"
+]
+
+def _tokenize(description: str, location: str) -> List[str]:
+    if location:
+        description = re.sub(rf"\b{re.escape(location)}\b", CITY_TOKEN, description)
+    return [NUMBER_TOKEN if word.isdigit() else word for word in description.split()]
+
+class DataModel:
+    """Distributions learned from the source CSV and the gazetteer"""
+
+    def __init__(self, rows: List[dict], places: List[Place], location_skew: float):
+        self.issue_types: List[str] = []
+        self.issue_weights: List[int] = []
+        self.urgencies: Dict[str, Tuple[List[str], List[int]]] = {}
+        self.chains: Dict[str, Dict[Tuple, List]] = {}
+        self.starts: Dict[str, List[Tuple]] = {}
+
+        by_type = defaultdict(list)
+        for row in rows:
+            by_type[(row.get("issue_type") or "others").strip().lower()].append(row)
+        for issue_type, type_rows in sorted(by_type.items()):
+            self.issue_types.append(issue_type)
+            self.issue_weights.append(len(type_rows))
+            urgency = Counter((row.get("urgency") or "medium").strip().lower() for row in type_rows)
+            self.urgencies[issue_type] = (list(urgency), list(urgency.values()))
+
+            # Order-2 word chain; successors are kept as lists so sampling follows frequency
+            chain = defaultdict(list)
+            starts = []
+            for row in type_rows:
+                words = _tokenize(row.get("description") or "", (row.get("location") or "").strip())
+                if len(words) < 2:
+                    continue
+                starts.append((words[0], words[1]))
+                for first, second, following in zip(words, words[1:], words[2:] + [END_TOKEN]):
+                    chain[(first, second)].append(following)
+            self.chains[issue_type] = dict(chain)
+            self.starts[issue_type] = starts
+
+        # Zipf over places: cities first, then by how often the CSV mentions them
+        mentions = Counter((row.get("location") or "").strip() for row in rows)
+        ranked = sorted(places, key=lambda place: (place.kind != "city", -mentions[place.name]))
+        self.places = ranked
+        cumulative, total = [], 0.0
+        for rank in range(1, len(ranked) + 1):
+            total += 1 / rank ** location_skew
+            cumulative.append(total)
+        self.place_cum_weights = cumulative
+
+    @classmethod
+    def load(cls, source: str, location_skew: float) -> "DataModel":
+        with open(source, newline="", encoding="utf-8-sig") as source_file:
+            rows = list(csv.DictReader(source_file))
+        if os.path.exists(settings.GAZETTEER_PATH):
+            places = load_gazetteer(settings.GAZETTEER_PATH)
+        else:
+            places = [
+                Place(name=city, kind="city", district=None, latitude=lat, longitude=lng)
+                for city, (lat, lng) in settings.CITY_COORDINATES.items()
+            ]
+        return cls(rows, places, location_skew)
+
+    def description(self, rng: random.Random, issue_type: str, city: str) -> str:
+        chain, starts = self.chains[issue_type], self.starts[issue_type]
+        words = list(rng.choice(starts))
+        while len(words) < 40:
+            following = rng.choice(chain.get((words[-2], words[-1]), [END_TOKEN]))
+            if following is END_TOKEN:
+                break
+            words.append(following)
+        text = " ".join(words).replace(CITY_TOKEN, city)
+        text = text[0].upper() + text[1:]
+        while NUMBER_TOKEN in text:
+            text = text.replace(NUMBER_TOKEN, str(rng.randint(1, 60)), 1)
+        return text if len(text) >= 10 else f"{issue_type.capitalize()} problem reported in {city}"
+
+    def coordinates(self, rng: random.Random, place: Place) -> List[float]:
+        spread = 0.04 if place.kind == "city" else 0.015  # Degrees; cities sprawl further
+        for _ in range(10):
+            coordinates = [
+                round(rng.gauss(place.latitude, spread), 6),
+                round(rng.gauss(place.longitude, spread), 6)
+            ]
+            if validate_coordinates(coordinates):
+                return coordinates
+        return [place.latitude, place.longitude]
+
+def make_title(description: str, issue_type: str, city: str) -> str:
+    """First clause of the description, e.g. "Large pothole on main road" """
+    clause = re.split(r"\s(?:near|causing|since|for|after|due)\s|[,.;]", description, maxsplit=1)[0]
+    title = " ".join(clause.split()[:8])
+    if len(title) < 5:
+        title = f"{issue_type.capitalize()} issue in {city}"
+    return title[0].upper() + title[1:]
+
+def make_users(count: int, admin_share: float, rng: random.Random) -> List[dict]:
+    """Employees E1000.. spread over departments, with at least one admin per department"""
+    departments = [department.value for department in Department]
+    now = datetime.utcnow()
+    users = []
+    for index in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        employee_id = f"E{1000 + index}"
+        users.append({
+            "employee_id": employee_id,
+            "name": f"{first} {last}",
+            "email": f"{first}.{last}.{employee_id}@saarthi.gov.in".lower(),
+            "role": "admin" if index < len(departments) or rng.random() < admin_share else "staff",
+            "department": departments[index % len(departments)],
+            "is_active": True,
+            "created_at": now - timedelta(days=rng.randint(0, 1000))
+        })
+    return users
+
+def sample_created_at(rng: random.Random, now: datetime, days: int, growth: float) -> datetime:
+    """Report time with volume rising linearly by `growth` over the window and a daytime peak"""
+    u = rng.random()
+    # Inverse CDF of a density proportional to 1 + growth * t on [0, 1]
+    t = u if growth == 0 else (-1 + math.sqrt(1 + 2 * growth * u * (1 + growth / 2))) / growth
+    day = now.date() - timedelta(days=int((1 - t) * days))
+    hour = rng.choices(range(24), HOURLY_WEIGHTS)[0]
+    created_at = datetime(day.year, day.month, day.day, hour) + timedelta(seconds=rng.randrange(3600))
+    return min(created_at, now - timedelta(seconds=rng.randrange(1, 600)))
+
+def lifecycle(rng: random.Random, created_at: datetime, priority: str, now: datetime) -> Tuple[str, datetime]:
+    """Status at `now` and the time of the last transition"""
+    if rng.random() < NEVER_PICKED_UP:
+        return ReportStatus.pending.value, created_at
+    picked_up_at = created_at + timedelta(hours=rng.lognormvariate(math.log(PICKUP_HOURS[priority]), 1.0))
+    if picked_up_at > now:
+        return ReportStatus.pending.value, created_at
+    resolved_at = picked_up_at + timedelta(hours=rng.lognormvariate(math.log(RESOLVE_HOURS[priority]), 0.8))
+    if resolved_at > now:
+        return ReportStatus.in_progress.value, picked_up_at
+    return ReportStatus.resolved.value, resolved_at
+
+# Per-process state set up by the pool initializer
+_context: dict = {}
+
+def _init_worker(model: DataModel, users: List[dict], options: dict) -> None:
+    _context["model"] = model
+    _context["options"] = options
+    _context["reporters"] = [(user["employee_id"], user["name"]) for user in users]
+    cumulative, total = [], 0.0
+    for rank in range(1, len(users) + 1):
+        total += 1 / rank ** options["submitter_skew"]
+        cumulative.append(total)
+    _context["reporter_cum_weights"] = cumulative
+    admins = defaultdict(list)
+    for user in users:
+        if user["role"] == "admin":
+            admins[user["department"]].append(user["employee_id"])
+    _context["admins"] = dict(admins)
+    if options["mongo_url"]:
+        _context["db"] = MongoClient(options["mongo_url"])[options["database"]]
+
+def generate_reports(rng: random.Random, count: int, now: datetime) -> List[dict]:
+    model: DataModel = _context["model"]
+    options = _context["options"]
+    reporters, reporter_weights = _context["reporters"], _context["reporter_cum_weights"]
+    departments = [department.value for department in Department]
+    reports = []
+    for _ in range(count):
+        issue_type = rng.choices(model.issue_types, model.issue_weights)[0]
+        department = department_for_issue_type(issue_type) or rng.choice(departments)
+        place = model.places[bisect(model.place_cum_weights, rng.random() * model.place_cum_weights[-1])]
+        description = model.description(rng, issue_type, place.name)
+
+        urgencies, urgency_weights = model.urgencies[issue_type]
+        priority = rng.choices(urgencies, urgency_weights)[0]
+        if priority not in PICKUP_HOURS:
+            priority = ReportPriority.medium.value
+        if calculate_priority_from_keywords(description) == ReportPriority.critical:
+            priority = ReportPriority.critical.value
+
+        created_at = sample_created_at(rng, now, options["days"], options["growth"])
+        status, updated_at = lifecycle(rng, created_at, priority, now)
+        user_id, user_name = reporters[bisect(reporter_weights, rng.random() * reporter_weights[-1])]
+        coordinates = model.coordinates(rng, place)
+        reports.append({
+            "id": f"R{created_at:%Y%m%d%H%M%S}{rng.getrandbits(32):08X}",  # Same shape as generate_report_id
+            "user": user_name,
+            "user_id": user_id,
+            "title": make_title(description, issue_type, place.name),
+            "description": description,
+            "department": department,
+            "location": place.name,
+            "coordinates": coordinates,
+            "geo": to_geo_point(coordinates),
+            "priority": priority,
+            "status": status,
+            "created_at": created_at,
+            "updated_at": updated_at
+        })
+    return reports
+
+def report_csv_row(report: dict) -> dict:
+    row = {field: report.get(field) for field in REPORT_CSV_FIELDS}
+    row["latitude"], row["longitude"] = report["coordinates"]
+    row["created_at"] = report["created_at"].isoformat()
+    row["updated_at"] = report["updated_at"].isoformat()
+    return row
+
+def _run_chunk(task: Tuple[int, int, float]) -> tuple:
+    """Generate one chunk; insert it, or return serialized rows for the writer"""
+    chunk_index, count, now_timestamp = task
+    options = _context["options"]
+    rng = random.Random(f"{options['seed']}:{chunk_index}")
+    reports = generate_reports(rng, count, datetime.utcfromtimestamp(now_timestamp))
+
+    submitted, resolved = Counter(), Counter()
+    admins = _context["admins"]
+    for report in reports:
+        submitted[report["user_id"]] += 1
+        if report["status"] == ReportStatus.resolved.value and admins.get(report["department"]):
+            resolved[rng.choice(admins[report["department"]])] += 1
+
+    inserted, rows = 0, None
+    if "db" in _context:
+        try:
+            inserted = len(_context["db"].reports.insert_many(reports, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details["nInserted"]
+    elif options["format"] == "csv":
+        rows = [report_csv_row(report) for report in reports]
+    else:
+        rows = b"".join(orjson.dumps(report) + b"\n" for report in reports)
+    return inserted, rows, submitted, resolved
+
+def build_user_stats(users: List[dict], submitted: Counter, resolved: Counter) -> List[dict]:
+    submit_points = calculate_user_points("submit_report")
+    resolve_points = calculate_user_points("resolve_report")
+    return [
+        {
+            "user_id": user["employee_id"],
+            "user_name": user["name"],
+            "points": submitted[user["employee_id"]] * submit_points + resolved[user["employee_id"]] * resolve_points,
+            "reports_submitted": submitted[user["employee_id"]],
+            "reports_resolved": resolved[user["employee_id"]]
+        }
+        for user in users
+    ]
+
+def _sibling_path(output: str, name: str) -> str:
+    stem, extension = os.path.splitext(output)
+    return f"{stem}.{name}{extension}"
+
+def write_records(path: str, records: List[dict], output_format: str) -> None:
+    if output_format == "csv":
+        with open(path, "w", newline="") as output_file:
+            writer = csv.DictWriter(output_file, fieldnames=list(records[0]) if records else [])
+            writer.writeheader()
+            writer.writerows(
+                {key: value.isoformat() if isinstance(value, datetime) else value for key, value in record.items()}
+                for record in records
+            )
+    else:
+        with open(path, "wb") as output_file:
+            for record in records:
+                output_file.write(orjson.dumps(record) + b"\n")
+
+def generate(args) -> None:
+    model = DataModel.load(args.source, args.location_skew)
+    rng = random.Random(args.seed)
+    users = make_users(args.users, args.admin_share, rng)
+    # Heavy submitters are a random subset, not just the lowest employee IDs
+    submitters = users[:]
+    rng.shuffle(submitters)
+
+    output_format = None
+    if args.output:
+        output_format = args.format or ("csv" if args.output.endswith(".csv") else "ndjson")
+    options = {
+        "seed": args.seed,
+        "days": args.days,
+        "growth": args.growth,
+        "submitter_skew": args.submitter_skew,
+        "format": output_format,
+        "mongo_url": None if args.output else args.mongo_url,
+        "database": args.database
+    }
+
+    from app.auth import get_password_hash
+    password = get_password_hash(args.password)  # One bcrypt hash shared by every generated employee
+    for user in users:
+        user["password"] = password
+
+    if not args.output:
+        db = MongoClient(args.mongo_url)[args.database]
+        if args.drop:
+            for collection in ("reports", "users", "user_stats"):
+                db.drop_collection(collection)
+        try:
+            db.users.insert_many(users, ordered=False)
+        except BulkWriteError as e:
+            print(f"Skipped {len(e.details['writeErrors'])} existing employees")
+
+    now = time.time()
+    chunks = [
+        (index, min(args.batch_size, args.reports - start), now)
+        for index, start in enumerate(range(0, args.reports, args.batch_size))
+    ]
+    submitted, resolved = Counter(), Counter()
+    produced = inserted = 0
+    started_at = time.perf_counter()
+
+    report_file = None
+    if args.output:
+        report_file = open(args.output, "w", newline="") if output_format == "csv" else open(args.output, "wb")
+    try:
+        writer = None
+        if output_format == "csv":
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_CSV_FIELDS)
+            writer.writeheader()
+        with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(model, submitters, options)) as pool:
+            results = pool.imap_unordered(_run_chunk, chunks)
+            for done, (chunk_inserted, rows, chunk_submitted, chunk_resolved) in enumerate(results, 1):
+                inserted += chunk_inserted
+                submitted.update(chunk_submitted)
+                resolved.update(chunk_resolved)
+                if writer is not None:
+                    writer.writerows(rows)
+                elif rows is not None:
+                    report_file.write(rows)
+                produced += sum(chunk_submitted.values())
+                if done % 20 == 0:
+                    elapsed = time.perf_counter() - started_at
+                    print(f"  {produced}/{args.reports} reports ({produced / elapsed:.0f}/s)")
+    finally:
+        if report_file is not None:
+            report_file.close()
+
+    user_stats = build_user_stats(users, submitted, resolved)
+    if args.output:
+        write_records(_sibling_path(args.output, "users"), users, output_format)
+        write_records(_sibling_path(args.output, "user_stats"), user_stats, output_format)
+        print(f"Wrote {produced} reports to {args.output}, {len(users)} employees and their stats alongside")
+    else:
+        try:
+            db.user_stats.insert_many(user_stats, ordered=False)
+        except BulkWriteError as e:
+            print(f"Skipped {len(e.details['writeErrors'])} existing user stats")
+        asyncio.run(ensure_indexes(args.mongo_url, args.database))
+        print(f"Inserted {inserted} reports, {len(users)} employees and their stats into {args.database}")
+    elapsed = time.perf_counter() - started_at
+    print(f"Generated {produced} reports in {elapsed:.1f} s ({produced / elapsed:.0f}/s)")
+
+async def ensure_indexes(mongo_url: str, database: str) -> None:
+    """Build the application's indexes once, after the bulk load"""
+    settings.DATABASE_URL = mongo_url
+    settings.DATABASE_NAME = database
+    await connect_to_mongo()
+    await close_mongo_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=100000, help="Reports to generate")
+    parser.add_argument("--users", type=int, default=2000, help="Employees to generate")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="CSV to learn vocabulary and mixes from")
+    parser.add_argument("--days", type=int, default=365, help="How far back reports go")
+    parser.add_argument("--growth", type=float, default=1.0, help="Extra volume at the end of the window vs the start")
+    parser.add_argument("--location-skew", type=float, default=1.0, help="Zipf exponent over places")
+    parser.add_argument("--submitter-skew", type=float, default=1.1, help="Zipf exponent over submitting employees")
+    parser.add_argument("--admin-share", type=float, default=0.05, help="Share of employees who are admins")
+    parser.add_argument("--password", default="1234", help="Password for every generated employee")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Producer processes")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Reports per chunk and insert_many")
+    parser.add_argument("--mongo-url", default=settings.DATABASE_URL)
+    parser.add_argument("--database", default=settings.DATABASE_NAME)
+    parser.add_argument("--drop", action="store_true", help="Drop reports, users and user_stats first")
+    parser.add_argument("--output", help="Write files instead of inserting (.csv or .ndjson)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Output format when the extension is ambiguous")
+    args = parser.parse_args()
+    generate(args)
+
+if __name__ == "__main__":
+    main()
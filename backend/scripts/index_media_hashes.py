@@ -0,0 +1,88 @@
+"""
+Backfill perceptual hashes for report photos uploaded before hashing existed
+
+Usage (from backend/):
+    python -m scripts.index_media_hashes [--batch-size 200]
+
+Photos are hashed in a process pool and written back with one unordered
+bulk_write per batch. Setting media.hashed_at lets running API workers pick
+the photos up on their next photo index sync. Safe to re-run: only photos
+without a pHash are processed.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import UpdateOne
+from app.config import settings
+from app.database import Database, connect_to_mongo, close_mongo_connection
+from app.media import InvalidImage, hash_image
+
+async def index_media_hashes(batch_size: int) -> None:
+    await connect_to_mongo()
+    db = Database.database
+    loop = asyncio.get_running_loop()
+    hashed = failed = 0
+
+    cursor = db.reports.find(
+        {"media": {"$elemMatch": {"phash": {"$exists": False}}}},
+        {"_id": 0, "id": 1, "media.sha256": 1, "media.path": 1, "media.phash": 1}
+    ).batch_size(batch_size)
+
+    with ProcessPoolExecutor(max_workers=settings.MEDIA_WORKERS) as pool:
+        pending = []
+
+        async def flush():
+            nonlocal hashed, failed
+            results = await asyncio.gather(
+                *(loop.run_in_executor(pool, hash_image, settings.UPLOAD_DIRECTORY, path)
+                  for _, _, path in pending),
+                return_exceptions=True
+            )
+            operations = []
+            now = datetime.utcnow()
+            for (report_id, sha256, path), result in zip(pending, results):
+                if isinstance(result, (InvalidImage, FileNotFoundError)):
+                    print(f"Skipping {report_id} {path}: {result}")
+                    failed += 1
+                    continue
+                if isinstance(result, Exception):
+                    raise result
+                operations.append(UpdateOne(
+                    {"id": report_id, "media.sha256": sha256},
+                    {"$set": {
+                        "media.$.phash": result["phash"],
+                        "media.$.dhash": result["dhash"],
+                        "media.$.hashed_at": now
+                    }}
+                ))
+            if operations:
+                await db.reports.bulk_write(operations, ordered=False)
+                hashed += len(operations)
+            pending.clear()
+
+        async for report in cursor:
+            for media in report.get("media", []):
+                if "phash" not in media:
+                    pending.append((report["id"], media["sha256"], media["path"]))
+            if len(pending) >= batch_size:
+                await flush()
+        if pending:
+            await flush()
+
+    await close_mongo_connection()
+    print(f"Hashed {hashed} photos, skipped {failed}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill perceptual hashes for report photos")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(index_media_hashes(args.batch_size))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Add GeoJSON `geo` points to reports created before nearby search existed
+
+Usage (from backend/):
+    python -m scripts.migrate_geo
+
+Copies each report's [lat, lng] `coordinates` into a GeoJSON Point
+([lng, lat]) with one server-side update and ensures the 2dsphere index.
+Safe to re-run: reports that already have `geo` are left alone.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import connect_to_mongo, close_mongo_connection, migrate_report_geo
+
+async def main():
+    await connect_to_mongo()  # Also creates the 2dsphere index
+    updated = await migrate_report_geo()
+    print(f"Added geo points to {updated} reports")
+    await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# Make the `app` package importable when running `pytest` from backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Database
+
+@pytest.fixture
+def db():
+    """In-memory database standing in for MongoDB"""
+    client = AsyncMongoMockClient()
+    Database.client = client
+    Database.database = client["saarthi_test"]
+    yield Database.database
+    Database.client = Database.database = None
@@ -0,0 +1,35 @@
+import asyncio
+from datetime import datetime
+import pytest
+from app import auth
+from app.auth import get_cached_user, invalidate_user, user_cache
+
+@pytest.mark.asyncio
+async def test_lookup_racing_an_invalidation_is_not_cached(db, monkeypatch):
+    await db.users.insert_one({
+        "employee_id": "E001", "name": "Ananya Gupta", "email": "ananya.gupta@saarthi.gov.in",
+        "password": "hash", "role": "staff", "department": "Public Works", "created_at": datetime.utcnow()
+    })
+    user_cache.clear()
+    fetch = auth.get_user_by_employee_id
+    fetched = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_fetch(employee_id):
+        user = await fetch(employee_id)
+        fetched.set()
+        await release.wait()
+        return user
+
+    monkeypatch.setattr(auth, "get_user_by_employee_id", slow_fetch)
+    lookup = asyncio.create_task(get_cached_user("E001"))
+    await asyncio.wait_for(fetched.wait(), timeout=5)
+    await db.users.update_one({"employee_id": "E001"}, {"$set": {"role": "admin"}})
+    invalidate_user("E001")
+    release.set()
+
+    assert (await lookup).role == "staff"  # The caller still gets what it read
+    assert user_cache.get("E001") is None
+    monkeypatch.undo()
+    assert (await get_cached_user("E001")).role == "admin"
+    assert user_cache.get("E001").role == "admin"
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from app.config import settings
+from app.hotspots import HotspotEngine, bin_pipeline, DAY_FORMAT
+
+GEO = {"type": "Point", "coordinates": [85.82, 20.29]}
+
+@pytest.mark.asyncio
+async def test_bin_pipeline_matches_date_and_iso_string_created_at(db):
+    await db.reports.insert_many([
+        {"id": "date", "created_at": datetime(2025, 1, 2, 9), "geo": GEO, "status": "Pending"},
+        {"id": "string", "created_at": "2025-01-02T10:00:00", "geo": GEO, "status": "In Progress"},
+        {"id": "resolved", "created_at": datetime(2025, 1, 2, 11), "geo": GEO, "status": "Resolved"},
+        {"id": "before", "created_at": "2025-01-01T23:59:59", "geo": GEO, "status": "Pending"},
+        {"id": "after", "created_at": datetime(2025, 1, 3), "geo": GEO, "status": "Pending"},
+        {"id": "no-geo", "created_at": datetime(2025, 1, 2, 12), "geo": None, "status": "Pending"}
+    ])
+    pipeline = bin_pipeline("2025-01-02", 0.005)
+
+    matched = sorted([report["id"] async for report in db.reports.find(pipeline[0]["$match"])])
+    assert matched == ["date", "string"]
+    assert pipeline[2]["$group"]["_id"]["day"] == "2025-01-02"
+
+@pytest.mark.asyncio
+async def test_runs_rebin_only_the_days_that_changed(db, monkeypatch):
+    engine = HotspotEngine(interval_seconds=300)
+    rebinned = []
+
+    async def record_rebin(db, day):
+        rebinned.append(day)  # mongomock has no $merge
+
+    monkeypatch.setattr(engine, "_rebin", record_rebin)
+    now = datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def day(offset: int) -> datetime:
+        return today - timedelta(days=offset) + timedelta(hours=9)
+
+    await db.reports.insert_many([
+        {"id": "R1", "created_at": day(3), "updated_at": day(3), "geo": GEO, "status": "Pending"},
+        {"id": "R2", "created_at": day(5), "updated_at": day(5), "geo": GEO, "status": "Pending"}
+    ])
+
+    assert await engine.run_once()
+    assert len(rebinned) == settings.HOTSPOT_WINDOW_DAYS  # First run bins the whole window
+    rebinned.clear()
+    assert await engine.run_once()
+    assert rebinned == []
+
+    # Rewind the watermarks so the changes below land between two runs
+    since = now - timedelta(minutes=10)
+    await db.hotspot_state.update_one({"_id": "bins"}, {"$set": {
+        "watermark": ObjectId.from_datetime(since), "updated_watermark": since
+    }})
+    changed_at = now - timedelta(minutes=1)
+    await db.reports.update_one({"id": "R2"}, {"$set": {"status": "Resolved", "updated_at": changed_at}})
+    await db.reports.insert_many([
+        {"_id": ObjectId.from_datetime(changed_at), "id": "R3", "created_at": day(2).isoformat(),
+         "geo": GEO, "status": "Pending"},
+        # Imported with its historical timestamps, found through _id
+        {"_id": ObjectId.from_datetime(changed_at + timedelta(seconds=1)), "id": "R4", "created_at": day(8),
+         "updated_at": day(8), "geo": GEO, "status": "Pending"},
+        # Outside the window: never binned
+        {"_id": ObjectId.from_datetime(changed_at + timedelta(seconds=2)), "id": "R5",
+         "created_at": day(settings.HOTSPOT_WINDOW_DAYS + 30), "geo": GEO, "status": "Pending"}
+    ])
+
+    assert await engine.run_once()
+    assert rebinned == sorted(day(offset).strftime(DAY_FORMAT) for offset in (2, 5, 8))
+    assert engine.stats()["last_rebinned_days"] == 3
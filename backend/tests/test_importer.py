@@ -0,0 +1,137 @@
+import os
+import time
+from datetime import datetime
+import pytest
+from app import importer as importer_module
+from app.importer import (
+    ReportImporter, ImportFormatError, iter_lines, iter_csv_records, iter_ndjson_records, normalize_import_record
+)
+from app.models import UserInDB
+from app.utils import calculate_user_points
+
+REFERENCE_CSV = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "ML Model", "odisha_civic_issues.csv"
+)
+
+ADMIN = UserInDB(
+    employee_id="A001", name="Rohan Das", email="rohan.das@saarthi.gov.in", password="hash",
+    role="admin", created_at=datetime.utcnow()
+)
+
+async def stream(body: bytes, chunk_size: int = 7):
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+async def collect(records) -> list:
+    return [record async for record in records]
+
+async def run_import(db, body: bytes, parse, batch_size: int = 100) -> tuple:
+    importer = ReportImporter(db, ADMIN, batch_size=batch_size, max_errors=100)
+    async for row, record, error in parse(iter_lines(stream(body))):
+        await importer.add(row, record, error)
+    return importer, await importer.finish(time.perf_counter())
+
+@pytest.mark.asyncio
+async def test_csv_records_keep_quoted_newlines_and_report_bad_rows():
+    body = (
+        "﻿location,description,issue_type,urgency\n"
+        'Cuttack,"Streetlight out,\nsecond line",streetlight,low\n'
+        "Puri,too,many,columns,here\n"
+        "\n"
+        "Bhubaneswar,Overflowing bins near the market,garbage,high"
+    ).encode()
+    records = await collect(iter_csv_records(iter_lines(stream(body))))
+
+    assert records[0] == (2, {
+        "location": "Cuttack", "description": "Streetlight out,\nsecond line",
+        "issue_type": "streetlight", "urgency": "low"
+    }, None)
+    assert records[1] == (4, None, "Expected 4 columns, got 5")
+    assert records[2][0] == 6 and records[2][1]["location"] == "Bhubaneswar"
+
+@pytest.mark.asyncio
+async def test_ndjson_records_report_invalid_lines():
+    body = b'{"title": "a"}\nnot json\n\n[1, 2]\n{"title": "b"}'
+    records = await collect(iter_ndjson_records(iter_lines(stream(body))))
+
+    assert [(row, record) for row, record, _ in records] == [(1, {"title": "a"}), (2, None), (4, None), (5, {"title": "b"})]
+    assert records[1][2].startswith("Invalid JSON")
+    assert records[2][2] == "Expected a JSON object"
+
+@pytest.mark.asyncio
+async def test_overlong_line_is_rejected():
+    with pytest.raises(ImportFormatError):
+        await collect(iter_lines(stream(b"x" * (64 * 1024 + 1), chunk_size=4096)))
+
+def test_others_issue_type_uses_fallback_department():
+    fields = normalize_import_record({
+        "location": "Puri", "description": "Stray cattle blocking the beach road", "issue_type": "others"
+    })
+    assert fields["department"] == "Public Works"
+
+def test_unknown_issue_type_needs_a_department():
+    with pytest.raises(ValueError, match="Unknown issue_type"):
+        normalize_import_record({"location": "Puri", "description": "Something odd", "issue_type": "aliens"})
+
+@pytest.mark.asyncio
+async def test_reference_dataset_imports_cleanly(db):
+    with open(REFERENCE_CSV, "rb") as source:
+        body = source.read()
+    rows = body.decode("utf-8-sig").strip().count("\n")
+
+    importer, summary = await run_import(db, body, iter_csv_records, batch_size=128)
+
+    assert summary.failed == 0, summary.errors
+    assert summary.inserted == rows
+    assert await db.reports.count_documents({}) == rows
+
+@pytest.mark.asyncio
+async def test_rows_are_inserted_in_batches_and_errors_reported_per_row(db, monkeypatch):
+    reports_type = type(db.reports)
+    insert_many = reports_type.insert_many
+    batches = []
+
+    async def counting_insert_many(self, documents, **kwargs):
+        batches.append(len(documents))
+        return await insert_many(self, documents, **kwargs)
+
+    monkeypatch.setattr(reports_type, "insert_many", counting_insert_many)
+    lines = [
+        '{"title": "Pothole on the ring road", "description": "Deep pothole near the flyover exit",'
+        ' "department": "Public Works", "location": "Cuttack", "user_id": "E%03d", "user": "Reporter %d"}' % (i % 2, i % 2)
+        for i in range(5)
+    ]
+    lines.insert(2, '{"title": "x", "description": "Too short a title", "department": "Public Works", "location": "Puri"}')
+    lines.insert(4, '{"title": "Bad department", "description": "Unknown department value", "department": "Space", "location": "Puri"}')
+
+    importer, summary = await run_import(db, "\n".join(lines).encode(), iter_ndjson_records, batch_size=2)
+
+    assert batches == [2, 2, 1]
+    assert (summary.total_rows, summary.inserted, summary.failed) == (7, 5, 2)
+    assert [error.row for error in summary.errors] == [3, 5]
+    assert summary.errors[0].error.startswith("title:")
+    assert summary.errors[1].error.startswith("department:")
+
+@pytest.mark.asyncio
+async def test_points_are_awarded_once_per_user(db, monkeypatch):
+    body = "\n".join(
+        '{"title": "Streetlight not working", "description": "Lamp post dark for a week",'
+        ' "department": "Electrical", "location": "Puri", "user_id": "%s", "user": "%s"}' % (user_id, user_id)
+        for user_id in ["E001", "E001", "E001", "E002"]
+    ).encode()
+    awarded = []
+    award_points = importer_module.award_points
+
+    async def recording_award_points(user_id, user_name=None, **increments):
+        awarded.append(user_id)
+        await award_points(user_id, user_name, **increments)
+
+    monkeypatch.setattr(importer_module, "award_points", recording_award_points)
+    await run_import(db, body, iter_ndjson_records, batch_size=2)
+
+    points = calculate_user_points("submit_report")
+    assert sorted(awarded) == ["E001", "E002"]
+    e001 = await db.user_stats.find_one({"user_id": "E001"})
+    assert (e001["points"], e001["reports_submitted"]) == (3 * points, 3)
+    e002 = await db.user_stats.find_one({"user_id": "E002"})
+    assert (e002["points"], e002["reports_submitted"]) == (points, 1)
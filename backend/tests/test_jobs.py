@@ -0,0 +1,138 @@
+import asyncio
+import datetime as dt
+from datetime import datetime, timedelta
+import pytest
+from mongomock import aggregate
+from app import jobs
+from app.config import settings
+from app.jobs import JobHandler, JobQueue, enqueue, QUEUED, RUNNING, DONE, DEAD
+
+@pytest.fixture(autouse=True)
+def date_add(monkeypatch):
+    """Let mongomock's $add take a date, as MongoDB does (the other operands are milliseconds)"""
+    handle = aggregate._Parser._handle_arithmetic_operator
+
+    def handle_with_dates(self, operator, values):
+        if operator == "$add" and isinstance(values, list):
+            parsed = list(self.parse_many(values))
+            dates = [value for value in parsed if isinstance(value, dt.datetime)]
+            if dates:
+                milliseconds = sum(value for value in parsed if not isinstance(value, dt.datetime))
+                return dates[0] + timedelta(milliseconds=milliseconds)
+        return handle(self, operator, values)
+
+    monkeypatch.setattr(aggregate._Parser, "_handle_arithmetic_operator", handle_with_dates)
+
+def register(monkeypatch, name: str, func, timeout_seconds: int = 30, max_attempts: int = 3) -> None:
+    monkeypatch.setitem(jobs._handlers, name, JobHandler(func, timeout_seconds, max_attempts))
+
+def make_queue() -> JobQueue:
+    return JobQueue(concurrency=1, poll_interval_seconds=60)
+
+async def expire_lease(db, job_id) -> None:
+    await db.jobs.update_one({"_id": job_id}, {"$set": {"run_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+async def noop(payload: dict) -> None:
+    pass
+
+async def fail(payload: dict) -> None:
+    raise RuntimeError("thumbnail source missing")
+
+@pytest.mark.asyncio
+async def test_only_one_of_two_racing_workers_claims_a_job(db, monkeypatch):
+    register(monkeypatch, "test.noop", noop)
+    job_id = await enqueue("test.noop", {})
+    first, second = make_queue(), make_queue()
+
+    claims = await asyncio.gather(first.claim(db), second.claim(db))
+
+    claimed = [claim for claim in claims if claim is not None]
+    assert len(claimed) == 1 and claimed[0]["_id"] == job_id
+    assert claimed[0]["status"] == RUNNING and claimed[0]["attempts"] == 1
+
+@pytest.mark.asyncio
+async def test_lease_outlasts_the_handler_timeout(db, monkeypatch):
+    register(monkeypatch, "test.noop", noop, timeout_seconds=45)
+    await enqueue("test.noop", {})
+
+    job = await make_queue().claim(db)
+
+    lease = (job["run_at"] - job["claimed_at"]).total_seconds()
+    assert lease == pytest.approx(45 + settings.JOBS_LEASE_SLACK_SECONDS, abs=0.01)
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed_and_stale_owner_cannot_settle(db, monkeypatch):
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow(payload: dict) -> None:
+        started.set()
+        await release.wait()
+
+    register(monkeypatch, "test.slow", slow)
+    job_id = await enqueue("test.slow", {})
+    stale, current = make_queue(), make_queue()
+
+    running = asyncio.create_task(stale.run_next())
+    await asyncio.wait_for(started.wait(), timeout=5)
+    assert await current.claim(db) is None  # Still leased by the first worker
+
+    await expire_lease(db, job_id)
+    reclaimed = await current.claim(db)
+    assert reclaimed["claimed_by"] == current.worker_id and reclaimed["attempts"] == 2
+
+    release.set()
+    assert await asyncio.wait_for(running, timeout=5)
+    job = await db.jobs.find_one({"_id": job_id})
+    assert job["status"] == RUNNING and job["claimed_by"] == current.worker_id
+    assert "finished_at" not in job
+
+@pytest.mark.asyncio
+async def test_failed_job_is_queued_again_with_backoff(db, monkeypatch):
+    register(monkeypatch, "test.fail", fail)
+    job_id = await enqueue("test.fail", {})
+    queue = make_queue()
+    before = datetime.utcnow()
+
+    assert await queue.run_next()
+
+    job = await db.jobs.find_one({"_id": job_id})
+    assert job["status"] == QUEUED and job["attempts"] == 1
+    assert job["error"] == "RuntimeError: thumbnail source missing"
+    ceiling = settings.JOBS_BACKOFF_BASE_SECONDS
+    assert before + timedelta(seconds=ceiling / 2 - 0.01) <= job["run_at"] <= datetime.utcnow() + timedelta(seconds=ceiling)
+    assert queue.stats()["retried"] == 1
+    assert await queue.claim(db) is None  # Not due until the backoff passes
+
+@pytest.mark.asyncio
+async def test_job_is_dead_lettered_after_max_attempts(db, monkeypatch):
+    register(monkeypatch, "test.fail", fail, max_attempts=2)
+    job_id = await enqueue("test.fail", {})
+    queue = make_queue()
+
+    assert await queue.run_next()
+    await expire_lease(db, job_id)  # Skip the backoff
+    assert await queue.run_next()
+
+    job = await db.jobs.find_one({"_id": job_id})
+    assert job["status"] == DEAD and job["attempts"] == 2 and "finished_at" in job
+    assert queue.stats()["dead"] == 1 and queue.stats()["retried"] == 1
+    assert await queue.run_next() is False
+    assert [dead["_id"] for dead in await queue.list_dead(10)] == [str(job_id)]
+
+@pytest.mark.asyncio
+async def test_retry_gives_a_dead_job_a_fresh_attempt_budget(db, monkeypatch):
+    register(monkeypatch, "test.fail", fail, max_attempts=1)
+    job_id = await enqueue("test.fail", {})
+    queue = make_queue()
+    assert await queue.run_next()
+
+    assert await queue.retry(job_id)
+    job = await db.jobs.find_one({"_id": job_id})
+    assert job["status"] == QUEUED and job["attempts"] == 0 and "finished_at" not in job
+    assert await queue.retry(job_id) is False  # Only dead jobs can be retried
+
+    register(monkeypatch, "test.fail", noop, max_attempts=1)
+    assert await queue.run_next()
+    job = await db.jobs.find_one({"_id": job_id})
+    assert job["status"] == DONE and job["attempts"] == 1
@@ -0,0 +1,61 @@
+import io
+import os
+import pytest
+from PIL import Image
+from app.config import settings
+from app.media import InvalidImage, discard_upload, hash_image, stage_upload, store_upload
+
+@pytest.fixture
+def upload_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIRECTORY", str(tmp_path))
+    return tmp_path
+
+def image_bytes(image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (200, 40, 40)).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+async def stream(body: bytes):
+    for start in range(0, len(body), 1000):
+        yield body[start:start + 1000]
+
+@pytest.mark.asyncio
+async def test_stored_extension_follows_detected_format(upload_directory):
+    body = image_bytes("PNG")  # Sent with Content-Type: image/jpeg
+    staged = await stage_upload(stream(body), max_size=len(body))
+
+    hashes = hash_image(str(upload_directory), staged.path)
+    stored = store_upload(staged, hashes["format"])
+
+    assert hashes["format"] == "PNG"
+    assert stored.path.startswith("originals/") and stored.path.endswith(f"{stored.sha256}.png")
+    assert stored.content_type == "image/png" and stored.created
+    assert (upload_directory / stored.path).read_bytes() == body
+    assert not os.path.exists(upload_directory / staged.path)
+
+@pytest.mark.asyncio
+async def test_identical_upload_is_stored_once(upload_directory):
+    body = image_bytes("JPEG")
+    first = store_upload(await stage_upload(stream(body), max_size=len(body)), "JPEG")
+    staged = await stage_upload(stream(body), max_size=len(body))
+    second = store_upload(staged, "JPEG")
+
+    assert second.path == first.path and second.path.endswith(".jpg")
+    assert first.created and not second.created
+    assert os.listdir(upload_directory / "tmp") == []
+
+@pytest.mark.asyncio
+async def test_unsupported_or_invalid_upload_is_not_stored(upload_directory):
+    body = image_bytes("GIF")
+    staged = await stage_upload(stream(body), max_size=len(body))
+    with pytest.raises(InvalidImage):
+        store_upload(staged, hash_image(str(upload_directory), staged.path)["format"])
+    discard_upload(staged)
+
+    staged = await stage_upload(stream(b"not an image at all"), max_size=100)
+    with pytest.raises(InvalidImage):
+        hash_image(str(upload_directory), staged.path)
+    discard_upload(staged)
+
+    assert not os.path.exists(upload_directory / "originals")
+    assert os.listdir(upload_directory / "tmp") == []
@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta
+import pytest
+from app.phash import PhotoHashIndex
+
+def media(sha256: str, hashed_at: datetime) -> dict:
+    return {"sha256": sha256, "phash": "f0f0f0f0f0f0f0f0", "dhash": "0f0f0f0f0f0f0f0f", "hashed_at": hashed_at}
+
+@pytest.mark.asyncio
+async def test_sync_picks_up_photos_committed_behind_the_watermark(db):
+    index = PhotoHashIndex()
+    now = datetime.utcnow().replace(microsecond=0)  # MongoDB stores milliseconds
+    await db.reports.insert_one({"id": "R1", "coordinates": [20.29, 85.82], "media": [media("a", now)]})
+    await index.sync(db, force=True)
+    assert index.stats()["photos"] == 1
+
+    # A batch stamped before the watermark that only committed after the last sync
+    await db.reports.insert_one({
+        "id": "R2", "coordinates": [20.29, 85.82], "media": [media("b", now - timedelta(seconds=30))]
+    })
+    await index.sync(db, force=True)
+    await index.sync(db, force=True)
+    assert index.stats()["photos"] == 2
+    assert index.watermark == now
@@ -0,0 +1,31 @@
+import asyncio
+import time
+import pytest
+from app.profiling import SamplingProfiler, create_profile_token, verify_profile_token
+
+def test_valid_token_is_accepted():
+    assert verify_profile_token(create_profile_token(int(time.time()) + 60))
+
+def test_expired_token_is_rejected():
+    assert not verify_profile_token(create_profile_token(int(time.time()) - 1))
+
+@pytest.mark.parametrize("token", [
+    "", "²", "٣.abc", "9999999999.é", "9999999999.", "9999999999.abc",
+    "9999999999." + "g" * 64, "9999999999." + "A" * 64, "-1." + "a" * 64
+])
+def test_malformed_token_is_rejected(token):
+    assert verify_profile_token(token) is False
+
+@pytest.mark.asyncio
+async def test_sampler_does_not_touch_ended_profiles():
+    profiler = SamplingProfiler(interval_ms=1, max_seconds=30)
+    profile = profiler.begin("token", "GET", "/api/v1/reports/")
+    await asyncio.sleep(0.05)
+    profiler.end(profile)
+    samples = profile.samples
+    document = profile.to_document("/api/v1/reports/", 200, 100)
+    await asyncio.sleep(0.02)
+
+    assert profile.closed and samples > 0
+    assert profile.samples == samples
+    assert document["samples"] == samples
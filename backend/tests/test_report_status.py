@@ -0,0 +1,157 @@
+from datetime import datetime
+from typing import Optional
+import pytest
+from fastapi import HTTPException
+from mongomock.collection import Collection
+from app.models import BulkStatusUpdate, ReportStatus, ReportUpdate, UserInDB
+from app.routes import reports as reports_module
+from app.routes.reports import bulk_update_report_status, update_report, update_report_status
+from app.utils import calculate_user_points
+
+ADMIN = UserInDB(
+    employee_id="A001", name="Rohan Das", email="rohan.das@saarthi.gov.in", password="hash",
+    role="admin", created_at=datetime.utcnow()
+)
+STAFF = UserInDB(
+    employee_id="E001", name="Ananya Gupta", email="ananya.gupta@saarthi.gov.in", password="hash",
+    role="staff", created_at=datetime.utcnow()
+)
+RESOLVE_POINTS = calculate_user_points("resolve_report")
+
+@pytest.fixture(autouse=True)
+def find_and_modify_by_id(monkeypatch):
+    """Return the modified document like MongoDB does; mongomock re-runs the filter unless _id is projected"""
+    find_and_modify = Collection._find_and_modify
+
+    def by_id(self, query, projection=None, update=None, upsert=False, sort=None, *args, **kwargs):
+        match = self.find_one(query, projection={"_id": 1}, sort=sort)
+        if match is not None:
+            query = {"_id": match["_id"]}
+        return find_and_modify(self, query, projection, update, upsert, sort, *args, **kwargs)
+
+    monkeypatch.setattr(Collection, "_find_and_modify", by_id)
+
+def report(report_id: str, status: str) -> dict:
+    now = datetime.utcnow()
+    return {
+        "id": report_id, "user": "Ananya Gupta", "user_id": "E001", "title": "Pothole near the market",
+        "description": "Deep pothole slowing down traffic", "department": "Public Works", "location": "Cuttack",
+        "coordinates": [20.46, 85.88], "priority": "high", "status": status, "created_at": now, "updated_at": now
+    }
+
+async def resolved_points(db, employee_id: str = "A001") -> int:
+    stats = await db.user_stats.find_one({"user_id": employee_id})
+    return stats["points"] if stats else 0
+
+def change_status_before(db, monkeypatch, method: str, report_id: str, status: str,
+                         updated_at: Optional[datetime] = None) -> None:
+    """Make another request's status change land just before the next call to a reports method"""
+    collection_type = type(db.reports)
+    original = getattr(collection_type, method)
+
+    async def racing(self, *args, **kwargs):
+        monkeypatch.setattr(collection_type, method, original)
+        await db.reports.update_one({"id": report_id}, {"$set": {"status": status, "updated_at": updated_at or datetime.utcnow()}})
+        return await original(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection_type, method, racing)
+
+@pytest.mark.asyncio
+async def test_update_report_resolves_and_awards_points_once(db):
+    await db.reports.insert_one(report("R1", "In Progress"))
+
+    resolved = await update_report("R1", ReportUpdate(status=ReportStatus.resolved), ADMIN)
+    assert resolved.status == ReportStatus.resolved
+    assert await resolved_points(db) == RESOLVE_POINTS
+
+    # Resolving again is a same-status update, not a second resolution
+    again = await update_report("R1", ReportUpdate(status=ReportStatus.resolved, priority="low"), ADMIN)
+    assert again.status == ReportStatus.resolved and again.priority.value == "low"
+    assert await resolved_points(db) == RESOLVE_POINTS
+
+@pytest.mark.asyncio
+async def test_update_report_racing_a_resolution_does_not_award_twice(db, monkeypatch):
+    await db.reports.insert_one(report("R1", "In Progress"))
+    change_status_before(db, monkeypatch, "find_one_and_update", "R1", "Resolved")
+
+    updated = await update_report("R1", ReportUpdate(status=ReportStatus.resolved, title="Pothole fixed on time"), ADMIN)
+
+    assert updated.status == ReportStatus.resolved and updated.title == "Pothole fixed on time"
+    assert await resolved_points(db) == 0
+
+@pytest.mark.asyncio
+async def test_update_report_rejects_transition_that_became_invalid(db, monkeypatch):
+    await db.reports.insert_one(report("R1", "In Progress"))
+    # Another admin resolves the report while this one moves it back to Pending
+    change_status_before(db, monkeypatch, "find_one_and_update", "R1", "Resolved")
+
+    with pytest.raises(HTTPException) as error:
+        await update_report("R1", ReportUpdate(status=ReportStatus.pending, title="Reopened pothole"), ADMIN)
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid status transition from Resolved to Pending"
+    stored = await db.reports.find_one({"id": "R1"})
+    assert stored["status"] == "Resolved" and stored["title"] == "Pothole near the market"
+
+@pytest.mark.asyncio
+async def test_update_report_enforces_transitions_and_roles(db):
+    await db.reports.insert_one(report("R1", "Pending"))
+
+    with pytest.raises(HTTPException) as error:
+        await update_report("R1", ReportUpdate(status=ReportStatus.resolved), ADMIN)
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid status transition from Pending to Resolved"
+
+    with pytest.raises(HTTPException) as error:
+        await update_report("R1", ReportUpdate(status=ReportStatus.in_progress), STAFF)
+    assert error.value.status_code == 403
+
+    # Staff may resend the current status along with other fields
+    updated = await update_report("R1", ReportUpdate(status=ReportStatus.pending, location="Cuttack Sadar"), STAFF)
+    assert updated.location == "Cuttack Sadar" and updated.status == ReportStatus.pending
+
+    with pytest.raises(HTTPException) as error:
+        await update_report("R9", ReportUpdate(status=ReportStatus.in_progress), ADMIN)
+    assert error.value.status_code == 404
+
+@pytest.mark.asyncio
+async def test_status_endpoint_racing_a_resolution_fails_without_points(db, monkeypatch):
+    await db.reports.insert_one(report("R1", "In Progress"))
+    change_status_before(db, monkeypatch, "find_one_and_update", "R1", "Resolved")
+
+    with pytest.raises(HTTPException) as error:
+        await update_report_status("R1", ReportStatus.resolved, ADMIN)
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid status transition from Resolved to Resolved"
+    assert await resolved_points(db) == 0
+
+@pytest.mark.asyncio
+async def test_bulk_status_reports_concurrent_changes_per_id(db, monkeypatch):
+    await db.reports.insert_many([
+        report("R1", "In Progress"), report("R2", "In Progress"), report("R3", "In Progress"), report("R4", "Pending")
+    ])
+    # R2 is resolved by someone else between the pre-read and the bulk_write, in the same millisecond
+    now = datetime.utcnow().replace(microsecond=0)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now
+
+    monkeypatch.setattr(reports_module, "datetime", FrozenDatetime)
+    change_status_before(db, monkeypatch, "bulk_write", "R2", "Resolved", updated_at=now)
+
+    result = await bulk_update_report_status(
+        BulkStatusUpdate(ids=["R1", "R2", "R3", "R4", "R9", "R1"], status=ReportStatus.resolved), ADMIN
+    )
+
+    assert result.updated == ["R1", "R3"]
+    assert {failure.id: failure.reason for failure in result.failed} == {
+        "R2": "Report status changed concurrently",
+        "R4": "Invalid status transition from Pending to Resolved",
+        "R9": "Report not found"
+    }
+    assert await resolved_points(db) == 2 * RESOLVE_POINTS
+    assert (await db.user_stats.find_one({"user_id": "A001"}))["reports_resolved"] == 2
+    assert await db.reports.count_documents({"status": "Resolved"}) == 3
@@ -0,0 +1,30 @@
+import pytest
+from app import responses
+from app.responses import select_encoding
+
+@pytest.fixture
+def with_brotli():
+    if responses.brotli is None:
+        pytest.skip("brotli is not installed")
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("gzip;q=1, br;q=0.1", "gzip"),
+    ("br;q=0, *", "gzip"),
+    ("gzip;q=0, *", "br"),
+    ("gzip;q=0, br;q=0, *", None),
+    ("*;q=0", None),
+    ("GZIP ; Q=0.5, br;q=0.4", "gzip"),
+    ("gzip;q=abc", None)
+])
+def test_select_encoding_respects_q_values(with_brotli, header, expected):
+    assert select_encoding(header) == expected
+
+def test_select_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert select_encoding("br") is None
+    assert select_encoding("br, gzip;q=0.5") == "gzip"
+    assert select_encoding("*") == "gzip"
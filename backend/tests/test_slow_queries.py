@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.config import settings
+from app.slow_queries import SlowQueryLog, SLOW_QUERY_COLLECTION
+
+def entry(index: int) -> dict:
+    return {
+        "at": datetime.utcnow(), "route": "GET /api/v1/reports/", "database": settings.DATABASE_NAME,
+        "collection": "reports", "command": "find", "shape": None, "shape_hash": f"shape{index}",
+        "duration_ms": 150.0, "error": None, "_explain": None
+    }
+
+@pytest.mark.asyncio
+async def test_stop_writes_entries_of_an_in_flight_flush(monkeypatch):
+    client = AsyncMongoMockClient()
+    log = SlowQueryLog(threshold_ms=100)
+
+    async def create_collection(self, *args, **kwargs):
+        pass  # mongomock has no capped collections
+
+    monkeypatch.setattr(type(client[settings.DATABASE_NAME]), "create_collection", create_collection)
+    await log.start(client)
+    collection_type = type(client[settings.DATABASE_NAME][SLOW_QUERY_COLLECTION])
+    insert_many = collection_type.insert_many
+    in_flight = asyncio.Event()
+
+    async def slow_insert_many(self, *args, **kwargs):
+        in_flight.set()
+        await asyncio.sleep(0.1)
+        return await insert_many(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection_type, "insert_many", slow_insert_many)
+    log._pending.extend(entry(index) for index in range(3))
+    await asyncio.wait_for(in_flight.wait(), timeout=5)
+    log._pending.append(entry(3))
+    await log.stop(client)
+
+    assert await client[settings.DATABASE_NAME][SLOW_QUERY_COLLECTION].count_documents({}) == 4
+    assert log.stats()["recorded"] == 4 and not log.running
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_puts_entries_back(monkeypatch):
+    client = AsyncMongoMockClient()
+    log = SlowQueryLog(threshold_ms=100)
+    log._pending.extend(entry(index) for index in range(2))
+    collection = client[settings.DATABASE_NAME][SLOW_QUERY_COLLECTION]
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(type(collection), "insert_many", hang)
+        task = asyncio.create_task(log.flush(client))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert [pending["shape_hash"] for pending in log._pending] == ["shape0", "shape1"]
+    await log.flush(client)
+    assert await collection.count_documents({}) == 2
@@ -0,0 +1,204 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.stats_buffer import PointsBuffer, APPLIED_DRAINS_KEPT, OUTBOX_MAX_ATTEMPTS
+
+@pytest_asyncio.fixture
+async def buffer(db):
+    await db.user_stats.create_index("user_id", unique=True)
+    return PointsBuffer(flush_interval_ms=60000, max_entries=500)
+
+async def stats_of(db, user_id: str) -> dict:
+    return await db.user_stats.find_one({"user_id": user_id}, {"_id": 0, "applied_drains": 0})
+
+def fail_with(exception):
+    async def failing(*args, **kwargs):
+        raise exception
+    return failing
+
+@pytest.mark.asyncio
+async def test_add_writes_nothing_until_flush(db, buffer):
+    buffer.add("E001", "Ananya Gupta", points=10, reports_submitted=1)
+    assert await db.user_stats.count_documents({}) == 0
+    assert await db.user_stats_outbox.count_documents({}) == 0
+
+@pytest.mark.asyncio
+async def test_flush_coalesces_per_user(db, buffer, monkeypatch):
+    for _ in range(3):
+        buffer.add("E001", "Ananya Gupta", points=10, reports_submitted=1)
+    buffer.add("E002", points=25, reports_resolved=1)
+
+    stats_type = type(db.user_stats)
+    bulk_write = stats_type.bulk_write
+    calls = []
+
+    async def counting_bulk_write(self, operations, **kwargs):
+        calls.append(len(operations))
+        return await bulk_write(self, operations, **kwargs)
+
+    monkeypatch.setattr(stats_type, "bulk_write", counting_bulk_write)
+    await buffer.flush()
+
+    assert calls == [2]
+    assert await stats_of(db, "E001") == {
+        "user_id": "E001", "user_name": "Ananya Gupta", "points": 30, "reports_submitted": 3
+    }
+    assert await stats_of(db, "E002") == {"user_id": "E002", "points": 25, "reports_resolved": 1}
+    assert await db.user_stats_outbox.count_documents({}) == 0
+
+@pytest.mark.asyncio
+async def test_failed_flush_spills_to_outbox_and_replays(db, buffer, monkeypatch):
+    buffer.add("E001", points=10)
+    monkeypatch.setattr(type(db.user_stats), "bulk_write", fail_with(ConnectionError("database unreachable")))
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    assert await db.user_stats_outbox.count_documents({}) == 1
+    assert buffer.stats()["pending_users"] == 0
+
+    monkeypatch.undo()
+    buffer.add("E001", points=5)
+    await buffer.flush()
+    assert (await stats_of(db, "E001"))["points"] == 15
+    assert await db.user_stats_outbox.count_documents({}) == 0
+
+@pytest.mark.asyncio
+async def test_flush_that_landed_but_reported_failure_is_not_double_counted(db, buffer, monkeypatch):
+    stats_type = type(db.user_stats)
+    bulk_write = stats_type.bulk_write
+
+    async def lost_reply(self, operations, **kwargs):
+        await bulk_write(self, operations, **kwargs)
+        raise ConnectionError("connection reset")
+
+    buffer.add("E001", points=10)
+    monkeypatch.setattr(stats_type, "bulk_write", lost_reply)
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    monkeypatch.undo()
+
+    await buffer.flush()
+    assert (await stats_of(db, "E001"))["points"] == 10
+    assert await db.user_stats_outbox.count_documents({}) == 0
+
+@pytest.mark.asyncio
+async def test_unreachable_outbox_keeps_the_drain_in_memory(db, buffer, monkeypatch):
+    buffer.add("E001", points=10)
+    monkeypatch.setattr(type(db.user_stats), "bulk_write", fail_with(ConnectionError("database unreachable")))
+    monkeypatch.setattr(type(db.user_stats_outbox), "insert_many", fail_with(ConnectionError("database unreachable")))
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+
+    monkeypatch.undo()
+    await buffer.flush()
+    assert (await stats_of(db, "E001"))["points"] == 10
+
+@pytest.mark.asyncio
+async def test_startup_replays_outbox_left_by_previous_process(db, buffer):
+    await db.user_stats_outbox.insert_many([
+        {"user_id": "E001", "user_name": None, "inc": {"points": 10}, "drain_id": ObjectId(), "attempts": 0},
+        {"user_id": "E001", "user_name": None, "inc": {"points": 5}, "drain_id": ObjectId(), "attempts": 0}
+    ])
+    await buffer.flush()
+    assert (await stats_of(db, "E001"))["points"] == 15
+    assert await db.user_stats_outbox.count_documents({}) == 0
+
+@pytest.mark.asyncio
+async def test_replay_of_many_entries_for_one_user_survives_failed_delete(db, buffer, monkeypatch):
+    count = APPLIED_DRAINS_KEPT + 50
+    await db.user_stats_outbox.insert_many([
+        {"user_id": "E001", "user_name": None, "inc": {"points": 1}, "drain_id": ObjectId(), "attempts": 0}
+        for _ in range(count)
+    ])
+    outbox_type = type(db.user_stats_outbox)
+    monkeypatch.setattr(outbox_type, "delete_many", fail_with(ConnectionError("connection reset")))
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    monkeypatch.undo()
+
+    # Every applied entry is still remembered, so the retry applies only the remaining ones
+    await buffer.flush()
+    assert (await stats_of(db, "E001"))["points"] == count
+    assert await db.user_stats_outbox.count_documents({}) == 0
+
+@pytest.mark.asyncio
+async def test_failing_entry_is_dead_lettered_without_blocking_others(db, buffer, monkeypatch):
+    stats_type = type(db.user_stats)
+    bulk_write = stats_type.bulk_write
+
+    async def reject_e009(self, operations, **kwargs):
+        # As MongoDB does for an $inc on a non-numeric field: the rest of the unordered bulk applies
+        rejected = [index for index, operation in enumerate(operations) if operation._filter["user_id"] == "E009"]
+        accepted = [operation for index, operation in enumerate(operations) if index not in rejected]
+        if accepted:
+            await bulk_write(self, accepted, **kwargs)
+        if rejected:
+            raise BulkWriteError({"writeErrors": [
+                {"index": index, "code": 14, "errmsg": "Cannot apply $inc to a value of non-numeric type"}
+                for index in rejected
+            ]})
+
+    monkeypatch.setattr(stats_type, "bulk_write", reject_e009)
+    buffer.add("E009", points=10)
+    buffer.add("E001", points=10)
+    await buffer.flush()
+    assert (await stats_of(db, "E001"))["points"] == 10
+    assert await db.user_stats_outbox.count_documents({"user_id": "E009"}) == 1
+
+    for _ in range(OUTBOX_MAX_ATTEMPTS):
+        buffer.add("E001", points=1)
+        await buffer.flush()
+
+    assert (await stats_of(db, "E001"))["points"] == 10 + OUTBOX_MAX_ATTEMPTS
+    dead = await db.user_stats_outbox.find_one({"user_id": "E009"})
+    assert dead["attempts"] == OUTBOX_MAX_ATTEMPTS and "dead_at" in dead
+    assert buffer.stats()["dead_lettered"] == 1
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_increments(db, buffer):
+    await buffer.start()
+    buffer.add("E001", points=10)
+    buffer.add("E001", points=10)
+    await buffer.stop()
+
+    assert not buffer.running
+    assert (await stats_of(db, "E001"))["points"] == 20
+    assert await db.user_stats_outbox.count_documents({}) == 0
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_in_flight_flush(db, monkeypatch):
+    await db.user_stats.create_index("user_id", unique=True)
+    buffer = PointsBuffer(flush_interval_ms=10, max_entries=100)
+    stats_type = type(db.user_stats)
+    bulk_write = stats_type.bulk_write
+    in_flight = asyncio.Event()
+
+    async def slow_bulk_write(self, *args, **kwargs):
+        in_flight.set()
+        await asyncio.sleep(0.1)
+        return await bulk_write(self, *args, **kwargs)
+
+    monkeypatch.setattr(stats_type, "bulk_write", slow_bulk_write)
+    await buffer.start()
+    buffer.add("E001", points=10)
+    await asyncio.wait_for(in_flight.wait(), timeout=5)
+    buffer.add("E001", points=5)
+    await buffer.stop()
+
+    assert (await stats_of(db, "E001"))["points"] == 15
+    assert await db.user_stats_outbox.count_documents({}) == 0
+
+@pytest.mark.asyncio
+async def test_shutdown_flush_failure_spills_to_outbox(db, buffer, monkeypatch):
+    await buffer.start()
+    buffer.add("E001", points=10)
+    monkeypatch.setattr(type(db.user_stats), "bulk_write", fail_with(ConnectionError("database unreachable")))
+    with pytest.raises(ConnectionError):
+        await buffer.stop()
+    monkeypatch.undo()
+
+    assert await db.user_stats_outbox.count_documents({"user_id": "E001"}) == 1
+    # The next process replays it at startup
+    await PointsBuffer(flush_interval_ms=60000, max_entries=500).flush()
+    assert (await stats_of(db, "E001"))["points"] == 10